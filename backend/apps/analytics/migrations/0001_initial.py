@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', '貼文'), ('portfolio', '作品集')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('day', models.DateField(blank=True, null=True)),
+                ('registers', models.BinaryField(default=b'')),
+                ('estimate', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '瀏覽草稿',
+                'verbose_name_plural': '瀏覽草稿',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('day__isnull', False)), fields=('kind', 'object_id', 'day'), name='analytics_sketch_daily'), models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('kind', 'object_id'), name='analytics_sketch_total')],
+            },
+        ),
+    ]
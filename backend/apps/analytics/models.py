@@ -0,0 +1,52 @@
+# apps/analytics/models.py
+# 瀏覽分析模型檔案，保存貼文與作品集的不重複瀏覽者草稿
+# 功能：每個內容每天一個 HyperLogLog 草稿，另有一個累計（day 為空）草稿
+# 資料來源：services.py 定期寫回的瀏覽紀錄
+# 資料流向：PostSerializer / PortfolioSerializer 的 unique_viewers、views.py 的創作者分析
+
+from django.db import models
+
+from .hll import HyperLogLog
+
+
+class ViewSketch(models.Model):
+    """
+    不重複瀏覽者草稿
+    kind + object_id 指向貼文或作品集（不設外鍵，內容刪除時由 signals.py 清除）
+    day: 統計日期，累計草稿為空
+    registers: 壓縮後的 HyperLogLog 暫存器；estimate: 寫回時計算的估計值，列表可直接以子查詢帶出
+    """
+    KIND_POST = 'post'
+    KIND_PORTFOLIO = 'portfolio'
+    KIND_CHOICES = (
+        (KIND_POST, '貼文'),
+        (KIND_PORTFOLIO, '作品集'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)  # 內容類型
+    object_id = models.BigIntegerField()  # 內容 id
+    day = models.DateField(null=True, blank=True)  # 統計日期（累計草稿為空）
+    registers = models.BinaryField(default=b'')  # 壓縮後的暫存器
+    estimate = models.PositiveIntegerField(default=0)  # 不重複瀏覽者估計值
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = '瀏覽草稿'
+        verbose_name_plural = '瀏覽草稿'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id', 'day'], name='analytics_sketch_daily',
+                condition=models.Q(day__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='analytics_sketch_total',
+                condition=models.Q(day__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} on {self.day or 'all time'}: {self.estimate}"
+
+    @property
+    def sketch(self):
+        return HyperLogLog.from_bytes(self.registers)
@@ -0,0 +1,134 @@
+# apps/analytics/services.py
+# 瀏覽分析服務檔案，記錄貼文與作品集的瀏覽者並定期寫回 HyperLogLog 草稿
+# 功能：瀏覽時只更新行程內緩衝（config/buffers.py）中的草稿；背景計時執行緒每隔 ANALYTICS_FLUSH_SECONDS
+#       將各內容當日與累計草稿合併進資料庫（合併取最大值，重複寫回與多個 worker 同時寫回都不會重複計算）；
+#       為查詢集帶出不重複瀏覽者估計值
+# 資料來源：posts / portfolios 的詳情視圖、settings.ANALYTICS_FLUSH_SECONDS
+# 資料流向：ViewSketch
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from config.buffers import WriteBuffer
+
+from .hll import HyperLogLog
+from .models import ViewSketch
+
+
+def viewer_key(request):
+    """瀏覽者識別：登入用戶以用戶 id，匿名瀏覽以來源 IP"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.id}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def record_view(kind, object_id, viewer):
+    """記錄一次瀏覽（只更新行程內草稿，由背景執行緒定期寫回）"""
+    key = (kind, object_id, timezone.localdate())
+    _sketches.update(lambda pending: pending.setdefault(key, HyperLogLog()).add(viewer))
+
+
+def _write_sketches(pending):
+    """
+    將取出的草稿 {(kind, object_id, day): HyperLogLog} 合併進資料庫的當日與累計草稿，回傳寫回的草稿列數
+    先以 ignore_conflicts 補齊不存在的列，再一次鎖定所有相關列、合併後批次更新；
+    插入與鎖定都依固定順序進行，多個行程同時寫回重疊的草稿時不會互相等待形成死結
+    """
+    # 同一內容的多日草稿合併成累計草稿
+    merged = {}
+    for (kind, object_id, day), sketch in pending.items():
+        merged[(kind, object_id, day)] = sketch
+        total = merged.setdefault((kind, object_id, None), HyperLogLog())
+        total.merge(sketch)
+
+    with transaction.atomic():
+        ViewSketch.objects.bulk_create(
+            [
+                ViewSketch(kind=kind, object_id=object_id, day=day)
+                for kind, object_id, day in sorted(merged, key=lambda key: (key[0], key[1], key[2] or date.min))
+            ],
+            ignore_conflicts=True,
+        )
+        condition = Q()
+        for kind, object_id, day in merged:
+            condition |= Q(kind=kind, object_id=object_id, day=day)
+        rows = list(ViewSketch.objects.select_for_update().filter(condition).order_by('pk'))
+        for row in rows:
+            sketch = row.sketch.merge(merged[(row.kind, row.object_id, row.day)])
+            row.registers = sketch.to_bytes()
+            row.estimate = sketch.estimate()
+            row.updated_at = timezone.now()
+        ViewSketch.objects.bulk_update(rows, ['registers', 'estimate', 'updated_at'])
+    return len(rows)
+
+
+def _restore_sketches(buffer, pending):
+    """寫回失敗時把草稿放回緩衝區（與期間新增的草稿合併），下次寫回時重試"""
+    for key, sketch in pending.items():
+        if key in buffer:
+            sketch.merge(buffer[key])
+        buffer[key] = sketch
+
+
+# 尚未寫回的草稿 {(kind, object_id, day): HyperLogLog}
+_sketches = WriteBuffer(
+    'view_sketches', _write_sketches, 'ANALYTICS_FLUSH_SECONDS', 10, restore=_restore_sketches,
+)
+
+
+def flush_sketches():
+    """立即將行程內草稿寫回資料庫，回傳寫回的草稿列數"""
+    return _sketches.flush()
+
+
+def with_unique_viewers(queryset, kind):
+    """為貼文 / 作品集查詢集加上 unique_viewers（累計不重複瀏覽者估計值），列表不需逐筆查詢"""
+    estimate = ViewSketch.objects.filter(
+        kind=kind, object_id=OuterRef('pk'), day__isnull=True
+    ).values('estimate')[:1]
+    return queryset.annotate(unique_viewers=Coalesce(Subquery(estimate), Value(0)))
+
+
+def unique_viewers_for(kind, object_id):
+    """單一內容的累計不重複瀏覽者估計值（查詢集未帶出時使用）"""
+    return ViewSketch.objects.filter(
+        kind=kind, object_id=object_id, day__isnull=True
+    ).values_list('estimate', flat=True).first() or 0
+
+
+def creator_summary(kind_ids, days=30):
+    """
+    創作者的瀏覽分析
+    kind_ids: {kind: [object_id, ...]}，創作者擁有的內容
+    回傳每日不重複瀏覽者（跨所有內容合併，同一人看了多篇只算一次）、累計不重複瀏覽者與各內容的累計估計值
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    condition = Q(pk__in=[])
+    for kind, object_ids in kind_ids.items():
+        condition |= Q(kind=kind, object_id__in=object_ids)
+    sketches = ViewSketch.objects.filter(condition).filter(Q(day__isnull=True) | Q(day__gte=since))
+
+    daily = {}
+    total = HyperLogLog()
+    per_object = {kind: {} for kind in kind_ids}
+    for row in sketches.only('kind', 'object_id', 'day', 'registers', 'estimate').iterator():
+        if row.day is None:
+            total.merge(row.sketch)
+            per_object[row.kind][row.object_id] = row.estimate
+        else:
+            daily.setdefault(row.day, HyperLogLog()).merge(row.sketch)
+
+    dates = [since + timedelta(days=offset) for offset in range(days)]
+    return {
+        'daily': [
+            {'date': day, 'unique_viewers': daily[day].estimate() if day in daily else 0}
+            for day in dates
+        ],
+        'unique_viewers': total.estimate(),
+        'objects': per_object,
+    }
+
@@ -0,0 +1,21 @@
+# apps/analytics/signals.py
+# 瀏覽分析信號檔案，貼文或作品集刪除時一併刪除其瀏覽草稿（草稿不設外鍵，不會連帶刪除）
+# 資料來源：Post、Portfolio 的 post_delete
+# 資料流向：ViewSketch
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.portfolios.models import Portfolio
+from apps.posts.models import Post
+from .models import ViewSketch
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_sketches(sender, instance, **kwargs):
+    ViewSketch.objects.filter(kind=ViewSketch.KIND_POST, object_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=Portfolio)
+def delete_portfolio_sketches(sender, instance, **kwargs):
+    ViewSketch.objects.filter(kind=ViewSketch.KIND_PORTFOLIO, object_id=instance.pk).delete()
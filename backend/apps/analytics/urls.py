@@ -0,0 +1,13 @@
+# apps/analytics/urls.py
+# 瀏覽分析路由檔案
+# 功能：將前端 API 請求導向對應的視圖處理
+# 資料來源：前端發送的 HTTP 請求
+# 資料流向：對應 views.py 的 CreatorAnalyticsView
+
+from django.urls import path
+from .views import CreatorAnalyticsView
+
+urlpatterns = [
+    # 創作者的不重複瀏覽者統計，對應 CreatorAnalyticsView
+    path('creator/', CreatorAnalyticsView.as_view(), name='creator-analytics'),
+]
@@ -0,0 +1,47 @@
+# apps/analytics/views.py
+# 瀏覽分析視圖檔案，提供創作者查看自己內容的不重複瀏覽者統計
+# 資料來源：ViewSketch（經 services.creator_summary 合併）
+# 資料流向：前端創作者分析頁
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.portfolios.models import Portfolio
+from apps.posts.models import Post
+from .models import ViewSketch
+from .services import creator_summary
+
+
+class CreatorAnalyticsView(APIView):
+    """
+    創作者分析視圖
+    - GET: 當前用戶所有貼文與作品集的不重複瀏覽者，參數 days（預設 30，最多 365）
+    - 回應：{"daily": [{"date", "unique_viewers"}], "unique_viewers": ...,
+            "posts": [{"id", "unique_viewers"}], "portfolios": [{"id", "unique_viewers"}]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_days = 365
+
+    def get(self, request):
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), self.max_days)
+        except ValueError:
+            days = 30
+        post_ids = list(Post.objects.filter(author=request.user).values_list('id', flat=True))
+        portfolio_ids = list(Portfolio.objects.filter(user=request.user).values_list('id', flat=True))
+        summary = creator_summary(
+            {ViewSketch.KIND_POST: post_ids, ViewSketch.KIND_PORTFOLIO: portfolio_ids}, days=days
+        )
+        objects = summary.pop('objects')
+        return Response({
+            **summary,
+            'posts': [
+                {'id': post_id, 'unique_viewers': objects[ViewSketch.KIND_POST].get(post_id, 0)}
+                for post_id in post_ids
+            ],
+            'portfolios': [
+                {'id': portfolio_id, 'unique_viewers': objects[ViewSketch.KIND_PORTFOLIO].get(portfolio_id, 0)}
+                for portfolio_id in portfolio_ids
+            ],
+        })
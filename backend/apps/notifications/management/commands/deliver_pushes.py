@@ -0,0 +1,34 @@
+# deliver_pushes.py - 推播投遞背景指令
+# 功能：從 PushDelivery 佇列領取到期推播，依平台分批送往推播閘道，並輸出每批的吞吐量與延遲
+# 用法：python manage.py deliver_pushes --loop  （常駐執行）
+#       python manage.py deliver_pushes         （處理一輪後結束，適合排程）
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.push import deliver_pending
+
+
+class Command(BaseCommand):
+    help = '分批投遞佇列中的離線推播'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=500, help='每輪最多領取的推播數量')
+        parser.add_argument('--loop', action='store_true', help='持續執行，佇列清空後等待 --interval 秒再領取')
+        parser.add_argument('--interval', type=float, default=2.0, help='佇列清空時的等待秒數')
+
+    def handle(self, *args, **options):
+        while True:
+            stats = deliver_pending(limit=options['limit'])
+            for batch in stats:
+                self.stdout.write(
+                    '{platform}: {sent}/{size} 已送達，耗時 {duration_ms}ms，'
+                    '吞吐量 {throughput_per_sec}/s，佇列延遲 平均 {queue_latency_avg_sec}s / 最大 {queue_latency_max_sec}s'
+                    .format(**batch)
+                )
+            if not options['loop']:
+                break
+            # 本輪領滿代表仍有積壓，立即繼續；否則等待下一輪
+            if sum(batch['size'] for batch in stats) < options['limit']:
+                time.sleep(options['interval'])
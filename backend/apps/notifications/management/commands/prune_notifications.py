@@ -0,0 +1,31 @@
+# prune_notifications.py - 通知保留期清理指令
+# 功能：依 settings 的已讀 / 未讀保留天數，分批刪除過期通知
+# 用法：python manage.py prune_notifications --batch-size 1000 --pause 0.1
+#       建議以排程每日執行
+
+from django.core.management.base import BaseCommand
+
+from apps.notifications.retention import expired_notifications, prune_notifications
+
+
+class Command(BaseCommand):
+    help = '分批刪除超過保留期的通知'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='每批刪除筆數（預設 NOTIFICATION_PRUNE_BATCH_SIZE）')
+        parser.add_argument('--max-batches', type=int, default=None, help='本次最多執行批數')
+        parser.add_argument('--pause', type=float, default=0, help='每批之間等待秒數')
+        parser.add_argument('--dry-run', action='store_true', help='只計算將刪除的筆數')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            read_expired, unread_expired = expired_notifications()
+            self.stdout.write(f'過期已讀通知：{read_expired.count()}，過期未讀通知：{unread_expired.count()}')
+            return
+
+        deleted = prune_notifications(
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'已刪除 {deleted} 則過期通知'))
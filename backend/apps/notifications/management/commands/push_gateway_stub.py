@@ -0,0 +1,59 @@
+# push_gateway_stub.py - 本地推播閘道（LocalHTTPGateway 的測試替身）
+# 功能：在本機啟動 HTTP 服務接收批次推播並輸出到終端機，回傳每則皆送達
+#       token 以 "invalid-" 開頭者回報失效、以 "retry-" 開頭者回報可重試，方便測試失敗流程
+# 用法：python manage.py push_gateway_stub --port 8765
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class PushStubHandler(BaseHTTPRequestHandler):
+    """接收 LocalHTTPGateway 的批次推播"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        messages = payload.get('messages', [])
+
+        results = []
+        for message in messages:
+            token = message.get('token', '')
+            if token.startswith('invalid-'):
+                results.append({'ok': False, 'error': 'Unregistered', 'invalid_token': True})
+            elif token.startswith('retry-'):
+                results.append({'ok': False, 'error': 'Unavailable', 'retry': True})
+            else:
+                results.append({'ok': True})
+            self.server.stdout.write(f"[push] {token}: {message.get('title')} - {message.get('body')}")
+
+        body = json.dumps({'results': results}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 請求日誌改由 do_POST 逐則輸出
+        pass
+
+
+class Command(BaseCommand):
+    help = '啟動本地推播閘道，供 local 平台裝置測試推播流程'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        server = ThreadingHTTPServer((options['host'], options['port']), PushStubHandler)
+        server.stdout = self.stdout
+        self.stdout.write(f"本地推播閘道已啟動：http://{options['host']}:{options['port']}/push/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
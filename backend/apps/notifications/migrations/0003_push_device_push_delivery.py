@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_alter_notification_options_notification_content_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PushDevice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('ios', 'iOS'), ('android', 'Android'), ('local', '本地測試')], max_length=10)),
+                ('token', models.CharField(max_length=255, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='push_devices', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '推播裝置',
+                'verbose_name_plural': '推播裝置',
+            },
+        ),
+        migrations.CreateModel(
+            name='PushDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100)),
+                ('body', models.CharField(blank=True, max_length=255)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', '排隊中'), ('failed', '已放棄')], default='queued', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='notifications.pushdevice')),
+            ],
+            options={
+                'verbose_name': '推播佇列',
+                'verbose_name_plural': '推播佇列',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='pushdevice',
+            index=models.Index(fields=['user', 'is_active'], name='notif_pushdev_user_active'),
+        ),
+        migrations.AddIndex(
+            model_name='pushdelivery',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='notif_pushdel_due'),
+        ),
+    ]
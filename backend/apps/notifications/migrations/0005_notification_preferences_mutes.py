@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_retention_indexes'),
+        ('private_messages', '0003_remove_message_chat_remove_message_sender_and_more'),
+        ('users', '0005_skill_user_display_name_user_headline_user_location_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPreference',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_preference', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('disabled_types', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '通知偏好',
+                'verbose_name_plural': '通知偏好',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationMute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('muted_thread', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='private_messages.privatemessagethread')),
+                ('muted_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_mutes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': '通知靜音',
+                'verbose_name_plural': '通知靜音',
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('muted_thread__isnull', True), ('muted_user__isnull', False)), models.Q(('muted_thread__isnull', False), ('muted_user__isnull', True)), _connector='OR'), name='notif_mute_one_target'), models.UniqueConstraint(condition=models.Q(('muted_user__isnull', False)), fields=('user', 'muted_user'), name='notif_mute_unique_user'), models.UniqueConstraint(condition=models.Q(('muted_thread__isnull', False)), fields=('user', 'muted_thread'), name='notif_mute_unique_thread')],
+            },
+        ),
+    ]
@@ -4,10 +4,37 @@
 # 資料來源：User、Post、Comment 模型，前端互動觸發
 # 資料流向：被 views.py 查詢、序列化後回傳給前端，或由前端/後端觸發新增
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from apps.users.models import User  # 導入用戶模型，作為通知發送者與接收者
 from apps.posts.models import Post, Comment  # 導入貼文與評論模型，作為通知關聯對象
 
+
+def notification_retention_cutoff(now=None):
+    """
+    通知的最舊可見時間
+    超過已讀/未讀保留天數中較長者的通知都會被 prune_notifications 清除，
+    列表與未讀數只需掃描此時間之後的資料
+    """
+    now = now or timezone.now()
+    days = max(
+        getattr(settings, 'NOTIFICATION_RETENTION_READ_DAYS', 30),
+        getattr(settings, 'NOTIFICATION_RETENTION_UNREAD_DAYS', 90),
+    )
+    return now - timedelta(days=days)
+
+
+class NotificationQuerySet(models.QuerySet):
+    """通知查詢集，提供只涵蓋保留期間內資料的查詢"""
+
+    def recent(self, now=None):
+        """只查詢保留期間內的通知，讓查詢落在 created_at 索引的近期範圍"""
+        return self.filter(created_at__gte=notification_retention_cutoff(now))
+
+
 class Notification(models.Model):
     """
     通知模型，儲存一則用戶之間的通知
@@ -59,11 +86,183 @@ class Notification(models.Model):
     )  # 通知狀態，對於需要狀態的通知有效，如追蹤請求
     content = models.TextField(null=True, blank=True)  # 可選的內容，如留言內容
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']  # 按創建時間倒序排列
         verbose_name = '通知'
         verbose_name_plural = '通知'
+        indexes = [
+            # 通知列表：依接收者取近期通知並按時間倒序
+            models.Index(fields=['recipient', '-created_at'], name='notif_recipient_created'),
+            # 未讀數與已讀狀態過濾
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notif_recipient_read_created'),
+            # 保留期清理：依已讀狀態找出過期通知
+            models.Index(fields=['is_read', 'created_at'], name='notif_read_created'),
+        ]
 
     def __str__(self):
         # 返回通知的字符串表示，方便在管理介面查看
-        return f"{self.sender} 發送了一個 {self.get_notification_type_display()} 給 {self.recipient}"
\ No newline at end of file
+        return f"{self.sender} 發送了一個 {self.get_notification_type_display()} 給 {self.recipient}"
+
+
+class NotificationPreference(models.Model):
+    """
+    通知偏好模型，每位用戶一列
+    disabled_types: 已關閉的通知類型位元遮罩，位元對應見 TYPE_BITS
+    （私訊推播也以 private_message 類型納入同一個遮罩）
+    """
+    # 通知類型對應的位元位置，只能新增不可重新編號，否則既有偏好會錯位
+    TYPE_BITS = {
+        'follow': 0,
+        'follow_request_received': 1,
+        'follow_request_sent': 2,
+        'follow_accepted': 3,
+        'like': 4,
+        'comment': 5,
+        'private_message': 6,
+    }
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='notification_preference'
+    )  # 偏好所屬用戶
+    disabled_types = models.PositiveIntegerField(default=0)  # 已關閉的通知類型（位元遮罩）
+    updated_at = models.DateTimeField(auto_now=True)  # 最後更新時間
+
+    class Meta:
+        verbose_name = '通知偏好'
+        verbose_name_plural = '通知偏好'
+
+    def __str__(self):
+        return f"{self.user} 的通知偏好"
+
+    @classmethod
+    def type_mask(cls, notification_type):
+        """取得通知類型對應的位元，未知類型回傳 0（不受偏好影響）"""
+        bit = cls.TYPE_BITS.get(notification_type)
+        return 0 if bit is None else 1 << bit
+
+    @classmethod
+    def mask_from_types(cls, notification_types):
+        """將通知類型列表轉為位元遮罩"""
+        mask = 0
+        for notification_type in notification_types:
+            mask |= cls.type_mask(notification_type)
+        return mask
+
+    def get_disabled_types(self):
+        """將位元遮罩轉回通知類型列表"""
+        return [name for name, bit in self.TYPE_BITS.items() if self.disabled_types & (1 << bit)]
+
+
+class NotificationMute(models.Model):
+    """
+    通知靜音模型，一列靜音一位用戶或一個私訊聊天室
+    user: 設定靜音的用戶
+    muted_user: 被靜音的發送者（不再收到此人觸發的通知與推播）
+    muted_thread: 被靜音的私訊聊天室（不再收到此聊天室的推播）
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='notification_mutes'
+    )  # 設定靜音的用戶
+    muted_user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )  # 被靜音的用戶
+    muted_thread = models.ForeignKey(
+        'private_messages.PrivateMessageThread', on_delete=models.CASCADE, null=True, blank=True, related_name='+'
+    )  # 被靜音的聊天室
+    created_at = models.DateTimeField(auto_now_add=True)  # 建立時間
+
+    class Meta:
+        verbose_name = '通知靜音'
+        verbose_name_plural = '通知靜音'
+        constraints = [
+            # 每列只能靜音一位用戶或一個聊天室
+            models.CheckConstraint(
+                condition=(
+                    models.Q(muted_user__isnull=False, muted_thread__isnull=True)
+                    | models.Q(muted_user__isnull=True, muted_thread__isnull=False)
+                ),
+                name='notif_mute_one_target',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'muted_user'], condition=models.Q(muted_user__isnull=False),
+                name='notif_mute_unique_user',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'muted_thread'], condition=models.Q(muted_thread__isnull=False),
+                name='notif_mute_unique_thread',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} 靜音 {self.muted_user or self.muted_thread}"
+
+class PushDevice(models.Model):
+    """
+    推播裝置模型，記錄用戶註冊的裝置推播 token
+    user: 裝置擁有者（User 外鍵）
+    platform: 推播平台，決定使用哪個推播閘道（ios → APNs、android → FCM、local → 本地測試閘道）
+    token: 裝置推播 token（全域唯一，換帳號登入時改綁到新用戶）
+    is_active: 閘道回報 token 失效時設為 False，不再推送
+    """
+    PLATFORM_CHOICES = (
+        ('ios', 'iOS'),
+        ('android', 'Android'),
+        ('local', '本地測試'),
+    )
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='push_devices'
+    )  # 裝置擁有者
+    platform = models.CharField(max_length=10, choices=PLATFORM_CHOICES)  # 推播平台
+    token = models.CharField(max_length=255, unique=True)  # 裝置推播 token
+    is_active = models.BooleanField(default=True)  # token 是否仍有效
+    created_at = models.DateTimeField(auto_now_add=True)  # 註冊時間
+    updated_at = models.DateTimeField(auto_now=True)  # 最後更新時間
+
+    class Meta:
+        verbose_name = '推播裝置'
+        verbose_name_plural = '推播裝置'
+        indexes = [
+            # 推播入列時依接收者查詢有效裝置
+            models.Index(fields=['user', 'is_active'], name='notif_pushdev_user_active'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} 的 {self.get_platform_display()} 裝置"
+
+
+class PushDelivery(models.Model):
+    """
+    推播佇列模型，每一列代表一則待送往單一裝置的推播
+    由 Notification / PrivateMessage 建立時入列，背景的 deliver_pushes 指令分批送出；
+    送達後即刪除，重試用盡者標記為 failed 保留供排查。
+    """
+    STATUS_CHOICES = (
+        ('queued', '排隊中'),
+        ('failed', '已放棄'),
+    )
+
+    device = models.ForeignKey(
+        PushDevice, on_delete=models.CASCADE, related_name='deliveries'
+    )  # 目標裝置
+    title = models.CharField(max_length=100)  # 推播標題
+    body = models.CharField(max_length=255, blank=True)  # 推播內文
+    data = models.JSONField(default=dict, blank=True)  # 附帶資料，供前端點擊推播後導頁
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')  # 佇列狀態
+    attempts = models.PositiveSmallIntegerField(default=0)  # 已嘗試次數
+    next_attempt_at = models.DateTimeField(default=timezone.now)  # 下次可嘗試時間（退避用）
+    last_error = models.CharField(max_length=255, blank=True)  # 最後一次失敗原因
+    created_at = models.DateTimeField(auto_now_add=True)  # 入列時間，用於計算佇列延遲
+
+    class Meta:
+        verbose_name = '推播佇列'
+        verbose_name_plural = '推播佇列'
+        indexes = [
+            # 背景工作依狀態與到期時間領取批次
+            models.Index(fields=['status', 'next_attempt_at'], name='notif_pushdel_due'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} → {self.device}"
@@ -0,0 +1,379 @@
+# apps/notifications/push.py
+# 離線推播模組，負責推播入列、分批投遞與推播閘道轉接
+# 功能：Notification / PrivateMessage 建立時把推播寫入 PushDelivery 佇列，
+#       由背景指令 deliver_pushes 依平台分批呼叫推播閘道，失敗時以指數退避重試
+# 資料來源：PushDevice（裝置 token）、PushDelivery（佇列）、settings.PUSH_GATEWAYS（閘道設定）
+# 資料流向：APNs / FCM 類推播服務，或測試用的本地 HTTP 閘道
+
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PushDevice, PushDelivery
+
+logger = logging.getLogger(__name__)
+
+# 單則推播的投遞結果
+# ok: 是否送達；retry: 失敗時是否可重試；invalid_token: 閘道回報 token 已失效；error: 失敗原因
+PushResult = namedtuple('PushResult', ['ok', 'retry', 'invalid_token', 'error'])
+
+PUSH_OK = PushResult(ok=True, retry=False, invalid_token=False, error='')
+
+
+class PushGatewayError(Exception):
+    """整批呼叫失敗（連線錯誤、逾時等），整批視為可重試"""
+
+
+class BasePushGateway:
+    """
+    推播閘道基底類別
+    子類別實作 send_batch(deliveries)，回傳與 deliveries 同順序的 PushResult 列表
+    max_batch_size: 單次閘道呼叫最多攜帶的推播數量
+    """
+    max_batch_size = 100
+
+    def __init__(self, endpoint='', timeout=10, max_batch_size=None, **options):
+        self.endpoint = endpoint.rstrip('/')
+        self.timeout = timeout
+        if max_batch_size:
+            self.max_batch_size = max_batch_size
+        self.options = options
+
+    def send_batch(self, deliveries):
+        raise NotImplementedError
+
+    def _post_json(self, url, payload, headers=None):
+        """以 JSON POST 呼叫閘道，回傳 (HTTP 狀態碼, 解析後的回應內容)"""
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json', **(headers or {})},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status_code, raw = response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            status_code, raw = exc.code, exc.read()
+        except (urllib.error.URLError, OSError) as exc:
+            raise PushGatewayError(str(exc)) from exc
+        try:
+            body = json.loads(raw or b'{}')
+        except ValueError:
+            body = {}
+        return status_code, body
+
+
+class LocalHTTPGateway(BasePushGateway):
+    """
+    本地 HTTP 推播閘道，供開發與測試使用（可搭配 push_gateway_stub 指令）
+    整批推播以一次 POST 送出：{"messages": [{"token", "title", "body", "data"}, ...]}
+    回應格式：{"results": [{"ok": true} | {"error": "...", "retry": bool, "invalid_token": bool}, ...]}
+    """
+
+    def send_batch(self, deliveries):
+        payload = {'messages': [_message_payload(delivery) for delivery in deliveries]}
+        status_code, body = self._post_json(self.endpoint, payload)
+        if status_code >= 500 or status_code == 429:
+            raise PushGatewayError(f'HTTP {status_code}')
+        results = body.get('results') or []
+        if status_code >= 400 or len(results) != len(deliveries):
+            return [PushResult(False, False, False, f'HTTP {status_code}')] * len(deliveries)
+        return [
+            PUSH_OK if result.get('ok') else PushResult(
+                ok=False,
+                retry=bool(result.get('retry')),
+                invalid_token=bool(result.get('invalid_token')),
+                error=str(result.get('error', ''))[:255],
+            )
+            for result in results
+        ]
+
+
+class FCMGateway(BasePushGateway):
+    """
+    FCM 類推播閘道
+    一次呼叫攜帶多則訊息，依回應 results 逐則判斷：
+    NotRegistered / InvalidRegistration 表示 token 失效；Unavailable / InternalServerError 可重試
+    """
+    max_batch_size = 500
+    INVALID_TOKEN_ERRORS = {'NotRegistered', 'InvalidRegistration', 'MismatchSenderId'}
+    RETRYABLE_ERRORS = {'Unavailable', 'InternalServerError', 'DeviceMessageRateExceeded'}
+
+    def send_batch(self, deliveries):
+        payload = {
+            'messages': [
+                {
+                    'token': delivery.device.token,
+                    'notification': {'title': delivery.title, 'body': delivery.body},
+                    'data': {key: str(value) for key, value in delivery.data.items()},
+                }
+                for delivery in deliveries
+            ]
+        }
+        headers = {'Authorization': f"key={self.options.get('server_key', '')}"}
+        status_code, body = self._post_json(self.endpoint, payload, headers)
+        if status_code >= 500 or status_code == 429:
+            raise PushGatewayError(f'HTTP {status_code}')
+        results = body.get('results') or []
+        if status_code >= 400 or len(results) != len(deliveries):
+            return [PushResult(False, False, False, f'HTTP {status_code}')] * len(deliveries)
+
+        outcomes = []
+        for result in results:
+            error = result.get('error')
+            if not error:
+                outcomes.append(PUSH_OK)
+            else:
+                outcomes.append(PushResult(
+                    ok=False,
+                    retry=error in self.RETRYABLE_ERRORS,
+                    invalid_token=error in self.INVALID_TOKEN_ERRORS,
+                    error=error[:255],
+                ))
+        return outcomes
+
+
+class APNsGateway(BasePushGateway):
+    """
+    APNs 類推播閘道
+    APNs 以裝置為單位收件（/3/device/<token>），批次內逐則送出；
+    410 / BadDeviceToken 表示 token 失效，429 與 5xx 可重試
+    """
+    max_batch_size = 100
+
+    def send_batch(self, deliveries):
+        headers = {
+            'apns-topic': self.options.get('topic', ''),
+            'authorization': f"bearer {self.options.get('auth_token', '')}",
+        }
+        outcomes = []
+        for delivery in deliveries:
+            payload = {
+                'aps': {'alert': {'title': delivery.title, 'body': delivery.body}, 'sound': 'default'},
+                **delivery.data,
+            }
+            url = f'{self.endpoint}/3/device/{delivery.device.token}'
+            try:
+                status_code, body = self._post_json(url, payload, headers)
+            except PushGatewayError as exc:
+                outcomes.append(PushResult(False, True, False, str(exc)[:255]))
+                continue
+            if status_code == 200:
+                outcomes.append(PUSH_OK)
+                continue
+            reason = str(body.get('reason', f'HTTP {status_code}'))
+            outcomes.append(PushResult(
+                ok=False,
+                retry=status_code == 429 or status_code >= 500,
+                invalid_token=status_code == 410 or reason in ('BadDeviceToken', 'Unregistered'),
+                error=reason[:255],
+            ))
+        return outcomes
+
+
+def _message_payload(delivery):
+    """將佇列中的推播轉為閘道訊息格式"""
+    return {
+        'token': delivery.device.token,
+        'title': delivery.title,
+        'body': delivery.body,
+        'data': delivery.data,
+    }
+
+
+_gateways = {}
+
+
+def get_gateway(platform):
+    """依平台取得推播閘道實例（依 settings.PUSH_GATEWAYS 建立並快取）"""
+    if platform not in _gateways:
+        config = getattr(settings, 'PUSH_GATEWAYS', {}).get(platform)
+        if not config:
+            return None
+        gateway_class = import_string(config['BACKEND'])
+        _gateways[platform] = gateway_class(**config.get('OPTIONS', {}))
+    return _gateways[platform]
+
+
+def enqueue_pushes(messages):
+    """
+    將多則推播寫入佇列，不在請求中呼叫推播閘道
+    messages: [(接收者 id 列表, 標題, 內文, 附帶資料), ...]
+    一次查出所有接收者的有效裝置，再以 bulk_create 一次寫入
+    """
+    messages = [(set(user_ids), title, body, data) for user_ids, title, body, data in messages]
+    all_user_ids = set().union(*(user_ids for user_ids, _, _, _ in messages)) if messages else set()
+    if not all_user_ids:
+        return 0
+
+    devices_by_user = {}
+    for device in PushDevice.objects.filter(user_id__in=all_user_ids, is_active=True).only('id', 'user_id'):
+        devices_by_user.setdefault(device.user_id, []).append(device)
+
+    deliveries = [
+        PushDelivery(device=device, title=title[:100], body=(body or '')[:255], data=data or {})
+        for user_ids, title, body, data in messages
+        for user_id in user_ids
+        for device in devices_by_user.get(user_id, ())
+    ]
+    PushDelivery.objects.bulk_create(deliveries)
+    return len(deliveries)
+
+
+def enqueue_push(user_ids, title, body='', data=None):
+    """將單則推播寫入佇列（發送給多位接收者）"""
+    return enqueue_pushes([(user_ids, title, body, data)])
+
+
+def enqueue_pushes_on_commit(messages):
+    """在目前交易提交後才入列，交易回滾時不會送出推播"""
+    messages = [(list(user_ids), title, body, data) for user_ids, title, body, data in messages]
+    if messages:
+        transaction.on_commit(lambda: enqueue_pushes(messages))
+
+
+def enqueue_push_on_commit(user_ids, title, body='', data=None):
+    """在目前交易提交後才將單則推播入列"""
+    enqueue_pushes_on_commit([(user_ids, title, body, data)])
+
+
+def _retry_delay(attempts):
+    """指數退避：基礎秒數 × 2^(已嘗試次數 - 1)，並設上限"""
+    base = getattr(settings, 'PUSH_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'PUSH_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(cap, base * (2 ** max(attempts - 1, 0))))
+
+
+def _lease_seconds():
+    return getattr(settings, 'PUSH_LEASE_SECONDS', 900)
+
+
+def _claim(limit):
+    """
+    以短交易領取一批到期的推播：select_for_update(skip_locked=True) 鎖定後把 next_attempt_at 延後一個租期再提交
+    租期內其他背景工作不會再領取；投遞中途當機時租期到期後自動重新領取（至少送出一次）
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            PushDelivery.objects.select_for_update(skip_locked=True, of=('self',))
+            .select_related('device')
+            .filter(status='queued', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        if deliveries:
+            PushDelivery.objects.filter(id__in=[delivery.id for delivery in deliveries]).update(
+                next_attempt_at=now + timedelta(seconds=_lease_seconds())
+            )
+    return deliveries
+
+
+def _save_results(sent_ids, retried, failed, invalid_device_ids):
+    """以短交易寫回一批的投遞結果：送達者刪除、失敗者更新重試時間或標記放棄、失效 token 的裝置停用"""
+    with transaction.atomic():
+        if sent_ids:
+            PushDelivery.objects.filter(id__in=sent_ids).delete()
+        if retried or failed:
+            PushDelivery.objects.bulk_update(
+                retried + failed, ['status', 'attempts', 'next_attempt_at', 'last_error']
+            )
+        if invalid_device_ids:
+            PushDevice.objects.filter(id__in=invalid_device_ids).update(is_active=False)
+
+
+def deliver_pending(limit=500):
+    """
+    領取一批到期的推播並投遞，回傳每次閘道呼叫的統計資料列表
+    領取與寫回結果各是一個短交易，呼叫推播閘道（HTTP）時不持有交易與列鎖；
+    多個背景工作可同時執行而不重複送出，每次閘道呼叫後立即寫回該批結果
+    """
+    max_attempts = getattr(settings, 'PUSH_MAX_ATTEMPTS', 5)
+    stats = []
+
+    by_platform = {}
+    for delivery in _claim(limit):
+        by_platform.setdefault(delivery.device.platform, []).append(delivery)
+
+    for platform, platform_deliveries in by_platform.items():
+        gateway = get_gateway(platform)
+        if gateway is None:
+            now = timezone.now()
+            for delivery in platform_deliveries:
+                _mark_failed(delivery, f'未設定 {platform} 推播閘道', True, max_attempts, now)
+            _save_results([], [], platform_deliveries, set())
+            continue
+
+        size = gateway.max_batch_size
+        for start in range(0, len(platform_deliveries), size):
+            batch = platform_deliveries[start:start + size]
+            started = time.monotonic()
+            try:
+                results = gateway.send_batch(batch)
+            except PushGatewayError as exc:
+                results = [PushResult(False, True, False, str(exc)[:255])] * len(batch)
+            elapsed = time.monotonic() - started
+
+            now = timezone.now()
+            sent_ids, invalid_device_ids, retried, failed = [], set(), [], []
+            for delivery, result in zip(batch, results):
+                if result.ok:
+                    sent_ids.append(delivery.id)
+                    continue
+                if result.invalid_token:
+                    invalid_device_ids.add(delivery.device_id)
+                final = not result.retry or result.invalid_token
+                if _mark_failed(delivery, result.error, final, max_attempts, now):
+                    failed.append(delivery)
+                else:
+                    retried.append(delivery)
+            _save_results(sent_ids, retried, failed, invalid_device_ids)
+
+            stats.append(_record_batch(platform, batch, len(sent_ids), elapsed, now))
+
+    return stats
+
+
+def _mark_failed(delivery, error, final, max_attempts, now):
+    """
+    記錄一次失敗：可重試者延後下次嘗試時間，不可重試或次數用盡者標記為 failed
+    回傳是否已放棄此推播
+    """
+    delivery.attempts += 1
+    delivery.last_error = (error or '')[:255]
+    if final or delivery.attempts >= max_attempts:
+        delivery.status = 'failed'
+        return True
+    delivery.next_attempt_at = now + _retry_delay(delivery.attempts)
+    return False
+
+
+def _record_batch(platform, batch, sent, elapsed, now):
+    """整理單次閘道呼叫的吞吐量與延遲，寫入日誌並回傳"""
+    latencies = [(now - delivery.created_at).total_seconds() for delivery in batch]
+    batch_stats = {
+        'platform': platform,
+        'size': len(batch),
+        'sent': sent,
+        'failed': len(batch) - sent,
+        'duration_ms': round(elapsed * 1000, 1),
+        'throughput_per_sec': round(len(batch) / elapsed, 1) if elapsed > 0 else None,
+        'queue_latency_avg_sec': round(sum(latencies) / len(latencies), 2),
+        'queue_latency_max_sec': round(max(latencies), 2),
+    }
+    logger.info(
+        'push batch platform=%(platform)s size=%(size)d sent=%(sent)d failed=%(failed)d '
+        'duration_ms=%(duration_ms)s throughput_per_sec=%(throughput_per_sec)s '
+        'queue_latency_avg_sec=%(queue_latency_avg_sec)s queue_latency_max_sec=%(queue_latency_max_sec)s',
+        batch_stats,
+    )
+    return batch_stats
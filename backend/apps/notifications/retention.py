@@ -0,0 +1,57 @@
+# apps/notifications/retention.py
+# 通知保留期模組，依已讀 / 未讀分別設定保留天數並分批清除過期通知
+# 功能：已讀通知超過 NOTIFICATION_RETENTION_READ_DAYS、未讀通知超過 NOTIFICATION_RETENTION_UNREAD_DAYS 即刪除，
+#       每批只刪除固定筆數，避免長時間鎖表與巨大交易
+# 資料來源：Notification 模型、settings 保留期設定
+# 資料流向：由 prune_notifications 管理指令定期呼叫
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+
+def expired_notifications(now=None):
+    """
+    回傳過期通知的查詢集列表（已讀、未讀各一），兩者皆可走 (is_read, created_at) 索引
+    """
+    now = now or timezone.now()
+    read_days = getattr(settings, 'NOTIFICATION_RETENTION_READ_DAYS', 30)
+    unread_days = getattr(settings, 'NOTIFICATION_RETENTION_UNREAD_DAYS', 90)
+    return [
+        Notification.objects.filter(is_read=True, created_at__lt=now - timedelta(days=read_days)),
+        Notification.objects.filter(is_read=False, created_at__lt=now - timedelta(days=unread_days)),
+    ]
+
+
+def prune_notifications(batch_size=None, max_batches=None, pause=0, now=None):
+    """
+    分批刪除過期通知，回傳刪除總數
+    每批先取出最舊的 batch_size 個 id，再以主鍵刪除，每批各自一個短交易
+    max_batches: 本次最多執行的批數（None 表示直到清空）
+    pause: 每批之間的等待秒數，降低對線上查詢的影響
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_PRUNE_BATCH_SIZE', 1000)
+    now = now or timezone.now()
+    deleted_total = 0
+    batches = 0
+
+    for queryset in expired_notifications(now):
+        while max_batches is None or batches < max_batches:
+            ids = list(queryset.order_by('created_at').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted, _ = Notification.objects.filter(id__in=ids).delete()
+            deleted_total += deleted
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+    return deleted_total
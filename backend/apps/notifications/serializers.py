@@ -5,7 +5,7 @@
 # 資料流向：views.py 呼叫序列化器，API 回傳/接收 JSON
 
 from rest_framework import serializers
-from .models import Notification
+from .models import Notification, PushDevice, NotificationPreference, NotificationMute
 from apps.users.serializers import UserSerializer
 from apps.posts.serializers import PostSerializer, CommentSerializer
 
@@ -48,4 +48,58 @@ class NotificationSerializer(serializers.ModelSerializer):
         """獲取相關評論內容"""
         if obj.comment:
             return obj.comment.content
-        return None
\ No newline at end of file
+        return None
+
+class PushDeviceSerializer(serializers.ModelSerializer):
+    """推播裝置序列化器，用於註冊 / 更新裝置推播 token"""
+
+    class Meta:
+        model = PushDevice
+        fields = ['id', 'platform', 'token', 'is_active', 'created_at']
+        read_only_fields = ['id', 'is_active', 'created_at']
+        # token 的唯一性由視圖以 update_or_create 處理（換帳號登入時改綁）
+        extra_kwargs = {'token': {'validators': []}}
+
+
+class NotificationPreferenceSerializer(serializers.ModelSerializer):
+    """
+    通知偏好序列化器
+    對外以通知類型列表表示已關閉的類型，儲存時轉為位元遮罩
+    """
+    disabled_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(NotificationPreference.TYPE_BITS)),
+        required=False,
+        write_only=True,
+    )
+    muted_user_ids = serializers.SerializerMethodField()
+    muted_thread_ids = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NotificationPreference
+        fields = ['disabled_types', 'muted_user_ids', 'muted_thread_ids', 'updated_at']
+        read_only_fields = ['updated_at']
+
+    def to_representation(self, instance):
+        data = {'disabled_types': instance.get_disabled_types()}
+        data.update(super().to_representation(instance))
+        return data
+
+    def get_muted_user_ids(self, obj):
+        """已靜音的用戶 id 列表"""
+        return list(
+            NotificationMute.objects.filter(user_id=obj.user_id, muted_user__isnull=False)
+            .values_list('muted_user_id', flat=True)
+        )
+
+    def get_muted_thread_ids(self, obj):
+        """已靜音的私訊聊天室 id 列表"""
+        return list(
+            NotificationMute.objects.filter(user_id=obj.user_id, muted_thread__isnull=False)
+            .values_list('muted_thread_id', flat=True)
+        )
+
+    def update(self, instance, validated_data):
+        if 'disabled_types' in validated_data:
+            instance.disabled_types = NotificationPreference.mask_from_types(validated_data['disabled_types'])
+            instance.save(update_fields=['disabled_types', 'updated_at'])
+        return instance
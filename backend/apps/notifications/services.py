@@ -0,0 +1,81 @@
+# apps/notifications/services.py
+# 通知服務檔案，集中處理通知的產生（fan-out）
+# 功能：建立通知前批次載入接收者的通知偏好與靜音名單，被關閉或靜音的通知不會寫入資料庫，
+#       寫入後同步將推播入列
+# 資料來源：NotificationPreference、NotificationMute
+# 資料流向：Notification（bulk_create）、push.enqueue_pushes_on_commit（推播佇列）
+
+from .models import Notification, NotificationPreference, NotificationMute
+from .push import enqueue_pushes_on_commit
+
+
+class RecipientPreferences:
+    """
+    fan-out 用的偏好快照
+    建立時以兩個查詢載入所有接收者的偏好與靜音名單，之後每位接收者的檢查都在記憶體中完成
+    """
+
+    def __init__(self, recipient_ids):
+        recipient_ids = set(recipient_ids)
+        self.disabled_types = dict(
+            NotificationPreference.objects.filter(user_id__in=recipient_ids)
+            .exclude(disabled_types=0)
+            .values_list('user_id', 'disabled_types')
+        )
+        self.muted_users = {}
+        self.muted_threads = {}
+        mutes = NotificationMute.objects.filter(user_id__in=recipient_ids).values_list(
+            'user_id', 'muted_user_id', 'muted_thread_id'
+        )
+        for user_id, muted_user_id, muted_thread_id in mutes:
+            if muted_user_id:
+                self.muted_users.setdefault(user_id, set()).add(muted_user_id)
+            if muted_thread_id:
+                self.muted_threads.setdefault(user_id, set()).add(muted_thread_id)
+
+    def allows(self, recipient_id, notification_type, sender_id=None, thread_id=None):
+        """接收者是否願意收到此通知（類型未關閉、發送者與聊天室未靜音）"""
+        if self.disabled_types.get(recipient_id, 0) & NotificationPreference.type_mask(notification_type):
+            return False
+        if sender_id is not None and sender_id in self.muted_users.get(recipient_id, ()):
+            return False
+        if thread_id is not None and thread_id in self.muted_threads.get(recipient_id, ()):
+            return False
+        return True
+
+
+def create_notifications(notifications):
+    """
+    批次產生通知
+    notifications: 尚未儲存的 Notification 物件列表
+    過濾掉自己通知自己、接收者關閉的類型與靜音的發送者後以 bulk_create 寫入，回傳實際寫入的通知
+    """
+    notifications = [n for n in notifications if n.recipient_id != n.sender_id]
+    if not notifications:
+        return []
+
+    preferences = RecipientPreferences(n.recipient_id for n in notifications)
+    allowed = [
+        n for n in notifications
+        if preferences.allows(n.recipient_id, n.notification_type, sender_id=n.sender_id)
+    ]
+    created = Notification.objects.bulk_create(allowed)
+
+    enqueue_pushes_on_commit(
+        (
+            [n.recipient_id],
+            n.get_notification_type_display(),
+            f"{n.sender} {n.content or ''}".strip(),
+            {'type': 'notification', 'notification_id': n.id, 'notification_type': n.notification_type},
+        )
+        for n in created
+    )
+    return created
+
+
+def notify(recipient, sender, notification_type, **fields):
+    """產生單則通知，被偏好過濾時回傳 None"""
+    created = create_notifications([
+        Notification(recipient=recipient, sender=sender, notification_type=notification_type, **fields)
+    ])
+    return created[0] if created else None
@@ -0,0 +1,39 @@
+# apps/notifications/signals.py
+# 通知信號處理檔案，在私訊建立時把離線推播寫入佇列
+# 功能：PrivateMessage 建立後（交易提交時）依接收者的通知偏好與靜音名單入列推播，請求本身不呼叫推播閘道
+#       （一般通知的推播由 services.create_notifications 在寫入時一併入列）
+# 資料來源：PrivateMessage 的 post_save 信號
+# 資料流向：push.enqueue_push → PushDelivery 佇列 → deliver_pushes 背景指令
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.private_messages.models import PrivateMessage
+from apps.users.models import User
+from .push import enqueue_push_on_commit
+from .services import RecipientPreferences
+
+
+@receiver(post_save, sender=PrivateMessage, dispatch_uid='notifications_push_private_message')
+def queue_private_message_push(sender, instance, created, **kwargs):
+    """新私訊建立時，推播給聊天室中除發送者以外、未關閉私訊推播也未靜音的參與者"""
+    if not created:
+        return
+    participant_ids = list(
+        User.objects.filter(message_threads=instance.thread_id)
+        .exclude(id=instance.sender_id)
+        .values_list('id', flat=True)
+    )
+    preferences = RecipientPreferences(participant_ids)
+    recipient_ids = [
+        user_id for user_id in participant_ids
+        if preferences.allows(
+            user_id, 'private_message', sender_id=instance.sender_id, thread_id=instance.thread_id
+        )
+    ]
+    enqueue_push_on_commit(
+        recipient_ids,
+        title=str(instance.sender),
+        body=instance.content[:255],
+        data={'type': 'private_message', 'thread_id': instance.thread_id, 'message_id': instance.id},
+    )
@@ -1,3 +1,61 @@
+# tests.py - 撰寫 notifications app 的單元測試
+# 可在此檔案撰寫 models、views、API 等自動化測試，確保功能正確
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.private_messages.models import PrivateMessageThread
+from apps.users.models import User
+
+from .models import NotificationMute
+
+MUTES_URL = '/api/notifications/mutes/'
+
+
+class NotificationMuteTest(TestCase):
+    """靜音用戶或聊天室，id 格式錯誤與靜音自己回應 400"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice@example.com', 'alice', 'pw')
+        cls.bob = User.objects.create_user('bob@example.com', 'bob', 'pw')
+        cls.thread = PrivateMessageThread.objects.create()
+        cls.thread.participants.add(cls.alice, cls.bob)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_mute_and_unmute_user(self):
+        response = self.client.post(MUTES_URL, {'user_id': self.bob.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(NotificationMute.objects.filter(user=self.alice, muted_user=self.bob).exists())
+        response = self.client.delete(MUTES_URL, {'user_id': self.bob.pk}, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(NotificationMute.objects.exists())
+
+    def test_mute_thread(self):
+        response = self.client.post(MUTES_URL, {'thread_id': str(self.thread.pk)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(NotificationMute.objects.filter(user=self.alice, muted_thread=self.thread).exists())
+
+    def test_non_numeric_ids_rejected(self):
+        for payload in ({'user_id': 'abc'}, {'thread_id': 'abc'}, {'user_id': [1]}):
+            response = self.client.post(MUTES_URL, payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(NotificationMute.objects.exists())
+
+    def test_cannot_mute_self(self):
+        response = self.client.post(MUTES_URL, {'user_id': self.alice.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(NotificationMute.objects.exists())
+
+    def test_requires_exactly_one_target(self):
+        response = self.client.post(MUTES_URL, {'user_id': self.bob.pk, 'thread_id': self.thread.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(MUTES_URL, {}, format='json').status_code, 400)
 
-# Create your tests here.
+    def test_unknown_targets(self):
+        self.assertEqual(self.client.post(MUTES_URL, {'user_id': 999999}, format='json').status_code, 404)
+        other = PrivateMessageThread.objects.create()
+        self.assertEqual(self.client.post(MUTES_URL, {'thread_id': other.pk}, format='json').status_code, 404)
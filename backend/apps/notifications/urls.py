@@ -2,12 +2,19 @@
 # 通知應用路由檔案，定義通知 API 端點路徑
 # 功能：將前端 API 請求導向對應的視圖處理
 # 資料來源：前端發送的 HTTP 請求
-# 資料流向：對應 views.py 的 NotificationListView
+# 資料流向：對應 views.py 的 NotificationListView、PushDeviceView、NotificationPreferenceView、NotificationMuteView
+#           （追蹤請求的接受 / 拒絕在 users 應用，依請求者處理，不依賴通知）
 
 from django.urls import path
-from .views import NotificationListView
+from .views import NotificationListView, PushDeviceView, NotificationPreferenceView, NotificationMuteView
 
 urlpatterns = [
     # 定義通知列表的API端點，對應 NotificationListView
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
+    # 推播裝置註冊 / 移除，對應 PushDeviceView
+    path('devices/', PushDeviceView.as_view(), name='push-device'),
+    # 通知偏好（關閉的通知類型），對應 NotificationPreferenceView
+    path('preferences/', NotificationPreferenceView.as_view(), name='notification-preferences'),
+    # 靜音用戶 / 私訊聊天室，對應 NotificationMuteView
+    path('mutes/', NotificationMuteView.as_view(), name='notification-mutes'),
 ]
\ No newline at end of file
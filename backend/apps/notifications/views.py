@@ -1,6 +1,6 @@
 # apps/notifications/views.py
 # 通知視圖檔案，定義通知 API 端點邏輯
-# 功能：查詢用戶通知列表，標記通知為已讀，接受/拒絕請求，回傳給前端
+# 功能：查詢用戶通知列表，標記通知為已讀，管理推播裝置、通知偏好與靜音，回傳給前端
 # 資料來源：models.py 的 Notification
 # 資料流向：API 回傳 JSON 給前端
 
@@ -9,14 +9,15 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from .models import Notification
-from .serializers import NotificationSerializer
-from apps.users.models import User, Follow
+from .models import Notification, PushDevice, NotificationPreference, NotificationMute
+from .serializers import NotificationSerializer, PushDeviceSerializer, NotificationPreferenceSerializer
+from apps.private_messages.models import PrivateMessageThread
+from apps.users.models import User
 
 class NotificationListView(generics.ListAPIView):
     """
     通知列表視圖
-    - GET: 取得當前用戶的所有通知，依創建時間降序排列
+    - GET: 取得當前用戶保留期間內的通知，依創建時間降序排列
     - 權限：僅認證用戶
     - 回應：通知陣列
     """
@@ -32,8 +33,8 @@ class NotificationListView(generics.ListAPIView):
         notification_type = self.request.query_params.get('type')
         is_read = self.request.query_params.get('is_read')
         
-        # 從資料庫獲取通知
-        queryset = Notification.objects.filter(recipient=user)
+        # 從資料庫獲取通知（只涵蓋保留期間內的資料，過期通知由 prune_notifications 清除）
+        queryset = Notification.objects.recent().filter(recipient=user)
         
         # 根據類型過濾
         if notification_type:
@@ -106,7 +107,7 @@ class NotificationUnreadCountView(views.APIView):
     def get(self, request):
         """獲取當前用戶未讀通知數量"""
         user = request.user
-        unread_count = Notification.objects.filter(
+        unread_count = Notification.objects.recent().filter(
             recipient=user, 
             is_read=False
         ).count()
@@ -115,58 +116,105 @@ class NotificationUnreadCountView(views.APIView):
             'unread_count': unread_count
         })
 
-class FollowRequestActionView(views.APIView):
+class PushDeviceView(views.APIView):
     """
-    處理追蹤請求動作視圖
-    - POST: 接受或拒絕追蹤請求
+    推播裝置註冊視圖
+    - POST: 註冊或更新當前用戶的裝置推播 token（同一 token 換帳號登入時改綁到當前用戶）
+    - DELETE: 登出時移除裝置 token，不再推播到此裝置
     - 權限：僅認證用戶
     """
     permission_classes = [permissions.IsAuthenticated]
-    
-    def post(self, request, notification_id):
-        """接受或拒絕追蹤請求"""
-        user = request.user
-        action = request.data.get('action')  # 'accept' 或 'reject'
-        
-        if action not in ['accept', 'reject']:
-            return Response(
-                {'error': '無效的操作，必須是 accept 或 reject'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # 獲取通知
-        notification = get_object_or_404(
-            Notification, 
-            id=notification_id, 
-            recipient=user, 
-            notification_type='follow_request_received'
+
+    def post(self, request):
+        serializer = PushDeviceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        device, created = PushDevice.objects.update_or_create(
+            token=serializer.validated_data['token'],
+            defaults={
+                'user': request.user,
+                'platform': serializer.validated_data['platform'],
+                'is_active': True,
+            },
         )
-        
-        # 獲取發送追蹤請求的用戶
-        sender = notification.sender
-        
-        if action == 'accept':
-            # 接受追蹤請求：創建或更新追蹤關係
-            follow, created = Follow.objects.get_or_create(
-                follower=sender, 
-                following=user
+        return Response(
+            PushDeviceSerializer(device).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def delete(self, request):
+        token = request.data.get('token')
+        if not token:
+            return Response({'error': '必須提供 token'}, status=status.HTTP_400_BAD_REQUEST)
+
+        PushDevice.objects.filter(user=request.user, token=token).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class NotificationPreferenceView(views.APIView):
+    """
+    通知偏好視圖
+    - GET: 取得當前用戶關閉的通知類型與靜音名單
+    - PATCH: 更新關閉的通知類型，例如 {"disabled_types": ["like", "comment"]}
+    - 權限：僅認證用戶
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        preference, _ = NotificationPreference.objects.get_or_create(user=request.user)
+        return Response(NotificationPreferenceSerializer(preference).data)
+
+    def patch(self, request):
+        preference, _ = NotificationPreference.objects.get_or_create(user=request.user)
+        serializer = NotificationPreferenceSerializer(preference, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+
+class NotificationMuteView(views.APIView):
+    """
+    通知靜音視圖
+    - POST: 靜音一位用戶或一個私訊聊天室，欄位 user_id 或 thread_id 擇一
+    - DELETE: 取消靜音，欄位同上
+    - id 非整數或靜音自己時回應 400
+    - 權限：僅認證用戶
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _get_target(self, request):
+        """解析靜音目標，回傳 (查詢條件, 錯誤回應)"""
+        user_id = request.data.get('user_id')
+        thread_id = request.data.get('thread_id')
+        if bool(user_id) == bool(thread_id):
+            return None, Response(
+                {'error': '必須提供 user_id 或 thread_id 其中之一'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            # 更新通知狀態
-            notification.status = 'accepted'
-            notification.save()
-            
-            # 創建追蹤接受通知給發送者
-            Notification.objects.create(
-                recipient=sender,
-                sender=user,
-                notification_type='follow_accepted'
+        try:
+            target_id = int(user_id or thread_id)
+        except (TypeError, ValueError):
+            return None, Response(
+                {'error': 'user_id 與 thread_id 必須為整數'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            return Response({'status': 'success', 'message': '已接受追蹤請求'})
-        else:
-            # 拒絕追蹤請求：更新通知狀態
-            notification.status = 'rejected'
-            notification.save()
-            
-            return Response({'status': 'success', 'message': '已拒絕追蹤請求'})
\ No newline at end of file
+        if user_id:
+            if target_id == request.user.id:
+                return None, Response({'error': '不能靜音自己'}, status=status.HTTP_400_BAD_REQUEST)
+            target = get_object_or_404(User, id=target_id)
+            return {'muted_user': target}, None
+        target = get_object_or_404(PrivateMessageThread, id=target_id, participants=request.user)
+        return {'muted_thread': target}, None
+
+    def post(self, request):
+        target, error = self._get_target(request)
+        if error:
+            return error
+        NotificationMute.objects.get_or_create(user=request.user, **target)
+        return Response({'status': 'success', 'message': '已靜音'}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        target, error = self._get_target(request)
+        if error:
+            return error
+        NotificationMute.objects.filter(user=request.user, **target).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
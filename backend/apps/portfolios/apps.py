@@ -7,3 +7,7 @@ from django.apps import AppConfig
 class PortfoliosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'  # 預設主鍵型別為 BigAutoField（自動遞增整數）
     name = 'apps.portfolios'  # 指定此 app 的 Python 路徑（必須與實際目錄結構一致）
+
+    def ready(self):
+        # 註冊評論刪除時遞減評論數的信號
+        from . import signals  # noqa: F401
@@ -0,0 +1,47 @@
+# portfolios/counters.py - 作品集瀏覽次數緩衝模組，將瀏覽次數先累積在行程內，定期批次寫回資料庫
+# 功能：每次瀏覽只在行程內緩衝（config/buffers.py）中加一；背景計時執行緒每隔 PORTFOLIO_VIEW_FLUSH_SECONDS
+#       以單一多列 UPDATE（view_count = view_count + CASE ...）寫回所有累積的增量
+# 資料來源：views.py 的作品集詳情請求、settings.PORTFOLIO_VIEW_FLUSH_SECONDS
+# 資料流向：Portfolio.view_count
+from collections import Counter
+
+from django.db.models import Case, F, IntegerField, Value, When
+
+from config.buffers import WriteBuffer
+
+from .models import Portfolio
+
+
+def _increment(pending, portfolio_id):
+    pending[portfolio_id] += 1
+    return pending[portfolio_id]
+
+
+def record_view(portfolio_id):
+    """
+    記錄一次瀏覽，回傳此作品集在本行程中尚未寫回的增量（用於回應中的近似瀏覽次數）
+    """
+    return _view_counts.update(lambda pending: _increment(pending, portfolio_id))
+
+
+def _write_view_counts(pending):
+    """將累積的瀏覽增量 {portfolio_id: 次數} 以一個 UPDATE 寫回，回傳更新的作品集數"""
+    Portfolio.objects.filter(id__in=pending).update(
+        view_count=F('view_count') + Case(
+            *[When(id=portfolio_id, then=Value(count)) for portfolio_id, count in pending.items()],
+            default=Value(0), output_field=IntegerField(),
+        )
+    )
+    return len(pending)
+
+
+# 尚未寫回的瀏覽增量 {portfolio_id: 次數}；寫入失敗時把增量加回緩衝區，下次寫回時重試
+_view_counts = WriteBuffer(
+    'portfolio_view_counts', _write_view_counts, 'PORTFOLIO_VIEW_FLUSH_SECONDS', 5,
+    factory=Counter, restore=Counter.update,
+)
+
+
+def flush_view_counts():
+    """立即寫回累積的瀏覽增量，回傳更新的作品集數"""
+    return _view_counts.flush()
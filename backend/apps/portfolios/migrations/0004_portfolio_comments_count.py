@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_comments_count(apps, schema_editor):
+    """以一個 UPDATE 將既有評論數寫入 comments_count"""
+    Portfolio = apps.get_model('portfolios', 'Portfolio')
+    PortfolioComment = apps.get_model('portfolios', 'PortfolioComment')
+    counts = (
+        PortfolioComment.objects.filter(portfolio=OuterRef('pk'))
+        .order_by().values('portfolio').annotate(total=Count('id')).values('total')
+    )
+    Portfolio.objects.using(schema_editor.connection.alias).update(
+        comments_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolios', '0003_portfoliocategory_alter_portfolio_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='portfolio',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='評論數'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliocomment',
+            index=models.Index(fields=['portfolio', '-id'], name='portfolio_comment_cursor'),
+        ),
+        migrations.RunPython(backfill_comments_count, migrations.RunPython.noop),
+    ]
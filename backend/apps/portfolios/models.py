@@ -28,6 +28,36 @@ class PortfolioCategory(models.Model):
         verbose_name_plural = _('作品集分類')
         ordering = ['name']
 
+class PortfolioQuerySet(models.QuerySet):
+    """
+    作品集查詢集，依視圖動作宣告載入計畫，查詢數固定、與作品集的媒體 / 技能 / 評論數量無關
+    """
+
+    def for_list(self):
+        """列表（PortfolioMinimalSerializer）：作者以 join 載入，共 1 個查詢"""
+        return self.select_related('user')
+
+    def for_detail(self, viewer, comment_count=3):
+        """
+        詳情（PortfolioSerializer）：作者、分類以 join 載入，當前用戶是否點讚以 EXISTS 子查詢帶出（viewer_has_liked），
+        媒體、技能、最新 comment_count 則評論（含評論者）各一次 prefetch，共 4 個查詢
+        """
+        liked = PortfolioLike.objects.filter(portfolio=models.OuterRef('pk'), user_id=getattr(viewer, 'pk', None))
+        return (
+            self.select_related('user', 'category')
+            .annotate(viewer_has_liked=models.Exists(liked))
+            .prefetch_related(
+                'media',
+                'skills_used',
+                models.Prefetch(
+                    'comments',
+                    queryset=PortfolioComment.objects.select_related('user').order_by('-id')[:comment_count],
+                    to_attr='recent_comments',
+                ),
+            )
+        )
+
+
 class Portfolio(models.Model):
     """
     作品集模型 - 用戶可以展示的項目和作品
@@ -83,6 +113,9 @@ class Portfolio(models.Model):
     # 統計數據
     view_count = models.PositiveIntegerField(_('瀏覽次數'), default=0)
     like_count = models.PositiveIntegerField(_('點讚次數'), default=0)
+    comments_count = models.PositiveIntegerField(_('評論數'), default=0)  # 新增評論時同步加一、刪除時由 signals.py 減一，詳情頁不需計數
+    
+    objects = PortfolioQuerySet.as_manager()
     
     def __str__(self):
         return self.title
@@ -93,9 +126,9 @@ class Portfolio(models.Model):
         ordering = ['-is_featured', '-created_at']
     
     def increase_view_count(self):
-        """增加瀏覽次數"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """增加瀏覽次數（先累積在記憶體，由 counters.py 定期批次寫回）"""
+        from .counters import record_view
+        self.view_count += record_view(self.id)
 
 class PortfolioMedia(models.Model):
     """作品集媒體文件模型 - 用於儲存作品集的多媒體文件"""
@@ -152,6 +185,10 @@ class PortfolioComment(models.Model):
         verbose_name = _('作品集評論')
         verbose_name_plural = _('作品集評論')
         ordering = ['-created_at']
+        indexes = [
+            # 評論列表以 id 游標由新到舊分頁
+            models.Index(fields=['portfolio', '-id'], name='portfolio_comment_cursor'),
+        ]
 
 class PortfolioLike(models.Model):
     """作品集點讚模型"""
@@ -2,9 +2,17 @@
 # 功能：將Portfolio模型轉換為JSON響應，以及將前端請求轉換為模型數據
 # 資料來源：models.py中的Portfolio及相關模型
 # 資料流向：連接views.py與models.py，轉換和驗證API數據
+from django.conf import settings
 from rest_framework import serializers
 from .models import Portfolio, PortfolioCategory, PortfolioMedia, PortfolioComment, PortfolioLike
 from apps.users.serializers import UserMinimalSerializer, SkillSerializer
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import unique_viewers_for
+
+
+def portfolio_detail_comments():
+    """作品集詳情中內嵌的評論數"""
+    return getattr(settings, 'PORTFOLIO_DETAIL_COMMENTS', 3)
 
 class PortfolioCategorySerializer(serializers.ModelSerializer):
     """作品集分類序列化器"""
@@ -67,9 +75,9 @@ class PortfolioSerializer(serializers.ModelSerializer):
         source='skills_used'
     )
     media = PortfolioMediaSerializer(many=True, read_only=True)
-    comments = PortfolioCommentSerializer(many=True, read_only=True)
-    comments_count = serializers.SerializerMethodField()
+    comments = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
+    unique_viewers = serializers.SerializerMethodField()
     
     class Meta:
         model = Portfolio
@@ -79,19 +87,28 @@ class PortfolioSerializer(serializers.ModelSerializer):
             'cover_image', 'github_url', 'demo_url', 'youtube_url', 
             'app_store_url', 'google_play_url', 'project_start_date', 
             'project_end_date', 'created_at', 'updated_at', 'view_count', 
-            'like_count', 'media', 'comments', 'comments_count', 'is_liked'
+            'like_count', 'media', 'comments', 'comments_count', 'is_liked',
+            'unique_viewers'
         ]
         read_only_fields = [
             'id', 'user', 'created_at', 'updated_at', 
-            'view_count', 'like_count', 'is_liked', 'comments_count'
+            'view_count', 'like_count', 'is_liked', 'comments_count', 'unique_viewers'
         ]
     
-    def get_comments_count(self, obj):
-        """獲取評論數量"""
-        return obj.comments.count()
+    def get_comments(self, obj):
+        """
+        最新的幾則評論（PORTFOLIO_DETAIL_COMMENTS 則），其餘由評論列表端點以游標分頁取得
+        評論總數使用反正規化的 comments_count
+        """
+        recent = getattr(obj, 'recent_comments', None)
+        if recent is None:
+            recent = obj.comments.select_related('user').order_by('-id')[:portfolio_detail_comments()]
+        return PortfolioCommentSerializer(recent, many=True, context=self.context).data
     
     def get_is_liked(self, obj):
-        """當前用戶是否已點讚此作品集"""
+        """當前用戶是否已點讚此作品集（查詢集已帶出 viewer_has_liked 時直接使用）"""
+        if hasattr(obj, 'viewer_has_liked'):
+            return obj.viewer_has_liked
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             return PortfolioLike.objects.filter(
@@ -100,6 +117,12 @@ class PortfolioSerializer(serializers.ModelSerializer):
             ).exists()
         return False
     
+    def get_unique_viewers(self, obj):
+        """不重複瀏覽者估計值（查詢集已帶出時直接使用）"""
+        if hasattr(obj, 'unique_viewers'):
+            return obj.unique_viewers
+        return unique_viewers_for(ViewSketch.KIND_PORTFOLIO, obj.pk)
+    
     def create(self, validated_data):
         """創建作品集"""
         # 從當前請求獲取用戶
@@ -0,0 +1,20 @@
+# apps/portfolios/signals.py
+# 作品集信號檔案，評論刪除時同步遞減作品集的評論數
+# 功能：評論以任何方式刪除（後台、刪除用戶或作品集時的連帶刪除、查詢集刪除）都會觸發 post_delete，
+#       以條件 UPDATE 將 comments_count 減一且不低於 0；作品集本身已刪除時 UPDATE 不影響任何列
+# 資料來源：PortfolioComment 的 post_delete
+# 資料流向：Portfolio.comments_count
+
+from django.db.models import F, PositiveIntegerField, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Portfolio, PortfolioComment
+
+
+@receiver(post_delete, sender=PortfolioComment, dispatch_uid='portfolios_comment_deleted')
+def decrement_comments_count(sender, instance, **kwargs):
+    Portfolio.objects.filter(pk=instance.portfolio_id).update(
+        comments_count=Greatest(F('comments_count') - 1, Value(0), output_field=PositiveIntegerField())
+    )
@@ -2,8 +2,49 @@
 # 可在此檔案撰寫 models、views、API 等自動化測試，確保功能正確
 
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# 目前尚未撰寫任何測試案例，範例：
-# class PortfolioModelTest(TestCase):
-#     def test_create_portfolio(self):
-#         ...
+from apps.users.models import User
+
+from .models import Portfolio, PortfolioComment
+
+
+class CommentsCountTest(TestCase):
+    """評論數在新增評論時加一，任何方式刪除評論時減一"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner@example.com', 'owner', 'pw')
+        self.commenter = User.objects.create_user('commenter@example.com', 'commenter', 'pw')
+        self.portfolio = Portfolio.objects.create(user=self.owner, title='Portfolio')
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        url = f'/api/portfolios/portfolios/{self.portfolio.pk}/comment/'
+        for number in range(3):
+            response = client.post(url, {'content': f'comment {number}'})
+            self.assertEqual(response.status_code, 200)
+
+    def comments_count(self):
+        return Portfolio.objects.values_list('comments_count', flat=True).get(pk=self.portfolio.pk)
+
+    def test_comment_increments(self):
+        self.assertEqual(self.comments_count(), 3)
+
+    def test_delete_single_comment(self):
+        PortfolioComment.objects.filter(portfolio=self.portfolio).first().delete()
+        self.assertEqual(self.comments_count(), 2)
+
+    def test_cascade_from_user_delete(self):
+        for number in range(2):
+            PortfolioComment.objects.create(portfolio=self.portfolio, user=self.commenter, content=f'reply {number}')
+        Portfolio.objects.filter(pk=self.portfolio.pk).update(comments_count=5)
+        self.commenter.delete()
+        self.assertEqual(self.comments_count(), 3)
+
+    def test_never_below_zero(self):
+        Portfolio.objects.filter(pk=self.portfolio.pk).update(comments_count=1)
+        PortfolioComment.objects.filter(portfolio=self.portfolio).delete()
+        self.assertEqual(self.comments_count(), 0)
+
+    def test_portfolio_delete(self):
+        self.portfolio.delete()
+        self.assertFalse(PortfolioComment.objects.exists())
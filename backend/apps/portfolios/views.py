@@ -6,13 +6,22 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import F
+from rest_framework.exceptions import NotFound
 from .models import Portfolio, PortfolioCategory, PortfolioMedia, PortfolioComment, PortfolioLike
 from .serializers import (
     PortfolioSerializer, PortfolioMinimalSerializer, PortfolioCategorySerializer,
-    PortfolioMediaSerializer, PortfolioCommentSerializer
+    PortfolioMediaSerializer, PortfolioCommentSerializer, portfolio_detail_comments
 )
 from apps.users.models import User
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import record_view as record_unique_view, viewer_key, with_unique_viewers
+from .counters import record_view
+
+# 評論列表的每頁數量
+COMMENT_PAGE_SIZE = 20
+MAX_COMMENT_PAGE_SIZE = 100
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
@@ -42,8 +51,19 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     ordering = ['-is_featured', '-created_at']
     
     def get_queryset(self):
-        """獲取查詢集，允許通過用戶篩選"""
+        """
+        獲取查詢集，允許通過用戶篩選
+        載入計畫依動作決定：列表 1 個查詢；詳情、更新 4 個查詢（見 PortfolioQuerySet）；其他動作只 join 作者供權限檢查
+        """
         queryset = Portfolio.objects.all()
+        if self.action == 'list':
+            queryset = queryset.for_list()
+        elif self.action in ('retrieve', 'update', 'partial_update'):
+            queryset = with_unique_viewers(
+                queryset.for_detail(self.request.user, portfolio_detail_comments()), ViewSketch.KIND_PORTFOLIO
+            )
+        else:
+            queryset = queryset.select_related('user')
         
         # 從 URL 參數中獲取用戶 ID
         user_id = self.request.query_params.get('user_id')
@@ -74,10 +94,10 @@ class PortfolioViewSet(viewsets.ModelViewSet):
         """獲取單個作品集詳情，並增加瀏覽次數"""
         instance = self.get_object()
         
-        # 增加瀏覽次數
-        instance.view_count = F('view_count') + 1
-        instance.save(update_fields=['view_count'])
-        instance.refresh_from_db()  # 刷新實例以獲取更新後的值
+        # 增加瀏覽次數：先累積在記憶體，定期批次寫回；回應中的次數為資料庫值加上尚未寫回的增量（近似值）
+        instance.view_count += record_view(instance.id)
+        # 記錄不重複瀏覽者（HyperLogLog 草稿，同樣定期寫回）
+        record_unique_view(ViewSketch.KIND_PORTFOLIO, instance.id, viewer_key(request))
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -127,12 +147,14 @@ class PortfolioViewSet(viewsets.ModelViewSet):
                 "message": "評論內容不能為空"
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 創建評論
-        comment = PortfolioComment.objects.create(
-            portfolio=portfolio,
-            user=user,
-            content=content
-        )
+        # 創建評論並同步累加評論數
+        with transaction.atomic():
+            comment = PortfolioComment.objects.create(
+                portfolio=portfolio,
+                user=user,
+                content=content
+            )
+            Portfolio.objects.filter(pk=portfolio.pk).update(comments_count=F('comments_count') + 1)
         
         serializer = PortfolioCommentSerializer(comment)
         return Response({
@@ -143,12 +165,38 @@ class PortfolioViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
-        """獲取作品集的所有評論"""
-        portfolio = self.get_object()
-        comments = portfolio.comments.all().order_by('-created_at')
+        """
+        以游標分頁獲取作品集的評論（由新到舊）
+        參數 before（上一頁最後一則評論的 id）、limit（預設 20，最多 100）；評論者以 join 一併載入
+        回應：{"results": [...], "has_more": bool, "next_before": id 或 null}
+        """
+        portfolio_id = self.kwargs['pk']
+        if not Portfolio.objects.filter(pk=portfolio_id).exists():
+            raise NotFound('作品集不存在')
+        try:
+            limit = min(max(int(request.query_params.get('limit', COMMENT_PAGE_SIZE)), 1), MAX_COMMENT_PAGE_SIZE)
+            before = request.query_params.get('before')
+            before = int(before) if before else None
+        except ValueError:
+            return Response({
+                "status": "error",
+                "message": "before 與 limit 必須是整數"
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = PortfolioCommentSerializer(comments, many=True)
-        return Response(serializer.data)
+        comments = PortfolioComment.objects.filter(portfolio_id=portfolio_id).select_related('user')
+        if before is not None:
+            comments = comments.filter(id__lt=before)
+        # 多取一則判斷是否還有下一頁
+        page = list(comments.order_by('-id')[:limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+        
+        serializer = PortfolioCommentSerializer(page, many=True, context=self.get_serializer_context())
+        return Response({
+            "results": serializer.data,
+            "has_more": has_more,
+            "next_before": page[-1].id if has_more else None,
+        })
     
 class PortfolioMediaViewSet(viewsets.ModelViewSet):
     """作品集媒體文件視圖集"""
@@ -232,32 +280,34 @@ class UserPortfoliosViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PortfolioMinimalSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def get_user_id(self):
+        # 從 URL 獲取用戶 ID，沒有提供時使用當前用戶
+        return self.kwargs.get('user_id') or self.request.user.id
+    
     def get_queryset(self):
-        # 從 URL 獲取用戶 ID
-        user_id = self.kwargs.get('user_id')
-        
-        # 如果沒有提供 user_id，則使用當前用戶
-        if not user_id:
-            user_id = self.request.user.id
-        
-        # 獲取用戶
-        user = get_object_or_404(User, id=user_id)
-        
+        # 直接以 user_id 篩選作品集（不先查詢用戶），作者以 join 載入，列表共 1 個查詢
         # 獲取作品集，並按照特色和創建時間排序
-        return user.portfolios.all().order_by('-is_featured', '-created_at')
+        return Portfolio.objects.filter(user_id=self.get_user_id()).for_list().order_by('-is_featured', '-created_at')
+    
+    def ensure_user_exists(self, portfolios):
+        # 結果為空時才確認用戶是否存在，不存在回傳 404
+        if not portfolios and not User.objects.filter(id=self.get_user_id()).exists():
+            raise NotFound('用戶不存在')
+    
+    def list(self, request, *args, **kwargs):
+        portfolios = list(self.get_queryset())
+        self.ensure_user_exists(portfolios)
+        serializer = self.get_serializer(portfolios, many=True)
+        return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def featured(self, request, user_id=None):
-        """獲取用戶的特色作品集"""
-        # 從 URL 獲取用戶 ID
-        if not user_id:
-            user_id = request.user.id
-        
-        # 獲取用戶
-        user = get_object_or_404(User, id=user_id)
-        
+        """獲取用戶的特色作品集（1 個查詢）"""
         # 獲取特色作品集
-        featured_portfolios = user.portfolios.filter(is_featured=True).order_by('-created_at')
+        featured_portfolios = list(
+            Portfolio.objects.filter(user_id=self.get_user_id(), is_featured=True).for_list().order_by('-created_at')
+        )
+        self.ensure_user_exists(featured_portfolios)
         
         serializer = self.get_serializer(featured_portfolios, many=True)
         return Response(serializer.data)
\ No newline at end of file
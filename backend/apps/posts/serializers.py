@@ -3,6 +3,8 @@
 from rest_framework import serializers  # 引入 REST framework 的序列化器模組
 from .models import Post, Like, Comment, Repost, Save, PostMedia, CodeBlock  # 引入貼文相關模型
 from apps.users.serializers import UserSerializer  # 引入用戶序列化器
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import unique_viewers_for
 
 class PostMediaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -23,6 +25,7 @@ class PostSerializer(serializers.ModelSerializer):
     comment_count = serializers.SerializerMethodField()  # 動態計算留言數
     is_liked = serializers.SerializerMethodField()  # 當前用戶是否已點讚
     is_saved = serializers.SerializerMethodField()  # 當前用戶是否已儲存
+    unique_viewers = serializers.SerializerMethodField()  # 不重複瀏覽者估計值（HyperLogLog）
     media = PostMediaSerializer(many=True, read_only=True)  # 多媒體檔案
     code_blocks = CodeBlockSerializer(many=True, read_only=True)  # 程式碼區塊
 
@@ -30,7 +33,7 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post  # 指定關聯的模型為 Post
         fields = ['id', 'author', 'content', 'created_at', 'updated_at', 
                  'like_count', 'comment_count', 'is_liked', 'is_saved',
-                 'media', 'code_blocks']  # 指定可序列化的字段
+                 'media', 'code_blocks', 'unique_viewers']  # 指定可序列化的字段
         read_only_fields = ['author', 'created_at', 'updated_at']  # 這些欄位只能讀取
 
     def get_like_count(self, obj):
@@ -55,6 +58,12 @@ class PostSerializer(serializers.ModelSerializer):
             return obj.save_set.filter(user=request.user).exists()
         return False
 
+    def get_unique_viewers(self, obj):
+        # 不重複瀏覽者估計值；列表查詢集一律以 with_unique_viewers 帶出，逐筆查詢只用於單筆回應（例如剛建立的貼文）
+        if hasattr(obj, 'unique_viewers'):
+            return obj.unique_viewers
+        return unique_viewers_for(ViewSketch.KIND_POST, obj.pk)
+
     def create(self, validated_data):
         # 創建貼文時自動設定作者為當前用戶
         request = self.context.get('request')
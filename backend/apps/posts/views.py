@@ -9,6 +9,8 @@ from rest_framework.response import Response  # 引入 Response 用於自定義
 from .models import Post, Like, Comment, Repost, Save, PostMedia, CodeBlock  # 引入貼文相關模型
 from .serializers import PostSerializer, LikeSerializer, CommentSerializer, RepostSerializer, SaveSerializer  # 引入序列化器
 from django.shortcuts import get_object_or_404
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import record_view, viewer_key, with_unique_viewers
 
 class PostListCreateView(generics.ListCreateAPIView):
     # 貼文列表與創建視圖，處理貼文列表顯示與新貼文創建
@@ -19,7 +21,7 @@ class PostListCreateView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # 首頁預設按最新貼文排序，讓新發的文能在首頁第一頁最上方
-        return Post.objects.all().order_by('-created_at')
+        return with_unique_viewers(Post.objects.all(), ViewSketch.KIND_POST).order_by('-created_at')
 
     def get_serializer_context(self):
         # 添加 request 到序列化器的 context 中
@@ -59,10 +61,16 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     # GET：前端會來這裡拿單篇貼文資料
     # PUT/PATCH：前端編輯貼文時會把資料丟給這裡，這裡會更新資料庫
     # DELETE：前端刪除貼文時會呼叫這裡
-    queryset = Post.objects.all()  # 設定查詢集為所有貼文
+    queryset = with_unique_viewers(Post.objects.all(), ViewSketch.KIND_POST)  # 設定查詢集為所有貼文（附不重複瀏覽者）
     serializer_class = PostSerializer  # 指定使用的序列化器為 PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]  # 設定權限：認證用戶可更新和刪除，未認證用戶只能讀取
 
+    def retrieve(self, request, *args, **kwargs):
+        # 記錄不重複瀏覽者（只更新記憶體中的草稿，定期寫回）
+        instance = self.get_object()
+        record_view(ViewSketch.KIND_POST, instance.id, viewer_key(request))
+        return Response(self.get_serializer(instance).data)
+
     def get_serializer_context(self):
         # 添加 request 到序列化器的 context 中
         context = super().get_serializer_context()
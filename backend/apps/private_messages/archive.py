@@ -0,0 +1,210 @@
+# apps/private_messages/archive.py
+# 私訊歸檔模組，將超過保留期的訊息由熱資料表移到壓縮的冷資料區塊
+# 功能：依聊天室將序號連續的舊訊息打包成 ArchivedMessageBlock（zlib 壓縮的 JSON）並自熱資料表刪除，
+#       每個區塊各自一個短交易；讀取時依序號範圍解壓區塊，還原成未儲存的 PrivateMessage 物件
+# 資料來源：各分片的 PrivateMessage、settings 的 PRIVATE_MESSAGE_HOT_DAYS / PRIVATE_MESSAGE_ARCHIVE_BLOCK_SIZE
+# 資料流向：ArchivedMessageBlock、MessageSearchTerm（壓縮為區塊層級），history.py 與 search.py 讀取歸檔訊息，
+#           由 archive_private_messages 管理指令定期呼叫
+
+import json
+import time
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F, Max, PositiveBigIntegerField, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedMessageBlock, PrivateMessage, PrivateMessageThread
+from .sharding import attach_senders, message_shards
+
+
+def archive_cutoff(now=None):
+    """早於此時間的訊息會被歸檔"""
+    now = now or timezone.now()
+    return now - timedelta(days=getattr(settings, 'PRIVATE_MESSAGE_HOT_DAYS', 180))
+
+
+def _pack(messages):
+    rows = [
+        [message.id, message.seq, message.sender_id, message.content, message.created_at.isoformat()]
+        for message in messages
+    ]
+    return zlib.compress(json.dumps(rows, ensure_ascii=False).encode('utf-8'))
+
+
+def unpack_block(block):
+    """將區塊還原成未儲存的 PrivateMessage 物件列表（依序號由舊到新，未載入發送者）"""
+    rows = json.loads(zlib.decompress(bytes(block.data)).decode('utf-8'))
+    messages = []
+    for message_id, seq, sender_id, content, created_at in rows:
+        message = PrivateMessage(
+            id=message_id, thread_id=block.thread_id, seq=seq, sender_id=sender_id,
+            content=content, created_at=parse_datetime(created_at),
+        )
+        message._state.db = block._state.db
+        messages.append(message)
+    return messages
+
+
+def archived_messages(thread, after_seq=None, before_seq=None, limit=50, descending=False):
+    """
+    讀取聊天室中序號介於 (after_seq, before_seq) 的歸檔訊息，最多 limit 則
+    descending 為 True 時從 before_seq 往舊的方向讀（回傳順序由新到舊），否則由舊到新
+    只解壓與範圍重疊的區塊，湊滿 limit 則即停止
+    """
+    blocks = ArchivedMessageBlock.objects.for_thread(thread)
+    if after_seq is not None:
+        blocks = blocks.filter(last_seq__gt=after_seq)
+    if before_seq is not None:
+        blocks = blocks.filter(first_seq__lt=before_seq)
+    blocks = blocks.order_by('-first_seq' if descending else 'first_seq')
+
+    collected = []
+    for block in blocks.iterator():
+        messages = [
+            message for message in unpack_block(block)
+            if (after_seq is None or message.seq > after_seq)
+            and (before_seq is None or message.seq < before_seq)
+        ]
+        if descending:
+            messages.reverse()
+        collected.extend(messages)
+        if len(collected) >= limit:
+            break
+    return attach_senders(collected[:limit])
+
+
+def load_archived_blocks(shard, thread_seqs):
+    """
+    依 {thread_id: {seq, ...}} 載入分片上涵蓋這些序號的歸檔區塊，回傳 {(thread_id, seq): [PrivateMessage, ...]}
+    值為區塊內的所有訊息（依 id 由新到舊，發送者以一次查詢載入），供搜尋結果中以區塊為單位索引的歸檔訊息使用
+    """
+    blocks = []
+    for thread_id, seqs in thread_seqs.items():
+        blocks.extend(
+            ArchivedMessageBlock.objects.using(shard).filter(
+                thread_id=thread_id, first_seq__lte=max(seqs), last_seq__gte=min(seqs)
+            )
+        )
+    unpacked = [(block, unpack_block(block)) for block in blocks]
+    loaded = {message.id for message in attach_senders([message for _, messages in unpacked for message in messages])}
+
+    found = {}
+    for block, messages in unpacked:
+        messages = sorted((message for message in messages if message.id in loaded), key=lambda m: m.id, reverse=True)
+        for seq in thread_seqs[block.thread_id]:
+            if block.first_seq <= seq <= block.last_seq:
+                found[(block.thread_id, seq)] = messages
+    return found
+
+
+def reconcile_archive_watermark(thread):
+    """
+    以分片上的歸檔區塊校正 default 上的冷熱分界（分片提交後 default 提交失敗時兩者會不一致）
+    區塊中的序號一定已發出，last_seq 也不低於區塊的最後序號；回傳是否有校正
+    """
+    archived_through = (
+        ArchivedMessageBlock.objects.for_thread(thread).aggregate(last=Max('last_seq'))['last'] or 0
+    )
+    if archived_through <= thread.archived_through_seq:
+        return False
+    PrivateMessageThread.objects.filter(pk=thread.pk, archived_through_seq__lt=archived_through).update(
+        archived_through_seq=archived_through,
+        last_seq=Greatest(F('last_seq'), Value(archived_through), output_field=PositiveBigIntegerField()),
+    )
+    thread.archived_through_seq = archived_through
+    return True
+
+
+def archive_thread_block(thread, cutoff, block_size):
+    """
+    將聊天室中最舊的一批（最多 block_size 則）超過保留期的訊息打包成一個區塊，回傳歸檔的訊息數
+    序號依時間遞增，超過保留期的訊息必定是序號連續的前段，區塊之間不會交錯；
+    兩個歸檔程序同時處理同一段訊息時，(thread, first_seq) 唯一約束讓後者整批回滾；
+    這些訊息的搜尋詞條同時壓縮成區塊層級（search.compact_block_index）
+    在鎖定聊天室列的情況下進行（與發送、分片搬移互斥）；區塊與訊息在聊天室所在分片，冷熱分界在 default，分片交易先提交；
+    default 提交失敗時冷熱分界會落後於分片上的區塊，下次歸檔前先以 reconcile_archive_watermark 校正
+    """
+    from .search import compact_block_index  # search.py 匯入本模組，延後匯入避免循環
+
+    try:
+        with transaction.atomic():
+            # 與 send_message、move_thread 相同先鎖定聊天室列：搬移進行中時在此等待，鎖定後重新讀取所在分片，
+            # 不會在搬移複製之後才刪除舊分片上的訊息，冷熱分界也不會指向沒有區塊的分片
+            thread.message_shard, thread.archived_through_seq = (
+                PrivateMessageThread.objects.select_for_update()
+                .values_list('message_shard', 'archived_through_seq').get(pk=thread.pk)
+            )
+            shard = thread.shard
+            reconcile_archive_watermark(thread)
+            with transaction.atomic(using=shard):
+                messages = list(
+                    PrivateMessage.objects.for_thread(thread).filter(created_at__lt=cutoff)
+                    .only('id', 'thread_id', 'seq', 'sender_id', 'content', 'created_at')
+                    .order_by('seq')[:block_size]
+                )
+                if not messages:
+                    return 0
+                ArchivedMessageBlock.objects.using(shard).create(
+                    thread_id=thread.pk,
+                    first_seq=messages[0].seq,
+                    last_seq=messages[-1].seq,
+                    message_count=len(messages),
+                    data=_pack(messages),
+                )
+                PrivateMessage.objects.using(shard).filter(id__in=[message.id for message in messages]).delete()
+                # 熱索引中逐則的詞條換成區塊層級的詞條（每個詞每個區塊一列），搜尋索引表只隨近期訊息成長
+                compact_block_index(shard, thread.pk, messages)
+                PrivateMessageThread.objects.filter(
+                    pk=thread.pk, archived_through_seq__lt=messages[-1].seq
+                ).update(archived_through_seq=messages[-1].seq)
+    except IntegrityError:
+        return 0
+    except DatabaseError:
+        # 分片交易可能已提交：立即嘗試校正冷熱分界，仍失敗時留待下次歸檔
+        try:
+            reconcile_archive_watermark(thread)
+        except DatabaseError:
+            pass
+        raise
+    thread.archived_through_seq = max(thread.archived_through_seq, messages[-1].seq)
+    return len(messages)
+
+
+def archive_old_messages(block_size=None, max_blocks=None, pause=0, now=None):
+    """
+    歸檔所有超過保留期的訊息，回傳 (區塊數, 訊息數)
+    max_blocks: 本次最多建立的區塊數（None 表示直到處理完）
+    pause: 每個區塊之間的等待秒數，降低對線上查詢的影響
+    """
+    block_size = block_size or getattr(settings, 'PRIVATE_MESSAGE_ARCHIVE_BLOCK_SIZE', 500)
+    cutoff = archive_cutoff(now)
+    threads = []
+    for shard in message_shards():
+        thread_ids = (
+            PrivateMessage.objects.using(shard).filter(created_at__lt=cutoff)
+            .order_by().values_list('thread_id', flat=True).distinct()
+        )
+        # 只處理目前確實位於此分片的聊天室（搬移中的聊天室留到下次）
+        threads.extend(
+            thread for thread in PrivateMessageThread.objects.filter(id__in=list(thread_ids))
+            if thread.shard == shard
+        )
+
+    blocks = archived = 0
+    for thread in threads:
+        while max_blocks is None or blocks < max_blocks:
+            count = archive_thread_block(thread, cutoff, block_size)
+            if not count:
+                break
+            blocks += 1
+            archived += count
+            if pause:
+                time.sleep(pause)
+            if count < block_size:
+                break
+    return blocks, archived
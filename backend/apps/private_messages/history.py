@@ -0,0 +1,96 @@
+# apps/private_messages/history.py
+# 私訊歷史檔案，以聊天室內序號（seq）作為游標分頁讀取訊息
+# 功能：往前翻頁（before_seq）、往後翻頁（after_seq）與增量同步（since_seq），
+#       每次最多讀取 limit + 1 筆以判斷是否還有更多，查詢走 (thread, seq) 唯一索引；
+#       越過冷熱分界（archived_through_seq）時改從歸檔區塊讀取，呼叫端不需區分
+# 資料來源：聊天室所在分片的 PrivateMessage、ArchivedMessageBlock（archive.py）
+# 資料流向：views.py 的訊息列表（含跨聊天室的 (thread, seq) 游標分頁）、thread_messages 與同步端點
+
+from django.db.models import Q
+
+from .archive import archived_messages
+from .models import PrivateMessage, PrivateMessageThread
+from .sharding import attach_senders
+
+# 未指定 limit 時每頁的訊息數與允許的最大值
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def clamp_limit(limit):
+    """將前端傳入的 limit 轉為 1 ~ MAX_PAGE_SIZE 的整數，無效值使用預設頁面大小"""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _page(queryset, limit):
+    rows = list(queryset[:limit + 1])
+    return attach_senders(rows[:limit]), len(rows) > limit
+
+
+def messages_before(thread, before_seq=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    取得 before_seq 之前最新的 limit 則訊息（未提供時從最後一則往前），依序號由舊到新回傳
+    熱資料不足一頁且聊天室有歸檔時，接著從歸檔區塊往前讀
+    回傳 (messages, has_more)，has_more 表示更早之前還有訊息
+    """
+    queryset = PrivateMessage.objects.for_thread(thread)
+    if before_seq is not None:
+        queryset = queryset.filter(seq__lt=before_seq)
+    messages, has_more = _page(queryset.order_by('-seq'), limit)
+
+    if not has_more and thread.archived_through_seq:
+        # 已越過冷熱分界：歸檔訊息的序號都小於熱資料，從 before_seq（或最舊的熱資料）往前接續
+        needed = limit - len(messages)
+        upper = messages[-1].seq if messages else before_seq
+        older = archived_messages(thread, before_seq=upper, limit=needed + 1, descending=True)
+        messages.extend(older[:needed])
+        has_more = len(older) > needed
+
+    messages.reverse()
+    return messages, has_more
+
+
+def messages_after(thread, after_seq=0, limit=DEFAULT_PAGE_SIZE):
+    """
+    取得 after_seq 之後最舊的 limit 則訊息，依序號由舊到新回傳
+    after_seq 落在歸檔範圍內時先讀歸檔區塊，再接上熱資料
+    回傳 (messages, has_more)，has_more 表示之後還有訊息，客戶端應以最後一則的序號繼續同步
+    """
+    queryset = PrivateMessage.objects.for_thread(thread).filter(seq__gt=after_seq)
+    messages, has_more = _page(queryset.order_by('seq'), limit)
+    if messages and messages[0].seq == after_seq + 1:
+        # 與游標相連，必定沒有歸檔訊息夾在中間
+        return messages, has_more
+
+    if after_seq < thread.archived_through_seq:
+        archived = archived_messages(thread, after_seq=after_seq, limit=limit + 1)
+        combined = archived + messages
+        return combined[:limit], has_more or len(combined) > limit
+    return messages, has_more
+
+
+def messages_for_user(user, after_thread=0, after_seq=0, limit=DEFAULT_PAGE_SIZE):
+    """
+    用戶所有聊天室的熱資料訊息，依 (聊天室, 序號) 游標分頁，取得 (after_thread, after_seq) 之後的 limit 則
+    每個分片只查詢一次（條件為用戶在該分片上、id 不小於 after_thread 的聊天室，走 (thread, seq) 唯一索引），
+    各分片最多讀取 limit + 1 則後合併，發送者以一次查詢載入
+    回傳 (messages, has_more)，has_more 表示之後還有訊息，客戶端應以最後一則的聊天室與序號繼續
+    """
+    threads_by_shard = {}
+    threads = PrivateMessageThread.objects.filter(memberships__user=user, id__gte=after_thread)
+    for thread in threads.only('id', 'message_shard'):
+        threads_by_shard.setdefault(thread.shard, []).append(thread.id)
+
+    after = Q(thread_id__gt=after_thread) | Q(thread_id=after_thread, seq__gt=after_seq)
+    rows = []
+    for shard, thread_ids in threads_by_shard.items():
+        rows.extend(
+            PrivateMessage.objects.using(shard).filter(after, thread_id__in=thread_ids)
+            .order_by('thread_id', 'seq')[:limit + 1]
+        )
+    rows.sort(key=lambda message: (message.thread_id, message.seq))
+    return attach_senders(rows[:limit]), len(rows) > limit
@@ -0,0 +1,37 @@
+# archive_private_messages.py - 私訊歸檔指令
+# 功能：將超過 PRIVATE_MESSAGE_HOT_DAYS 的訊息打包成壓縮區塊並自熱資料表刪除，歷史分頁與搜尋會自動讀取歸檔
+# 用法：python manage.py archive_private_messages --block-size 500 --pause 0.1
+#       建議以排程每日於離峰時段執行
+
+from django.core.management.base import BaseCommand
+
+from apps.private_messages.archive import archive_cutoff, archive_old_messages
+from apps.private_messages.models import PrivateMessage
+from apps.private_messages.sharding import message_shards
+
+
+class Command(BaseCommand):
+    help = '將超過保留期的私訊移到歸檔區塊'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--block-size', type=int, default=None, help='每個區塊的訊息數（預設 PRIVATE_MESSAGE_ARCHIVE_BLOCK_SIZE）')
+        parser.add_argument('--max-blocks', type=int, default=None, help='本次最多建立的區塊數')
+        parser.add_argument('--pause', type=float, default=0, help='每個區塊之間等待秒數')
+        parser.add_argument('--dry-run', action='store_true', help='只計算將歸檔的訊息數')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            cutoff = archive_cutoff()
+            count = sum(
+                PrivateMessage.objects.using(shard).filter(created_at__lt=cutoff).count()
+                for shard in message_shards()
+            )
+            self.stdout.write(f'超過保留期的訊息：{count}')
+            return
+
+        blocks, archived = archive_old_messages(
+            block_size=options['block_size'],
+            max_blocks=options['max_blocks'],
+            pause=options['pause'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'已將 {archived} 則訊息歸檔為 {blocks} 個區塊'))
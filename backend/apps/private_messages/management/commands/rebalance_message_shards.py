@@ -0,0 +1,45 @@
+# rebalance_message_shards.py - 私訊分片搬移指令
+# 功能：新增分片後，將位置與分配規則（聊天室 id 取餘數）不一致的聊天室搬到新位置；
+#       或以 --thread / --to 將指定聊天室搬到指定分片（例如分散熱門聊天室）
+# 用法：python manage.py rebalance_message_shards --dry-run
+#       python manage.py rebalance_message_shards --thread 42 --to message_shard1
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.private_messages.models import PrivateMessageThread
+from apps.private_messages.rebalance import misplaced_threads, move_thread
+from apps.private_messages.sharding import message_shards, placement_for
+
+
+class Command(BaseCommand):
+    help = '在私訊分片之間搬移聊天室'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--thread', type=int, action='append', default=[], help='只搬移指定的聊天室（可重複）')
+        parser.add_argument('--to', default=None, help='目標分片（預設依分配規則）')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批複製的筆數')
+        parser.add_argument('--dry-run', action='store_true', help='只列出將搬移的聊天室')
+
+    def handle(self, *args, **options):
+        target = options['to']
+        if target is not None and target not in message_shards():
+            raise CommandError(f'未知的分片：{target}（可用：{", ".join(message_shards())}）')
+
+        if options['thread']:
+            threads = list(PrivateMessageThread.objects.filter(id__in=options['thread']).only('id', 'message_shard'))
+        else:
+            threads = misplaced_threads()
+
+        moved_threads = moved_messages = 0
+        for thread in threads:
+            destination = target or placement_for(thread.pk)
+            if destination == thread.shard:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f'聊天室 {thread.pk}：{thread.shard} → {destination}')
+                continue
+            moved_messages += move_thread(thread.pk, destination, batch_size=options['batch_size'])
+            moved_threads += 1
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'已搬移 {moved_threads} 個聊天室、{moved_messages} 則訊息'))
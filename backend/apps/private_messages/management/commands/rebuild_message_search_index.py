@@ -0,0 +1,20 @@
+# rebuild_message_search_index.py - 私訊搜尋索引重建指令
+# 功能：清空並重建所有私訊的搜尋索引詞（MessageSearchTerm）
+# 用法：python manage.py rebuild_message_search_index --batch-size 1000
+#       首次部署搜尋功能、調整斷詞規則（例如修正中英混合文字的切詞）或升級為區塊層級的歸檔詞條後執行一次，
+#       之後由發送 / 編輯 / 歸檔訊息時自動維護
+
+from django.core.management.base import BaseCommand
+
+from apps.private_messages.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = '重建私訊搜尋索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批寫入的索引詞筆數')
+
+    def handle(self, *args, **options):
+        count = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已重建 {count} 則訊息的搜尋索引'))
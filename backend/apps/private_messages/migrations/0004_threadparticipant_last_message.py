@@ -0,0 +1,89 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    """回填每個聊天室的最後一則訊息與每位參與者的未讀數（不計自己發送的訊息）"""
+    PrivateMessageThread = apps.get_model('private_messages', 'PrivateMessageThread')
+    PrivateMessage = apps.get_model('private_messages', 'PrivateMessage')
+    ThreadParticipant = apps.get_model('private_messages', 'ThreadParticipant')
+
+    for thread in PrivateMessageThread.objects.iterator():
+        last = PrivateMessage.objects.filter(thread=thread).order_by('-created_at', '-id').first()
+        if last is not None:
+            PrivateMessageThread.objects.filter(pk=thread.pk).update(
+                last_message_id=last.id,
+                last_message_sender_id=last.sender_id,
+                last_message_preview=last.content[:100],
+                last_message_at=last.created_at,
+            )
+        for membership in ThreadParticipant.objects.filter(thread=thread):
+            unread = (
+                PrivateMessage.objects.filter(thread=thread, is_read=False)
+                .exclude(sender_id=membership.user_id)
+                .count()
+            )
+            if unread:
+                ThreadParticipant.objects.filter(pk=membership.pk).update(unread_count=unread)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0003_remove_message_chat_remove_message_sender_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # 將自動產生的多對多資料表改由 ThreadParticipant 模型管理（只變更模型狀態，不動資料表）
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ThreadParticipant',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('thread', models.ForeignKey(db_column='privatemessagethread_id', on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='private_messages.privatemessagethread')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thread_memberships', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'private_messages_privatemessagethread_participants',
+                        'unique_together': {('thread', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='privatemessagethread',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='message_threads', through='private_messages.ThreadParticipant', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='last_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='last_message_sender',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
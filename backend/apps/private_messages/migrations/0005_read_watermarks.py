@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+def backfill_watermarks(apps, schema_editor):
+    """
+    由舊的逐則 is_read 推導已讀水位：
+    有未讀訊息時，水位停在第一則他人未讀訊息之前；沒有未讀訊息時，水位為聊天室最後一則訊息
+    """
+    PrivateMessage = apps.get_model('private_messages', 'PrivateMessage')
+    ThreadParticipant = apps.get_model('private_messages', 'ThreadParticipant')
+
+    for membership in ThreadParticipant.objects.iterator():
+        messages = PrivateMessage.objects.filter(thread_id=membership.thread_id)
+        first_unread = (
+            messages.filter(is_read=False).exclude(sender_id=membership.user_id)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if first_unread is not None:
+            watermark = messages.filter(id__lt=first_unread).order_by('-id').values_list('id', flat=True).first()
+        else:
+            watermark = messages.order_by('-id').values_list('id', flat=True).first()
+        if watermark:
+            ThreadParticipant.objects.filter(pk=membership.pk).update(last_read_message_id=watermark)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0004_threadparticipant_last_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='last_read_message_id',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='privatemessage',
+            name='is_read',
+        ),
+    ]
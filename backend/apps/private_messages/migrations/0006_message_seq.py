@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+def backfill_seq(apps, schema_editor):
+    """
+    依 (created_at, id) 順序為每個聊天室的訊息編號，並把已讀水位由訊息 id 換算成序號
+    """
+    PrivateMessageThread = apps.get_model('private_messages', 'PrivateMessageThread')
+    PrivateMessage = apps.get_model('private_messages', 'PrivateMessage')
+    ThreadParticipant = apps.get_model('private_messages', 'ThreadParticipant')
+
+    for thread in PrivateMessageThread.objects.iterator():
+        messages = list(PrivateMessage.objects.filter(thread=thread).order_by('created_at', 'id').only('id'))
+        seq_by_id = {}
+        for seq, message in enumerate(messages, start=1):
+            message.seq = seq
+            seq_by_id[message.id] = seq
+        PrivateMessage.objects.bulk_update(messages, ['seq'], batch_size=1000)
+        PrivateMessageThread.objects.filter(pk=thread.pk).update(last_seq=len(messages))
+
+        for membership in ThreadParticipant.objects.filter(thread=thread):
+            read_seqs = [seq for message_id, seq in seq_by_id.items() if message_id <= membership.last_read_message_id]
+            if read_seqs:
+                ThreadParticipant.objects.filter(pk=membership.pk).update(last_read_seq=max(read_seqs))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0005_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatemessage',
+            name='seq',
+            field=models.PositiveBigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='last_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='threadparticipant',
+            name='last_read_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_seq, migrations.RunPython.noop),
+    ]
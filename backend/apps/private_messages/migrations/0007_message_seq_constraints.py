@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0006_message_seq'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='privatemessage',
+            name='seq',
+            field=models.PositiveBigIntegerField(),
+        ),
+        migrations.AddConstraint(
+            model_name='privatemessage',
+            constraint=models.UniqueConstraint(fields=('thread', 'seq'), name='pm_message_thread_seq'),
+        ),
+        migrations.RemoveField(
+            model_name='threadparticipant',
+            name='last_read_message_id',
+        ),
+    ]
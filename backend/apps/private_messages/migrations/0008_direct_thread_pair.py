@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0007_message_seq_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='direct_user_high',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='direct_user_low',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='privatemessagethread',
+            constraint=models.UniqueConstraint(condition=models.Q(('direct_user_high__isnull', False), ('direct_user_low__isnull', False)), fields=('direct_user_low', 'direct_user_high'), name='pm_thread_direct_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='privatemessagethread',
+            constraint=models.CheckConstraint(condition=models.Q(('direct_user_low__lt', models.F('direct_user_high'))), name='pm_thread_direct_pair_ordered'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations
+
+
+def backfill_direct_pairs(apps, schema_editor):
+    """
+    為既有的兩人聊天室填入一對一用戶
+    同一對用戶有多個聊天室時，只有最近更新的那個成為一對一聊天室，其餘維持原狀
+    """
+    PrivateMessageThread = apps.get_model('private_messages', 'PrivateMessageThread')
+    ThreadParticipant = apps.get_model('private_messages', 'ThreadParticipant')
+
+    members = {}
+    for thread_id, user_id in ThreadParticipant.objects.values_list('thread_id', 'user_id'):
+        members.setdefault(thread_id, set()).add(user_id)
+
+    seen_pairs = set()
+    for thread_id in PrivateMessageThread.objects.order_by('-updated_at', '-id').values_list('id', flat=True):
+        user_ids = members.get(thread_id, ())
+        if len(user_ids) != 2:
+            continue
+        pair = tuple(sorted(user_ids))
+        if pair in seen_pairs:
+            continue
+        seen_pairs.add(pair)
+        PrivateMessageThread.objects.filter(pk=thread_id).update(
+            direct_user_low_id=pair[0], direct_user_high_id=pair[1]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0008_direct_thread_pair'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_direct_pairs, migrations.RunPython.noop),
+    ]
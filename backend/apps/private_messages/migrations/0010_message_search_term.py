@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0009_backfill_direct_thread_pair'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.BigIntegerField()),
+                ('seq', models.PositiveBigIntegerField()),
+                ('term', models.CharField(max_length=32)),
+                ('thread', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='private_messages.privatemessagethread')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'thread', 'message_id'], name='pm_search_term_thread'), models.Index(fields=['message_id'], name='pm_search_message')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0010_message_search_term'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMessageBlock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_seq', models.PositiveBigIntegerField()),
+                ('last_seq', models.PositiveBigIntegerField()),
+                ('message_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='privatemessage',
+            options={'ordering': ['created_at'], 'verbose_name': '私訊', 'verbose_name_plural': '私訊'},
+        ),
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='archived_through_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='privatemessage',
+            index=models.Index(fields=['created_at'], name='pm_message_created'),
+        ),
+        migrations.AddField(
+            model_name='archivedmessageblock',
+            name='thread',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_blocks', to='private_messages.privatemessagethread'),
+        ),
+        migrations.AddConstraint(
+            model_name='archivedmessageblock',
+            constraint=models.UniqueConstraint(fields=('thread', 'first_seq'), name='pm_archive_thread_first_seq'),
+        ),
+    ]
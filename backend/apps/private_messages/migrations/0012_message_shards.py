@@ -0,0 +1,72 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+MESSAGE_ID_SEQUENCE = 'private_messages_message_id_seq'
+
+
+def place_existing_threads(apps, schema_editor):
+    """既有聊天室的訊息都在 default，記錄為 default 分片"""
+    PrivateMessageThread = apps.get_model('private_messages', 'PrivateMessageThread')
+    PrivateMessageThread.objects.using(schema_editor.connection.alias).filter(message_shard='').update(
+        message_shard='default'
+    )
+
+
+def create_message_id_sequence(apps, schema_editor):
+    """在 default 建立跨分片共用的訊息 id 序列，從現有最大 id 之後開始"""
+    connection = schema_editor.connection
+    if connection.alias != 'default' or connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM private_messages_privatemessage')
+        start = cursor.fetchone()[0]
+        cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {MESSAGE_ID_SEQUENCE} START WITH {int(start)}')
+
+
+def drop_message_id_sequence(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.alias != 'default' or connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP SEQUENCE IF EXISTS {MESSAGE_ID_SEQUENCE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0011_archived_message_block'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatemessagethread',
+            name='message_shard',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='archivedmessageblock',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_blocks', to='private_messages.privatemessagethread'),
+        ),
+        migrations.AlterField(
+            model_name='messagesearchterm',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='private_messages.privatemessagethread'),
+        ),
+        migrations.AlterField(
+            model_name='privatemessage',
+            name='sender',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='sent_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='privatemessage',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='private_messages.privatemessagethread'),
+        ),
+        migrations.RunPython(place_existing_threads, migrations.RunPython.noop),
+        migrations.RunPython(create_message_id_sequence, drop_message_id_sequence),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('private_messages', '0012_message_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedmessageblock',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_blocks', to='private_messages.privatemessagethread'),
+        ),
+        migrations.AlterField(
+            model_name='messagesearchterm',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='private_messages.privatemessagethread'),
+        ),
+        migrations.AlterField(
+            model_name='privatemessage',
+            name='sender',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='sent_messages', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='privatemessage',
+            name='thread',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='messages', to='private_messages.privatemessagethread'),
+        ),
+    ]
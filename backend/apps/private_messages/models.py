@@ -7,19 +7,95 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .sharding import placement_for
+
 User = get_user_model()
 
+class PrivateMessageThreadQuerySet(models.QuerySet):
+    """聊天室查詢集"""
+
+    def inbox_for(self, user):
+        """
+        用戶的聊天室列表（收件匣）
+        未讀數取自該用戶的 ThreadParticipant 列，最後一則訊息取自聊天室上的反正規化欄位，
+        參與者以一次 prefetch 載入，查詢數固定，與聊天室數量無關
+        """
+        return (
+            self.filter(memberships__user=user)
+            .annotate(viewer_unread_count=models.F('memberships__unread_count'))
+            .select_related('last_message_sender')
+            .prefetch_related(
+                models.Prefetch('participants', queryset=User.objects.only('id', 'username'))
+            )
+            .order_by('-updated_at')
+        )
+
+
+class ShardedQuerySet(models.QuerySet):
+    """訊息分片模型的查詢集（PrivateMessage、ArchivedMessageBlock、MessageSearchTerm）"""
+
+    def for_thread(self, thread):
+        """聊天室的資料，查詢導向聊天室所在的分片"""
+        return self.using(thread.shard).filter(thread_id=thread.pk)
+
+
 class PrivateMessageThread(models.Model):
     """
     A thread between users for private messaging
+    last_message_*: 最後一則訊息的反正規化欄位，發送訊息時更新，收件匣不需查詢訊息表
+    last_seq: 聊天室內最後一則訊息的序號，發送訊息時在鎖定此列的情況下加一分配給新訊息
+    direct_user_low / direct_user_high: 一對一聊天室的兩位用戶（id 較小者、較大者），
+        以唯一約束保證同一對用戶只有一個一對一聊天室；群組聊天室兩者皆為空
+    archived_through_seq: 冷熱分界，序號小於等於此值的訊息已移入 ArchivedMessageBlock
+    message_shard: 訊息所在分片的資料庫別名，建立時依 id 分配，之後只由 rebalance_message_shards 變更
     """
-    participants = models.ManyToManyField(User, related_name='message_threads')
+    participants = models.ManyToManyField(User, through='ThreadParticipant', related_name='message_threads')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    last_message_id = models.BigIntegerField(null=True, blank=True)  # 最後一則訊息 id
+    last_message_sender = models.ForeignKey(
+        User, related_name='+', on_delete=models.SET_NULL, null=True, blank=True
+    )  # 最後一則訊息的發送者
+    last_message_preview = models.CharField(max_length=100, blank=True)  # 最後一則訊息的內容預覽
+    last_message_at = models.DateTimeField(null=True, blank=True)  # 最後一則訊息的時間
+    last_seq = models.PositiveBigIntegerField(default=0)  # 最後一則訊息的序號
+    archived_through_seq = models.PositiveBigIntegerField(default=0)  # 已歸檔到的序號
+    message_shard = models.CharField(max_length=64, blank=True)  # 訊息所在分片
+    direct_user_low = models.ForeignKey(
+        User, related_name='+', on_delete=models.SET_NULL, null=True, blank=True
+    )  # 一對一聊天室中 id 較小的用戶
+    direct_user_high = models.ForeignKey(
+        User, related_name='+', on_delete=models.SET_NULL, null=True, blank=True
+    )  # 一對一聊天室中 id 較大的用戶
+
+    objects = PrivateMessageThreadQuerySet.as_manager()
     
     class Meta:
         ordering = ['-updated_at']
+        constraints = [
+            # 每對用戶只有一個一對一聊天室，查找時直接走此唯一索引
+            models.UniqueConstraint(
+                fields=['direct_user_low', 'direct_user_high'], name='pm_thread_direct_pair',
+                condition=models.Q(direct_user_low__isnull=False, direct_user_high__isnull=False),
+            ),
+            models.CheckConstraint(
+                condition=models.Q(direct_user_low__lt=models.F('direct_user_high')),
+                name='pm_thread_direct_pair_ordered',
+            ),
+        ]
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.message_shard:
+            # 分片依 id 決定，建立後立即記錄，之後新增分片也不會改變既有聊天室的位置
+            self.message_shard = placement_for(self.pk)
+            type(self).objects.filter(pk=self.pk).update(message_shard=self.message_shard)
+
+    @property
+    def shard(self):
+        """訊息所在分片的資料庫別名"""
+        return self.message_shard or placement_for(self.pk)
+
     def __str__(self):
         participant_names = ', '.join([user.username for user in self.participants.all()])
         return f"Thread between {participant_names}"
@@ -27,30 +103,121 @@ class PrivateMessageThread(models.Model):
     @property
     def last_message(self):
         """Get the last message in this thread"""
-        return self.messages.order_by('-created_at').first()
+        if self.last_message_id is None:
+            return None
+        return self.messages.filter(id=self.last_message_id).first()
     
-    @property
-    def unread_count(self):
-        """Get the number of unread messages in this thread for the request user"""
-        # This is a placeholder, actual implementation would depend on request context
-        return self.messages.filter(is_read=False).count()
+    def unread_count_for(self, user):
+        """Get the number of messages from other participants that the given user has not read"""
+        return (
+            self.memberships.filter(user=user).values_list('unread_count', flat=True).first() or 0
+        )
+
+
+class ThreadParticipant(models.Model):
+    """
+    聊天室參與者（participants 多對多關係的中介表）
+    每位參與者一列，保存該參與者在此聊天室的未讀數與已讀水位（讀到第幾則訊息的序號），
+    發送訊息時一次更新其他參與者的未讀數；訊息是否已讀由各參與者的已讀水位推導
+    沿用原本自動產生的多對多資料表與欄位名稱
+    """
+    thread = models.ForeignKey(
+        PrivateMessageThread, related_name='memberships', on_delete=models.CASCADE,
+        db_column='privatemessagethread_id'
+    )
+    user = models.ForeignKey(User, related_name='thread_memberships', on_delete=models.CASCADE)
+    unread_count = models.PositiveIntegerField(default=0)  # 此參與者的未讀訊息數
+    last_read_seq = models.PositiveBigIntegerField(default=0)  # 已讀水位：已讀到的最後一則訊息序號
+
+    class Meta:
+        db_table = 'private_messages_privatemessagethread_participants'
+        unique_together = ('thread', 'user')
+
+    def __str__(self):
+        return f"{self.user} in thread {self.thread_id}"
 
 class PrivateMessage(models.Model):
     """
     A private message within a thread
+    seq: 聊天室內單調遞增的序號，作為訊息分頁、增量同步與已讀水位的游標
+    存放在聊天室所在的分片，外鍵不建立資料庫約束（聊天室與用戶在 default）；id 跨分片唯一
+    刪除聊天室或用戶時 Django 只會在 default 上連帶刪除，因此外鍵不連帶刪除，由 signals.py 在每個分片上清除
     """
-    thread = models.ForeignKey(PrivateMessageThread, related_name='messages', on_delete=models.CASCADE)
-    sender = models.ForeignKey(User, related_name='sent_messages', on_delete=models.CASCADE)
+    thread = models.ForeignKey(
+        PrivateMessageThread, related_name='messages', on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    sender = models.ForeignKey(User, related_name='sent_messages', on_delete=models.DO_NOTHING, db_constraint=False)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
+    seq = models.PositiveBigIntegerField()  # 聊天室內序號
+
+    objects = ShardedQuerySet.as_manager()
     
     class Meta:
         ordering = ['created_at']
-    
+        verbose_name = '私訊'  # 模型名稱
+        verbose_name_plural = '私訊'  # 複數名稱
+        constraints = [
+            # 序號在聊天室內唯一，同時作為依序號分頁的索引
+            models.UniqueConstraint(fields=['thread', 'seq'], name='pm_message_thread_seq'),
+        ]
+        indexes = [
+            # 歸檔時找出超過保留期的訊息
+            models.Index(fields=['created_at'], name='pm_message_created'),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender.username} at {self.created_at.strftime('%Y-%m-%d %H:%M')}"
 
+
+class ArchivedMessageBlock(models.Model):
+    """
+    歸檔訊息區塊（冷資料）
+    超過保留期的訊息由 archive.py 依聊天室、依序號連續區間打包成一個區塊，
+    內容為 zlib 壓縮的 JSON，熱資料表與其索引因此只保留近期訊息
+    first_seq / last_seq: 區塊涵蓋的序號範圍（含）
+    """
+    thread = models.ForeignKey(
+        PrivateMessageThread, related_name='archived_blocks', on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    first_seq = models.PositiveBigIntegerField()  # 區塊內第一則訊息的序號
+    last_seq = models.PositiveBigIntegerField()  # 區塊內最後一則訊息的序號
+    message_count = models.PositiveIntegerField()  # 區塊內的訊息數
+    data = models.BinaryField()  # 壓縮後的訊息內容
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
-        verbose_name = '私訊'  # 模型名稱
-        verbose_name_plural = '私訊'  # 複數名稱
\ No newline at end of file
+        constraints = [
+            models.UniqueConstraint(fields=['thread', 'first_seq'], name='pm_archive_thread_first_seq'),
+        ]
+
+    def __str__(self):
+        return f"Archived messages {self.first_seq}-{self.last_seq} in thread {self.thread_id}"
+
+
+class MessageSearchTerm(models.Model):
+    """
+    私訊搜尋的反向索引（每則訊息的每個詞一列）
+    由 search.py 在發送、編輯訊息時寫入；搜尋時以 (term, thread) 索引只讀取用戶所在聊天室的詞條，
+    查詢量與平台總訊息量無關
+    message_id / seq: 訊息的 id 與聊天室內序號，不設外鍵，刪除訊息時由 search.py 一併清除
+    """
+    thread = models.ForeignKey(
+        PrivateMessageThread, related_name='+', on_delete=models.DO_NOTHING, db_index=False, db_constraint=False
+    )
+    message_id = models.BigIntegerField()  # 訊息 id
+    seq = models.PositiveBigIntegerField()  # 訊息在聊天室內的序號
+    term = models.CharField(max_length=32)  # 詞（拉丁字詞或中日韓單字 / 二元組）
+
+    objects = ShardedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'thread', 'message_id'], name='pm_search_term_thread'),
+            models.Index(fields=['message_id'], name='pm_search_message'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in message {self.message_id}"
@@ -0,0 +1,88 @@
+# apps/private_messages/rebalance.py
+# 私訊分片搬移模組，將聊天室的訊息資料從目前的分片搬到另一個分片
+# 功能：鎖定聊天室列（同時擋住發送與歸檔）後把訊息、歸檔區塊與搜尋詞複製到目標分片，
+#       更新 PrivateMessageThread.message_shard，提交後再刪除來源分片上的資料
+# 資料來源：來源分片的 PrivateMessage、ArchivedMessageBlock、MessageSearchTerm
+# 資料流向：目標分片，由 rebalance_message_shards 管理指令呼叫
+
+from django.db import DatabaseError, transaction
+
+from .models import ArchivedMessageBlock, MessageSearchTerm, PrivateMessage, PrivateMessageThread
+from .sharding import placement_for
+
+# 依序搬移的模型；訊息保留原本的 id（跨分片唯一，其他資料以 id 參照），其餘由目標分片重新編號
+SHARDED_MODELS = (
+    (PrivateMessage, True),
+    (ArchivedMessageBlock, False),
+    (MessageSearchTerm, False),
+)
+
+
+def misplaced_threads():
+    """位置與目前 MESSAGE_SHARDS 的分配規則不一致的聊天室（新增分片後需要搬移）"""
+    return [
+        thread for thread in PrivateMessageThread.objects.only('id', 'message_shard').order_by('id')
+        if thread.shard != placement_for(thread.pk)
+    ]
+
+
+def _copy(model, keep_ids, source, target, thread_id, batch_size):
+    rows = []
+    copied = 0
+    for row in model.objects.using(source).filter(thread_id=thread_id).iterator(chunk_size=batch_size):
+        if not keep_ids:
+            row.pk = None
+        rows.append(row)
+        if len(rows) >= batch_size:
+            model.objects.using(target).bulk_create(rows)
+            copied += len(rows)
+            rows = []
+    model.objects.using(target).bulk_create(rows)
+    return copied + len(rows)
+
+
+def move_thread(thread_id, target, batch_size=1000):
+    """
+    將聊天室的訊息資料搬到 target 分片，回傳搬移的訊息數（已在 target 時回傳 0）
+    目標分片先清除此聊天室的資料，上次中斷留下的副本不會造成重複；
+    目標分片交易先提交、default 上的 message_shard 隨後提交，最後才刪除來源資料，
+    任何一步失敗時聊天室仍指向完整的來源分片；目標分片已提交而 default 失敗時清除目標分片上的副本
+    """
+    try:
+        with transaction.atomic():
+            thread = PrivateMessageThread.objects.select_for_update().get(pk=thread_id)
+            source = thread.shard
+            if source == target:
+                return 0
+            with transaction.atomic(using=target):
+                for model, _ in SHARDED_MODELS:
+                    model.objects.using(target).filter(thread_id=thread_id).delete()
+                copied = {
+                    model: _copy(model, keep_ids, source, target, thread_id, batch_size)
+                    for model, keep_ids in SHARDED_MODELS
+                }
+                PrivateMessageThread.objects.filter(pk=thread_id).update(message_shard=target)
+    except Exception:
+        _discard_copy(thread_id, target)
+        raise
+
+    with transaction.atomic(using=source):
+        for model, _ in SHARDED_MODELS:
+            model.objects.using(source).filter(thread_id=thread_id).delete()
+    return copied[PrivateMessage]
+
+
+def _discard_copy(thread_id, target):
+    """
+    搬移失敗後，聊天室仍不在 target 時刪除 target 上的副本（避免留下不會被讀取、也不會隨聊天室刪除的資料）
+    無法確認聊天室位置時保留副本，下次搬移會先清除
+    """
+    try:
+        shard = PrivateMessageThread.objects.filter(pk=thread_id).values_list('message_shard', flat=True).first()
+        if shard == target:
+            return
+        with transaction.atomic(using=target):
+            for model, _ in SHARDED_MODELS:
+                model.objects.using(target).filter(thread_id=thread_id).delete()
+    except DatabaseError:
+        pass
@@ -0,0 +1,258 @@
+# apps/private_messages/search.py
+# 私訊搜尋檔案，維護訊息的反向索引並在用戶自己的聊天室中搜尋
+# 功能：將訊息內容切成詞（拉丁字母 / 數字以單字為詞，中日韓文字以單字與相鄰二字為詞）寫入 MessageSearchTerm，
+#       發送時在交易提交後才寫入，不佔用聊天室列鎖；歸檔時同一區塊的詞條壓縮成每個詞一列（區塊層級）；
+#       搜尋時只在用戶參與的聊天室中找出包含所有查詢詞的訊息或區塊，再確認原文片段並產生高亮摘要
+# 資料來源：PrivateMessage、ArchivedMessageBlock（已歸檔的訊息），皆在聊天室所在分片；PrivateMessageThread（default）
+# 資料流向：MessageSearchTerm，views.py 的訊息搜尋端點
+
+import re
+
+from django.db import transaction
+from django.db.models import Count
+
+from .archive import load_archived_blocks, unpack_block
+from .models import ArchivedMessageBlock, MessageSearchTerm, PrivateMessage, PrivateMessageThread
+from .sharding import attach_senders, message_shards
+
+# 中日韓文字（假名、CJK 擴充 A、CJK 統一漢字、韓文音節、相容漢字）的字元範圍
+_CJK_RANGES = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+# 連續的中日韓文字為一個片段；其餘連續的字母數字為一個拉丁字詞
+# （Python 的 \w 也包含中日韓文字，拉丁字詞必須排除這些範圍，否則「Django框架」會被當成一個詞）
+_SEGMENT_RE = re.compile(rf'[{_CJK_RANGES}]+|[^\W_{_CJK_RANGES}]+')
+_CJK_RE = re.compile(rf'[{_CJK_RANGES}]')
+TERM_MAX_LENGTH = 32
+SNIPPET_BEFORE = 30  # 摘要中第一個命中處之前保留的字數
+SNIPPET_LENGTH = 120  # 摘要最大長度
+
+
+def _segments(text):
+    """將文字切成片段（連續的中日韓文字或連續的拉丁字母數字），一律轉為小寫"""
+    return _SEGMENT_RE.findall(text.lower())
+
+
+def _is_cjk(segment):
+    return bool(_CJK_RE.match(segment))
+
+
+def index_terms(text):
+    """
+    訊息內容的索引詞集合
+    拉丁字詞整個作為一個詞；中日韓文字寫入每個單字與每組相鄰二字，單字與多字查詢都能命中
+    """
+    terms = set()
+    for segment in _segments(text):
+        if _is_cjk(segment):
+            terms.update(segment)
+            terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            terms.add(segment[:TERM_MAX_LENGTH])
+    return terms
+
+
+def query_terms(query):
+    """
+    查詢字串的片段與必須全部命中的索引詞
+    中日韓片段超過一個字時以相鄰二字為詞，否則以單字為詞
+    """
+    segments = _segments(query)
+    terms = set()
+    for segment in segments:
+        if _is_cjk(segment) and len(segment) > 1:
+            terms.update(segment[i:i + 2] for i in range(len(segment) - 1))
+        else:
+            terms.add(segment[:TERM_MAX_LENGTH])
+    return segments, terms
+
+
+def index_message(message):
+    """寫入（或重建）單則訊息的索引詞（與訊息在同一個分片）"""
+    terms = MessageSearchTerm.objects.using(message._state.db)
+    terms.filter(message_id=message.id).delete()
+    terms.bulk_create([
+        MessageSearchTerm(thread_id=message.thread_id, message_id=message.id, seq=message.seq, term=term)
+        for term in index_terms(message.content)
+    ])
+
+
+def index_message_on_commit(message):
+    """訊息所在分片的交易提交後才寫入索引詞（發送訊息時不在鎖定聊天室列的交易中寫入約 2N 列詞條）"""
+    transaction.on_commit(lambda: index_message(message), using=message._state.db)
+
+
+def block_terms(thread_id, messages):
+    """
+    歸檔區塊的索引詞條：區塊內所有訊息的詞去重後每個詞一列，
+    message_id / seq 取區塊中最大的訊息 id 與最後一則的序號（作為搜尋時的排序與分頁鍵）
+    """
+    terms = set()
+    for message in messages:
+        terms.update(index_terms(message.content))
+    message_id, seq = max(message.id for message in messages), max(message.seq for message in messages)
+    return [MessageSearchTerm(thread_id=thread_id, message_id=message_id, seq=seq, term=term) for term in terms]
+
+
+def compact_block_index(shard, thread_id, messages):
+    """訊息歸檔成區塊時，刪除逐則的詞條並寫入區塊層級的詞條（在歸檔的分片交易中呼叫）"""
+    terms = MessageSearchTerm.objects.using(shard)
+    terms.filter(message_id__in=[message.id for message in messages]).delete()
+    terms.bulk_create(block_terms(thread_id, messages))
+
+
+def remove_message_index(message):
+    """刪除訊息時清除其索引詞"""
+    MessageSearchTerm.objects.using(message._state.db).filter(message_id=message.id).delete()
+
+
+def rebuild_index(batch_size=1000):
+    """逐一分片重建所有訊息的索引（熱資料逐則、歸檔區塊以區塊層級），回傳處理的訊息數"""
+    count = 0
+    for shard in message_shards():
+        terms = MessageSearchTerm.objects.using(shard)
+        terms.all().delete()
+        rows = []
+        for message in PrivateMessage.objects.using(shard).only('id', 'thread_id', 'seq', 'content').iterator(
+            chunk_size=batch_size
+        ):
+            rows.extend(
+                MessageSearchTerm(thread_id=message.thread_id, message_id=message.id, seq=message.seq, term=term)
+                for term in index_terms(message.content)
+            )
+            count += 1
+            if len(rows) >= batch_size:
+                terms.bulk_create(rows)
+                rows = []
+        for block in ArchivedMessageBlock.objects.using(shard).iterator(chunk_size=100):
+            messages = unpack_block(block)
+            if messages:
+                rows.extend(block_terms(block.thread_id, messages))
+                count += len(messages)
+            if len(rows) >= batch_size:
+                terms.bulk_create(rows)
+                rows = []
+        terms.bulk_create(rows)
+    return count
+
+
+def _highlight(content, segments):
+    """
+    確認訊息原文包含所有查詢片段，並產生摘要與高亮位置
+    回傳 (snippet, [[start, end], ...])，位置相對於摘要；有片段不在原文中時回傳 None
+    """
+    lowered = content.lower()
+    matches = []
+    for segment in segments:
+        start = lowered.find(segment)
+        if start < 0:
+            return None
+        while start >= 0:
+            matches.append((start, start + len(segment)))
+            start = lowered.find(segment, start + len(segment))
+    matches.sort()
+
+    offset = max(0, matches[0][0] - SNIPPET_BEFORE)
+    snippet = content[offset:offset + SNIPPET_LENGTH]
+    highlights = [
+        [start - offset, min(end, offset + SNIPPET_LENGTH) - offset]
+        for start, end in matches
+        if start < offset + SNIPPET_LENGTH
+    ]
+    return snippet, highlights
+
+
+def _candidates(shard, thread_ids, terms, before_message_id, batch_size):
+    """分片上包含所有查詢詞的訊息或歸檔區塊（message_id、thread_id、seq），依 message_id 由新到舊"""
+    candidates = (
+        MessageSearchTerm.objects.using(shard)
+        .filter(term__in=terms, thread_id__in=thread_ids)
+        .values('message_id', 'thread_id', 'seq')
+        .annotate(matched=Count('id'))
+        .filter(matched=len(terms))
+        .order_by('-message_id')
+    )
+    if before_message_id is not None:
+        candidates = candidates.filter(message_id__lt=before_message_id)
+    return [dict(row, shard=shard) for row in candidates[:batch_size]]
+
+
+def _load_candidates(rows):
+    """
+    載入候選：熱資料依分片各一次查詢，其餘（區塊層級的詞條）從歸檔區塊讀取，
+    回傳 {message_id: [PrivateMessage, ...]}，熱資料為該則訊息，歸檔區塊為區塊內所有訊息（由新到舊）
+    """
+    messages = {}
+    by_shard = {}
+    for row in rows:
+        by_shard.setdefault(row['shard'], []).append(row)
+    for shard, shard_rows in by_shard.items():
+        hot = PrivateMessage.objects.using(shard).in_bulk([row['message_id'] for row in shard_rows])
+        archived = {}
+        for row in shard_rows:
+            if row['message_id'] not in hot:
+                archived.setdefault(row['thread_id'], set()).add(row['seq'])
+        messages.update({message.id: [message] for message in attach_senders(list(hot.values()))})
+        if archived:
+            blocks = load_archived_blocks(shard, archived)
+            for row in shard_rows:
+                if row['message_id'] not in hot and (row['thread_id'], row['seq']) in blocks:
+                    messages[row['message_id']] = blocks[(row['thread_id'], row['seq'])]
+    return messages
+
+
+def search_messages(user, query, limit=20, before_message_id=None):
+    """
+    在用戶參與的聊天室中搜尋訊息，依新到舊回傳（訊息 id 跨分片遞增）
+    各分片只查詢用戶在該分片上的聊天室，再合併結果；
+    歸檔區塊以區塊為單位命中，同一區塊的符合訊息放在同一頁（單一區塊命中超過 limit 則時該頁多於 limit）
+    回傳 (results, next_before)：results 為含聊天室、序號、摘要與高亮位置的字典列表，
+    next_before 為下一頁的游標（沒有更多結果時為 None）
+    """
+    segments, terms = query_terms(query)
+    if not terms:
+        return [], None
+
+    threads_by_shard = {}
+    for thread in PrivateMessageThread.objects.filter(memberships__user=user).only('id', 'message_shard'):
+        threads_by_shard.setdefault(thread.shard, []).append(thread.id)
+
+    results = []
+    seen = set()
+    previous_key = None
+    batch_size = limit * 2
+    while len(results) < limit:
+        rows = []
+        for shard, thread_ids in threads_by_shard.items():
+            rows.extend(_candidates(shard, thread_ids, terms, before_message_id, batch_size))
+        rows = sorted(rows, key=lambda row: row['message_id'], reverse=True)[:batch_size]
+        if not rows:
+            return results, None
+
+        messages = _load_candidates(rows)
+        for row in rows:
+            matched = []
+            for message in messages.get(row['message_id'], ()):
+                highlighted = _highlight(message.content, segments) if message.id not in seen else None
+                if highlighted is not None:
+                    matched.append((message, highlighted))
+            if results and len(results) + len(matched) > limit:
+                # 歸檔區塊的命中不拆頁：放不下時整個區塊留到下一頁（游標為上一個詞條的 message_id）
+                return results, previous_key
+            for message, (snippet, highlights) in matched:
+                seen.add(message.id)
+                results.append({
+                    'message_id': message.id,
+                    'thread': message.thread_id,
+                    'seq': message.seq,
+                    'sender': {'id': message.sender_id, 'username': message.sender.username},
+                    'created_at': message.created_at,
+                    'snippet': snippet,
+                    'highlights': highlights,
+                })
+            previous_key = row['message_id']
+            if len(results) >= limit:
+                # 游標為詞條的 message_id（歸檔區塊為區塊中最大的訊息 id），下一頁從其後繼續
+                return results, previous_key
+        if len(rows) < batch_size:
+            return results, None
+        before_message_id = rows[-1]['message_id']
+    return results, None
@@ -6,6 +6,7 @@
 
 from rest_framework import serializers
 from .models import PrivateMessage, PrivateMessageThread
+from .services import read_watermarks
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -22,22 +23,44 @@ class PrivateMessageThreadSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PrivateMessageThread
-        fields = ['id', 'participants', 'created_at', 'updated_at', 'last_message', 'unread_count']
+        fields = ['id', 'participants', 'created_at', 'updated_at', 'last_message', 'last_seq', 'unread_count']
 
     def get_last_message(self, obj):
-        last_message = obj.messages.order_by('-created_at').first()
-        if last_message:
-            return PrivateMessageSerializer(last_message).data
-        return None
+        # 由聊天室上的反正規化欄位組成，不查詢訊息表
+        if obj.last_message_id is None:
+            return None
+        return {
+            'id': obj.last_message_id,
+            'thread': obj.id,
+            'seq': obj.last_seq,
+            'sender': UserSerializer(obj.last_message_sender).data if obj.last_message_sender else None,
+            'content': obj.last_message_preview,
+            'created_at': serializers.DateTimeField().to_representation(obj.last_message_at),
+        }
 
     def get_unread_count(self, obj):
-        user = self.context['request'].user
-        return obj.messages.filter(is_read=False).exclude(sender=user).count()
+        # 收件匣查詢（inbox_for）已帶入當前用戶的未讀數
+        if hasattr(obj, 'viewer_unread_count'):
+            return obj.viewer_unread_count
+        return obj.unread_count_for(self.context['request'].user)
 
 class PrivateMessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = PrivateMessage
-        fields = ['id', 'thread', 'sender', 'content', 'created_at', 'is_read']
-        read_only_fields = ['sender', 'is_read']
\ No newline at end of file
+        fields = ['id', 'thread', 'seq', 'sender', 'content', 'created_at', 'is_read']
+        read_only_fields = ['seq', 'sender', 'is_read']
+
+    def get_is_read(self, obj):
+        # 由參與者的已讀水位推導：除發送者外的所有參與者都已讀到此訊息
+        # 水位依聊天室快取在 context 中，序列化整串訊息時每個聊天室只查詢一次
+        watermarks = self.context.setdefault('read_watermarks', {})
+        if obj.thread_id not in watermarks:
+            watermarks[obj.thread_id] = read_watermarks(obj.thread_id)
+        others = [
+            watermark for user_id, watermark in watermarks[obj.thread_id].items()
+            if user_id != obj.sender_id
+        ]
+        return bool(others) and min(others) >= obj.seq
\ No newline at end of file
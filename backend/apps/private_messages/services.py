@@ -0,0 +1,126 @@
+# apps/private_messages/services.py
+# 私訊服務檔案，集中處理發送訊息時需要同步更新的資料
+# 功能：分配聊天室內序號並建立訊息、更新聊天室的最後一則訊息反正規化欄位、累加其他參與者的未讀數，
+#       皆在同一個交易中完成；推進參與者的已讀水位並由序號差重算未讀數（同樣鎖定聊天室列）；
+#       以用戶對的唯一約束查找或建立一對一聊天室
+# 資料來源：views.py 傳入的聊天室、發送者與內容
+# 資料流向：PrivateMessage、MessageSearchTerm（search.py，交易提交後寫入）寫入聊天室所在分片，
+#           PrivateMessageThread、ThreadParticipant 寫入 default
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Max, PositiveBigIntegerField, Value, When
+
+from .models import PrivateMessage, PrivateMessageThread, ThreadParticipant
+from .search import index_message_on_commit
+from .sharding import next_message_id
+from .typing import set_typing
+
+
+def _shard_last_seq(thread):
+    """聊天室在所在分片上的最大訊息序號（(thread, seq) 索引，一次查詢）"""
+    return PrivateMessage.objects.for_thread(thread).aggregate(last=Max('seq'))['last'] or 0
+
+
+def send_message(thread, sender, content):
+    """
+    在聊天室中發送一則訊息
+    序號在鎖定聊天室列的情況下分配（last_seq + 1），同一聊天室的發送依序進行，序號連續且不重複；
+    兩個資料庫分開提交，last_seq 落後於分片時由序號的唯一約束發現並以分片上的最大序號校正；
+    發送代表已看過聊天室，發送者的已讀水位隨之推進到這則訊息，輸入中提示同時清除
+    """
+    with transaction.atomic():
+        last_seq, shard = PrivateMessageThread.objects.select_for_update().values_list(
+            'last_seq', 'message_shard'
+        ).get(pk=thread.pk)
+        seq = last_seq + 1
+        thread.message_shard = shard
+
+        # 訊息寫入聊天室所在的分片；分片交易包住 default 上的更新，分片先提交、default 隨後提交
+        with transaction.atomic(using=thread.shard):
+            try:
+                with transaction.atomic(using=thread.shard):  # savepoint：序號衝突時只回滾這個 INSERT
+                    message = PrivateMessage.objects.using(thread.shard).create(
+                        id=next_message_id(), thread=thread, sender=sender, content=content, seq=seq
+                    )
+            except IntegrityError:
+                # 先前的發送在分片提交後、default 提交失敗，分片上已有超過 last_seq 的序號：
+                # 改以分片上的最大序號接續，下方的 UPDATE 同時把 last_seq 校正回來
+                seq = _shard_last_seq(thread) + 1
+                message = PrivateMessage.objects.using(thread.shard).create(
+                    id=next_message_id(), thread=thread, sender=sender, content=content, seq=seq
+                )
+            index_message_on_commit(message)
+
+            PrivateMessageThread.objects.filter(pk=thread.pk).update(
+                last_seq=seq,
+                last_message_id=message.id,
+                last_message_sender=sender,
+                last_message_preview=content[:100],
+                last_message_at=message.created_at,
+                updated_at=message.created_at,
+            )
+            # 發送者的已讀水位推進到自己的訊息並清空未讀，其他參與者未讀數加一（同一個 UPDATE）
+            ThreadParticipant.objects.filter(thread=thread).update(
+                unread_count=Case(When(user=sender, then=Value(0)), default=F('unread_count') + 1),
+                last_read_seq=Case(
+                    When(user=sender, then=Value(seq)), default=F('last_read_seq'),
+                    output_field=PositiveBigIntegerField(),
+                ),
+            )
+    thread.last_seq = seq
+    set_typing(thread.pk, sender.id, False)
+    return message
+
+
+def mark_thread_read(thread_id, user, up_to_seq=None):
+    """
+    將用戶在聊天室的已讀水位推進到 up_to_seq（未提供時為聊天室最後一則訊息）
+    水位只會前進、不會超過最後一則訊息，回傳是否有更新（非參與者或水位已在更後面時回傳 False）；
+    與 send_message 相同先鎖定聊天室列，發送與已讀依序進行，未讀數不會漏算同時送達的訊息。
+    水位只在超過目前水位時推進，而發送者的水位已在自己最後一則訊息上，新水位之後的訊息都由他人發送，
+    未讀數即為 last_seq 與新水位的差（序號連續，已封存的訊息同樣計入）
+    """
+    with transaction.atomic():
+        last_seq = PrivateMessageThread.objects.select_for_update().filter(pk=thread_id).values_list(
+            'last_seq', flat=True
+        ).first()
+        if last_seq is None:
+            return False
+        target = last_seq if up_to_seq is None else min(int(up_to_seq), last_seq)
+        updated = ThreadParticipant.objects.filter(
+            thread_id=thread_id, user=user, last_read_seq__lt=target
+        ).update(last_read_seq=target, unread_count=last_seq - target)
+    return bool(updated)
+
+
+def read_watermarks(thread_id):
+    """聊天室所有參與者的已讀水位 {user_id: last_read_seq}"""
+    return dict(
+        ThreadParticipant.objects.filter(thread_id=thread_id).values_list('user_id', 'last_read_seq')
+    )
+
+
+def get_or_create_direct_thread(user, other_user):
+    """
+    查找或建立兩位用戶之間的一對一聊天室，回傳 (thread, created)
+    以 (較小 id, 較大 id) 的唯一約束查找，只需一次索引查詢；
+    兩個請求同時建立時，後寫入者觸發唯一約束衝突，get_or_create 會改為取回先建立的聊天室
+    """
+    if user.pk == other_user.pk:
+        raise ValueError('Cannot start a direct thread with yourself')
+    low, high = sorted((user.pk, other_user.pk))
+
+    thread = PrivateMessageThread.objects.filter(direct_user_low_id=low, direct_user_high_id=high).first()
+    if thread is not None:
+        return thread, False
+
+    with transaction.atomic():
+        thread, created = PrivateMessageThread.objects.get_or_create(
+            direct_user_low_id=low, direct_user_high_id=high
+        )
+        if created:
+            ThreadParticipant.objects.bulk_create([
+                ThreadParticipant(thread=thread, user_id=low),
+                ThreadParticipant(thread=thread, user_id=high),
+            ])
+    return thread, created
@@ -0,0 +1,131 @@
+# apps/private_messages/sharding.py
+# 私訊分片檔案，將訊息相關資料表依聊天室分散到 settings.MESSAGE_SHARDS 列出的資料庫
+# 功能：決定聊天室的訊息放在哪個分片（新聊天室依 id 取餘數，結果存在 PrivateMessageThread.message_shard）、
+#       資料庫路由（訊息、搜尋詞、歸檔區塊跟著聊天室走，其他模型一律在 default）、
+#       跨分片唯一的訊息 id、依 id 在各分片中尋找訊息、批次載入發送者
+# 資料來源：settings.MESSAGE_SHARDS、PrivateMessageThread.message_shard
+# 資料流向：services.py、history.py、archive.py、search.py、views.py 與 rebalance_message_shards 管理指令
+#
+# 聊天室、參與者等中繼資料仍在 default（收件匣需要與用戶資料表 join），只有訊息量大的資料表分片；
+# 每個分片都以 migrate --database=<alias> 建立完整結構，未使用的資料表保持空白
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+# 依聊天室分片的模型（private_messages 應用內的 model_name）
+SHARDED_MODELS = {'privatemessage', 'messagesearchterm', 'archivedmessageblock'}
+MESSAGE_ID_SEQUENCE = 'private_messages_message_id_seq'
+
+
+def message_shards():
+    """所有訊息分片的資料庫別名，順序決定新聊天室的分配，只能在尾端新增"""
+    return getattr(settings, 'MESSAGE_SHARDS', None) or ['default']
+
+
+def placement_for(thread_id):
+    """依聊天室 id 決定新聊天室的分片"""
+    shards = message_shards()
+    return shards[thread_id % len(shards)]
+
+
+def shard_for_thread_id(thread_id):
+    """查詢聊天室目前所在的分片（未記錄時依 id 分配）"""
+    from .models import PrivateMessageThread
+
+    shard = PrivateMessageThread.objects.filter(pk=thread_id).values_list('message_shard', flat=True).first()
+    return shard or placement_for(thread_id)
+
+
+def is_sharded(model):
+    return model._meta.app_label == 'private_messages' and model._meta.model_name in SHARDED_MODELS
+
+
+class MessageShardRouter:
+    """
+    訊息分片的資料庫路由
+    分片模型依 instance 提示決定資料庫：聊天室（反向關聯 thread.messages）→ 聊天室的分片、
+    已從分片讀出的物件 → 原本的分片、尚未儲存的物件 → 依 thread_id 查詢分片；
+    沒有提示時回傳 None（default），一般查詢應透過 objects.for_thread(thread) 指定分片
+    從分片物件存取其他模型（sender、thread 等關聯）時導回 default，避免查到分片上的空資料表
+    """
+
+    def _db_for(self, model, **hints):
+        instance = hints.get('instance')
+        if not is_sharded(model):
+            if instance is not None and is_sharded(instance.__class__):
+                return 'default'
+            return None
+        if instance is None:
+            return None
+        if instance._meta.label_lower == 'private_messages.privatemessagethread':
+            return instance.shard
+        if is_sharded(instance.__class__):
+            if instance._state.db:
+                return instance._state.db
+            if getattr(instance, 'thread_id', None) is not None:
+                return shard_for_thread_id(instance.thread_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 分片上的訊息與 default 上的聊天室、用戶之間的關聯（外鍵不建立資料庫約束）
+        if is_sharded(obj1.__class__) or is_sharded(obj2.__class__):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 每個分片都建立完整結構；資料遷移（RunPython / RunSQL，沒有 model_name）只在 default 執行，分片建立時是空的
+        if db != 'default' and model_name is None:
+            return False
+        return None
+
+
+def next_message_id():
+    """
+    分配跨分片唯一、隨時間遞增的訊息 id（default 上的序列）
+    序列不在交易中鎖定，不會讓同時發送的訊息互相等待；非 PostgreSQL 的單一資料庫開發環境回傳 None，由資料表自動編號
+    """
+    connection = connections['default']
+    if connection.vendor != 'postgresql':
+        if len(message_shards()) > 1:
+            raise ImproperlyConfigured('Message sharding requires PostgreSQL for global message ids')
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s)', [MESSAGE_ID_SEQUENCE])
+        return cursor.fetchone()[0]
+
+
+def locate_message(message_id, queryset=None):
+    """
+    依 id 在各分片中尋找訊息（訊息 id 跨分片唯一，最多找到一則），找不到時回傳 None
+    """
+    from .models import PrivateMessage
+
+    queryset = queryset if queryset is not None else PrivateMessage.objects.all()
+    for shard in message_shards():
+        message = queryset.using(shard).filter(id=message_id).first()
+        if message is not None:
+            return message
+    return None
+
+
+def attach_senders(messages):
+    """
+    以一次 default 查詢載入訊息的發送者（分片上無法 select_related 用戶資料表）
+    發送者已刪除的訊息略過，回傳載入後的訊息列表
+    """
+    users = get_user_model().objects.only('id', 'username').in_bulk({message.sender_id for message in messages})
+    loaded = []
+    for message in messages:
+        sender = users.get(message.sender_id)
+        if sender is not None:
+            message.sender = sender
+            loaded.append(message)
+    return loaded
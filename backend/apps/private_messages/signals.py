@@ -0,0 +1,31 @@
+# apps/private_messages/signals.py
+# 私訊信號處理檔案，刪除聊天室或用戶前清除每個分片上的訊息資料
+# 功能：分片模型的外鍵不連帶刪除（Django 只會在 default 上連帶刪除，其他分片會留下孤兒資料），
+#       在刪除前於每個分片（含 default）上刪除屬於該聊天室、或由該用戶發送的訊息與搜尋詞；
+#       聊天室的資料在每個分片都清除一次，搬移中斷留下的副本也一併刪除
+# 資料來源：PrivateMessageThread、User 的 pre_delete 信號
+# 資料流向：各分片的 PrivateMessage、MessageSearchTerm、ArchivedMessageBlock
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import ArchivedMessageBlock, MessageSearchTerm, PrivateMessage, PrivateMessageThread
+from .sharding import message_shards
+
+
+@receiver(pre_delete, sender=PrivateMessageThread, dispatch_uid='private_messages_purge_thread_shard')
+def purge_thread_messages(sender, instance, **kwargs):
+    """刪除聊天室在每個分片上的訊息、搜尋詞與歸檔區塊（依 thread_id 索引，每個分片三個 DELETE）"""
+    for shard in message_shards():
+        for model in (MessageSearchTerm, ArchivedMessageBlock, PrivateMessage):
+            model.objects.using(shard).filter(thread_id=instance.pk).delete()
+
+
+@receiver(pre_delete, sender=get_user_model(), dispatch_uid='private_messages_purge_user_shards')
+def purge_user_messages(sender, instance, **kwargs):
+    """刪除用戶在每個分片上發送的訊息與其搜尋詞（歸檔區塊中的訊息在讀取時略過）"""
+    for shard in message_shards():
+        messages = PrivateMessage.objects.using(shard).filter(sender_id=instance.pk)
+        MessageSearchTerm.objects.using(shard).filter(message_id__in=messages.values('id')).delete()
+        messages.delete()
@@ -1,9 +1,221 @@
 # tests.py - 撰寫 private_messages app 的單元測試
 # 可在此檔案撰寫 models、views、API 等自動化測試，確保功能正確
 
-from django.test import TestCase
+from datetime import timedelta
 
-# 目前尚未撰寫任何測試案例，範例：
-# class MessageModelTest(TestCase):
-#     def test_create_message(self):
-#         ...
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.users.models import User
+
+from .archive import archive_thread_block, unpack_block
+from .history import messages_after, messages_before
+from .models import ArchivedMessageBlock, MessageSearchTerm, PrivateMessage, PrivateMessageThread, ThreadParticipant
+from .search import index_terms, query_terms, search_messages
+from .services import mark_thread_read, read_watermarks, send_message
+
+
+def make_thread(*users):
+    thread = PrivateMessageThread.objects.create()
+    thread.participants.add(*users)
+    return thread
+
+
+class SearchTokenizerTest(SimpleTestCase):
+    """私訊搜尋斷詞：拉丁字詞整個為一個詞，中日韓文字以單字與相鄰二字為詞，混合文字在文字種類交界處切開"""
+
+    def test_latin_words(self):
+        self.assertEqual(index_terms('Hello, Django_REST 2024!'), {'hello', 'django', 'rest', '2024'})
+
+    def test_cjk_unigrams_and_bigrams(self):
+        self.assertEqual(index_terms('框架好'), {'框', '架', '好', '框架', '架好'})
+
+    def test_latin_followed_by_cjk(self):
+        terms = index_terms('Django框架很好用')
+        self.assertIn('django', terms)
+        self.assertIn('框架', terms)
+        self.assertNotIn('django框架很好用', terms)
+
+    def test_cjk_around_latin(self):
+        self.assertEqual(index_terms('我用python寫code'), {'我', '用', '我用', 'python', '寫', 'code'})
+
+    def test_kana_and_hangul(self):
+        terms = index_terms('テスト한국어test')
+        self.assertTrue({'テス', 'スト', '한국', '국어', 'test'} <= terms)
+
+    def test_long_latin_word_truncated(self):
+        self.assertEqual(index_terms('a' * 40), {'a' * 32})
+
+    def test_query_terms_mixed_script(self):
+        segments, terms = query_terms('Django框架')
+        self.assertEqual(segments, ['django', '框架'])
+        self.assertEqual(terms, {'django', '框架'})
+
+    def test_query_single_cjk_character(self):
+        self.assertEqual(query_terms('框 code'), (['框', 'code'], {'框', 'code'}))
+
+    def test_query_terms_are_indexed(self):
+        # 查詢詞必須是訊息索引詞的子集，混合文字的訊息才搜得到
+        content = '我們用React和Django框架開發'
+        for query in ('react', 'Django框架', '框架開發', '開'):
+            self.assertTrue(query_terms(query)[1] <= index_terms(content), query)
+
+    def test_empty_and_punctuation_only(self):
+        self.assertEqual(index_terms(''), set())
+        self.assertEqual(query_terms('！？ ...'), ([], set()))
+
+
+class MessageHistoryTest(TestCase):
+    """以聊天室內序號作為游標的訊息分頁與增量同步"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice@example.com', 'alice', 'pw')
+        cls.bob = User.objects.create_user('bob@example.com', 'bob', 'pw')
+        cls.thread = make_thread(cls.alice, cls.bob)
+        for number in range(1, 8):
+            send_message(cls.thread, cls.alice if number % 2 else cls.bob, f'message {number}')
+
+    def seqs(self, messages):
+        return [message.seq for message in messages]
+
+    def test_sequence_numbers_are_contiguous(self):
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.last_seq, 7)
+        messages, _ = messages_after(self.thread, 0, limit=10)
+        self.assertEqual(self.seqs(messages), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_page_backwards_from_latest(self):
+        messages, has_more = messages_before(self.thread, limit=3)
+        self.assertEqual((self.seqs(messages), has_more), ([5, 6, 7], True))
+        messages, has_more = messages_before(self.thread, before_seq=5, limit=3)
+        self.assertEqual((self.seqs(messages), has_more), ([2, 3, 4], True))
+        messages, has_more = messages_before(self.thread, before_seq=2, limit=3)
+        self.assertEqual((self.seqs(messages), has_more), ([1], False))
+
+    def test_page_forwards_and_delta_sync(self):
+        messages, has_more = messages_after(self.thread, 0, limit=4)
+        self.assertEqual((self.seqs(messages), has_more), ([1, 2, 3, 4], True))
+        messages, has_more = messages_after(self.thread, 4, limit=4)
+        self.assertEqual((self.seqs(messages), has_more), ([5, 6, 7], False))
+        self.assertEqual(messages_after(self.thread, 7, limit=4), ([], False))
+
+    def test_thread_messages_endpoint_cursor(self):
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        url = f'/api/private_messages/threads/{self.thread.pk}/messages/'
+        page = client.get(url, {'limit': 4}).data
+        self.assertEqual([message['seq'] for message in page['results']], [4, 5, 6, 7])
+        self.assertEqual((page['has_more'], page['next_before_seq']), (True, 4))
+        page = client.get(url, {'limit': 4, 'before_seq': 4}).data
+        self.assertEqual([message['seq'] for message in page['results']], [1, 2, 3])
+        self.assertFalse(page['has_more'])
+
+
+class ReadWatermarkTest(TestCase):
+    """已讀水位只前進，未讀數由最後序號與水位的差推導（含已封存的訊息）"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice@example.com', 'alice', 'pw')
+        self.bob = User.objects.create_user('bob@example.com', 'bob', 'pw')
+        self.thread = make_thread(self.alice, self.bob)
+        for number in range(1, 5):
+            send_message(self.thread, self.alice, f'message {number}')
+
+    def participant(self, user):
+        return ThreadParticipant.objects.get(thread=self.thread, user=user)
+
+    def test_send_advances_sender_and_counts_unread(self):
+        self.assertEqual(read_watermarks(self.thread.pk), {self.alice.pk: 4, self.bob.pk: 0})
+        self.assertEqual(self.participant(self.bob).unread_count, 4)
+        self.assertEqual(self.participant(self.alice).unread_count, 0)
+
+    def test_partial_read(self):
+        self.assertTrue(mark_thread_read(self.thread.pk, self.bob, up_to_seq=3))
+        bob = self.participant(self.bob)
+        self.assertEqual((bob.last_read_seq, bob.unread_count), (3, 1))
+
+    def test_watermark_never_moves_back(self):
+        mark_thread_read(self.thread.pk, self.bob, up_to_seq=3)
+        self.assertFalse(mark_thread_read(self.thread.pk, self.bob, up_to_seq=2))
+        self.assertEqual(self.participant(self.bob).last_read_seq, 3)
+
+    def test_watermark_capped_at_last_message(self):
+        mark_thread_read(self.thread.pk, self.bob, up_to_seq=99)
+        bob = self.participant(self.bob)
+        self.assertEqual((bob.last_read_seq, bob.unread_count), (4, 0))
+
+    def test_read_all(self):
+        self.assertTrue(mark_thread_read(self.thread.pk, self.bob))
+        self.assertEqual(read_watermarks(self.thread.pk)[self.bob.pk], 4)
+        self.assertEqual(self.participant(self.bob).unread_count, 0)
+        self.assertFalse(mark_thread_read(self.thread.pk, self.bob))
+
+    def test_non_participant(self):
+        carol = User.objects.create_user('carol@example.com', 'carol', 'pw')
+        self.assertFalse(mark_thread_read(self.thread.pk, carol))
+        self.assertFalse(mark_thread_read(0, self.bob))
+
+    def test_unread_after_own_reply(self):
+        send_message(self.thread, self.bob, 'reply')
+        send_message(self.thread, self.alice, 'message 6')
+        bob = self.participant(self.bob)
+        self.assertEqual((bob.last_read_seq, bob.unread_count), (5, 1))
+        self.assertTrue(mark_thread_read(self.thread.pk, self.bob, up_to_seq=6))
+        self.assertEqual(self.participant(self.bob).unread_count, 0)
+
+    def test_unread_counts_archived_messages(self):
+        self.thread.refresh_from_db()
+        archive_thread_block(self.thread, timezone.now() + timedelta(seconds=1), block_size=3)
+        self.assertTrue(mark_thread_read(self.thread.pk, self.bob, up_to_seq=1))
+        bob = self.participant(self.bob)
+        self.assertEqual((bob.last_read_seq, bob.unread_count), (1, 3))
+
+
+class ArchiveTest(TestCase):
+    """超過保留期的訊息打包成區塊後，分頁、同步與搜尋照常讀得到"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice@example.com', 'alice', 'pw')
+        self.bob = User.objects.create_user('bob@example.com', 'bob', 'pw')
+        self.thread = make_thread(self.alice, self.bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            for number in range(1, 7):
+                send_message(self.thread, self.alice, f'message {number} apple' if number == 2 else f'message {number}')
+        self.cutoff = timezone.now() + timedelta(seconds=1)
+        self.thread.refresh_from_db()
+
+    def test_archive_oldest_block(self):
+        self.assertEqual(archive_thread_block(self.thread, self.cutoff, block_size=4), 4)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.archived_through_seq, 4)
+        self.assertEqual(
+            list(PrivateMessage.objects.for_thread(self.thread).values_list('seq', flat=True).order_by('seq')), [5, 6]
+        )
+        block = ArchivedMessageBlock.objects.get(thread=self.thread)
+        self.assertEqual((block.first_seq, block.last_seq, block.message_count), (1, 4, 4))
+        self.assertEqual([message.content for message in unpack_block(block)][1], 'message 2 apple')
+
+    def test_history_crosses_archive_boundary(self):
+        archive_thread_block(self.thread, self.cutoff, block_size=4)
+        self.thread.refresh_from_db()
+        messages, has_more = messages_before(self.thread, limit=3)
+        self.assertEqual(([message.seq for message in messages], has_more), ([4, 5, 6], True))
+        messages, has_more = messages_before(self.thread, before_seq=4, limit=10)
+        self.assertEqual(([message.seq for message in messages], has_more), ([1, 2, 3], False))
+        messages, has_more = messages_after(self.thread, 2, limit=3)
+        self.assertEqual(([message.seq for message in messages], has_more), ([3, 4, 5], True))
+
+    def test_nothing_left_to_archive(self):
+        archive_thread_block(self.thread, self.cutoff, block_size=10)
+        self.assertEqual(archive_thread_block(self.thread, self.cutoff, block_size=10), 0)
+        self.assertEqual(archive_thread_block(self.thread, timezone.now() - timedelta(days=1), block_size=10), 0)
+
+    def test_search_finds_archived_message(self):
+        archive_thread_block(self.thread, self.cutoff, block_size=4)
+        # 區塊內逐則的詞條壓縮成每個詞一列
+        self.assertEqual(MessageSearchTerm.objects.filter(thread=self.thread, term='message').count(), 3)
+        results, next_before = search_messages(self.bob, 'apple')
+        self.assertEqual([(result['seq'], result['snippet']) for result in results], [(2, 'message 2 apple')])
+        self.assertIsNone(next_before)
@@ -0,0 +1,28 @@
+# apps/private_messages/typing.py
+# 私訊「輸入中」提示模組，狀態只存在 presence 快取，不寫入資料庫
+# 功能：客戶端輸入時以短 TTL 標記「某用戶正在某聊天室輸入」，停止輸入或送出訊息時清除，
+#       客戶端沒有清除時由 TTL 自動過期；聊天室同步時一次讀取所有參與者的標記
+# 資料來源：settings.CACHES['presence']、PRIVATE_MESSAGE_TYPING_SECONDS
+# 資料流向：views.py 的 ThreadTypingView 與 ThreadSyncView
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def _key(thread_id, user_id):
+    return f'typing:{thread_id}:{user_id}'
+
+
+def set_typing(thread_id, user_id, typing=True):
+    """標記或清除用戶在聊天室的輸入中狀態"""
+    cache = caches['presence']
+    if typing:
+        cache.set(_key(thread_id, user_id), True, getattr(settings, 'PRIVATE_MESSAGE_TYPING_SECONDS', 6))
+    else:
+        cache.delete(_key(thread_id, user_id))
+
+
+def typing_users(thread_id, user_ids):
+    """聊天室中目前正在輸入的用戶 id 列表（user_ids 為要檢查的參與者）"""
+    found = caches['presence'].get_many([_key(thread_id, user_id) for user_id in user_ids])
+    return [user_id for user_id in user_ids if _key(thread_id, user_id) in found]
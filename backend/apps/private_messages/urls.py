@@ -6,7 +6,10 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PrivateMessageViewSet, PrivateMessageThreadListView, PrivateMessageListView
+from .views import (
+    PrivateMessageViewSet, PrivateMessageThreadListView, PrivateMessageListView,
+    ThreadReadView, ThreadReceiptsView, ThreadSyncView, ThreadTypingView, DirectThreadView, MessageSearchView
+)
 
 # 創建路由器並註冊視圖集
 router = DefaultRouter()
@@ -19,5 +22,11 @@ urlpatterns = [
     
     # 聊天線程相關路由
     path('threads/', PrivateMessageThreadListView.as_view(), name='thread-list'),
+    path('threads/direct/', DirectThreadView.as_view(), name='thread-direct'),
+    path('search/', MessageSearchView.as_view(), name='message-search'),
     path('threads/<int:thread_id>/messages/', PrivateMessageListView.as_view(), name='thread-messages'),
+    path('threads/<int:thread_id>/read/', ThreadReadView.as_view(), name='thread-read'),
+    path('threads/<int:thread_id>/receipts/', ThreadReceiptsView.as_view(), name='thread-receipts'),
+    path('threads/<int:thread_id>/sync/', ThreadSyncView.as_view(), name='thread-sync'),
+    path('threads/<int:thread_id>/typing/', ThreadTypingView.as_view(), name='thread-typing'),
 ]
\ No newline at end of file
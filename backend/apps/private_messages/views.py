@@ -4,26 +4,99 @@
 # 資料來源：models.py 的 Chat 和 Message
 # 資料流向：API 回傳 JSON 給前端，或接收前端資料
 
-from rest_framework import generics, permissions, status
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
+from django.db import transaction
 from django.db.models import Q
-from .models import PrivateMessage, PrivateMessageThread
+from django.contrib.auth import get_user_model
+from .models import PrivateMessage, PrivateMessageThread, ThreadParticipant
 from .serializers import PrivateMessageSerializer, PrivateMessageThreadSerializer
+from .services import send_message, mark_thread_read, read_watermarks, get_or_create_direct_thread
+from .history import clamp_limit, messages_before, messages_after, messages_for_user
+from .search import index_message, remove_message_index, search_messages
+from .sharding import locate_message
+from .typing import set_typing, typing_users
+from apps.users.presence import heartbeat, last_seen
 from django.shortcuts import render
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.views import APIView
+
+User = get_user_model()
+
+
+def _seq_param(params, name):
+    """讀取序號查詢參數，未提供時回傳 None，非正整數時回應 400"""
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = -1
+    if value < 0:
+        raise ValidationError({name: 'must be a non-negative integer'})
+    return value
+
+
+def _history_response(thread, params, context):
+    """
+    依序號游標分頁回傳訊息
+    - after_seq: 取得此序號之後的訊息（往新的方向），回應的 next_after_seq 用於繼續往後取
+    - before_seq: 取得此序號之前的訊息（往舊的方向），未提供任何游標時從最新一則往前
+    - 回應：{"results": [...], "has_more": bool, "next_before_seq"/"next_after_seq": ...}
+    """
+    limit = clamp_limit(params.get('limit'))
+    after_seq = _seq_param(params, 'after_seq')
+    if after_seq is not None:
+        messages, has_more = messages_after(thread, after_seq, limit)
+        cursor = {'next_after_seq': messages[-1].seq if messages else after_seq}
+    else:
+        messages, has_more = messages_before(thread, _seq_param(params, 'before_seq'), limit)
+        cursor = {'next_before_seq': messages[0].seq if messages and has_more else None}
+    return Response({
+        'results': PrivateMessageSerializer(messages, many=True, context=context).data,
+        'has_more': has_more,
+        **cursor,
+    })
+
+
+def _direct_thread_response(request):
+    """
+    查找或建立當前用戶與 user_id 之間的一對一聊天室
+    已存在時回應 200，新建立時回應 201
+    """
+    try:
+        other_user = User.objects.get(id=int(request.data.get('user_id')))
+    except (TypeError, ValueError):
+        return Response({"error": "user_id must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+    except User.DoesNotExist:
+        return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+    if other_user.id == request.user.id:
+        return Response({"error": "Cannot start a direct thread with yourself"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    thread, created = get_or_create_direct_thread(request.user, other_user)
+    serializer = PrivateMessageThreadSerializer(thread, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 class PrivateMessageThreadListView(generics.ListCreateAPIView):
     """
     聊天室列表視圖
-    - GET: 取得當前用戶的所有聊天室
-    - POST: 創建新的聊天室
+    - GET: 取得當前用戶的所有聊天室（查詢數固定，與聊天室數量無關）
+    - POST: 創建新的聊天室；帶 user_id 時改為查找或建立與該用戶的一對一聊天室
     """
     serializer_class = PrivateMessageThreadSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return PrivateMessageThread.objects.filter(participants=self.request.user).order_by('-updated_at')
+        return PrivateMessageThread.objects.inbox_for(self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        if request.data.get('user_id') is not None:
+            return _direct_thread_response(request)
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         thread = serializer.save()
@@ -31,21 +104,32 @@ class PrivateMessageThreadListView(generics.ListCreateAPIView):
 
 class PrivateMessageListView(generics.ListCreateAPIView):
     """
-    訊息列表視圖
-    - GET: 取得指定聊天室的所有訊息
+    訊息列表視圖（僅限聊天室參與者）
+    - GET: 以序號游標分頁取得訊息，參數 before_seq / after_seq / limit（預設最新 50 則）
     - POST: 在指定聊天室發送新訊息
     """
     serializer_class = PrivateMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_thread(self):
+        try:
+            return PrivateMessageThread.objects.get(id=self.kwargs.get('thread_id'), participants=self.request.user)
+        except PrivateMessageThread.DoesNotExist:
+            raise NotFound("Thread not found or you're not a participant")
+
     def get_queryset(self):
-        thread_id = self.kwargs.get('thread_id')
-        return PrivateMessage.objects.filter(thread_id=thread_id).order_by('created_at')
+        return PrivateMessage.objects.for_thread(self.get_thread()).order_by('seq')
 
-    def perform_create(self, serializer):
-        thread_id = self.kwargs.get('thread_id')
-        thread = PrivateMessageThread.objects.get(id=thread_id)
-        serializer.save(sender=self.request.user, thread=thread)
+    def list(self, request, *args, **kwargs):
+        thread = self.get_thread()
+        return _history_response(thread, request.query_params, self.get_serializer_context())
+
+    def create(self, request, *args, **kwargs):
+        thread = self.get_thread()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message = send_message(thread, request.user, serializer.validated_data['content'])
+        return Response(self.get_serializer(message).data, status=status.HTTP_201_CREATED)
 
 class PrivateMessageViewSet(viewsets.ModelViewSet):
     """
@@ -57,25 +141,80 @@ class PrivateMessageViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """
-        Filter messages to only those in threads the user is part of
+        Filter messages to only those in threads the user is part of (default shard only; see list / get_object)
         """
-        user = self.request.user
-        return PrivateMessage.objects.filter(thread__participants=user).order_by('created_at')
+        thread_ids = ThreadParticipant.objects.filter(user=self.request.user).values_list('thread_id', flat=True)
+        return PrivateMessage.objects.filter(thread_id__in=list(thread_ids)).order_by('thread_id', 'seq')
+
+    def list(self, request, *args, **kwargs):
+        """
+        List messages in every thread the user is part of, read from each thread's shard,
+        paged by the (thread, seq) cursor
+        - after_thread / after_seq: 取得此聊天室、序號之後的訊息，回應的 next_after_thread / next_after_seq 用於繼續往後取
+        - 回應：{"results": [...], "has_more": bool, "next_after_thread": ..., "next_after_seq": ...}
+        """
+        after_thread = _seq_param(request.query_params, 'after_thread') or 0
+        after_seq = _seq_param(request.query_params, 'after_seq') or 0
+        messages, has_more = messages_for_user(
+            request.user, after_thread, after_seq, clamp_limit(request.query_params.get('limit'))
+        )
+        last = messages[-1] if messages else None
+        return Response({
+            'results': self.get_serializer(messages, many=True).data,
+            'has_more': has_more,
+            'next_after_thread': last.thread_id if last else after_thread,
+            'next_after_seq': last.seq if last else after_seq,
+        })
+
+    def get_object(self):
+        """
+        Look the message up on every shard (message ids are unique across shards) and require membership
+        """
+        message = locate_message(self.kwargs['pk'])
+        if message is None or not ThreadParticipant.objects.filter(
+            thread_id=message.thread_id, user=self.request.user
+        ).exists():
+            raise NotFound("Message not found")
+        self.check_object_permissions(self.request, message)
+        return message
+
+    def perform_create(self, serializer):
+        """
+        Create the message through send_message so the thread's last message and unread counts stay in sync
+        """
+        thread = serializer.validated_data['thread']
+        if not thread.memberships.filter(user=self.request.user).exists():
+            raise PermissionDenied("You're not a participant of this thread")
+        serializer.instance = send_message(thread, self.request.user, serializer.validated_data['content'])
+
+    def perform_update(self, serializer):
+        """
+        Re-index the edited message so search results follow the new content
+        """
+        with transaction.atomic(using=serializer.instance._state.db):
+            index_message(serializer.save())
+
+    def perform_destroy(self, instance):
+        """
+        Remove the message's search terms along with the message
+        """
+        with transaction.atomic(using=instance._state.db):
+            remove_message_index(instance)
+            instance.delete()
     
     @action(detail=False, methods=['get'])
     def threads(self, request):
         """
         Get all message threads for the current user
         """
-        user = request.user
-        threads = PrivateMessageThread.objects.filter(participants=user)
-        serializer = PrivateMessageThreadSerializer(threads, many=True)
+        threads = PrivateMessageThread.objects.inbox_for(request.user)
+        serializer = PrivateMessageThreadSerializer(threads, many=True, context={'request': request})
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def thread_messages(self, request):
         """
-        Get all messages in a specific thread
+        Get messages in a specific thread, paged by sequence number (before_seq / after_seq / limit)
         """
         thread_id = request.query_params.get('thread_id')
         if not thread_id:
@@ -89,9 +228,7 @@ class PrivateMessageViewSet(viewsets.ModelViewSet):
             return Response({"error": "Thread not found or you're not a participant"}, 
                             status=status.HTTP_404_NOT_FOUND)
         
-        messages = PrivateMessage.objects.filter(thread=thread).order_by('created_at')
-        serializer = PrivateMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        return _history_response(thread, request.query_params, self.get_serializer_context())
     
     @action(detail=False, methods=['post'])
     def send_message(self, request):
@@ -112,11 +249,7 @@ class PrivateMessageViewSet(viewsets.ModelViewSet):
             return Response({"error": "Thread not found or you're not a participant"}, 
                             status=status.HTTP_404_NOT_FOUND)
         
-        message = PrivateMessage.objects.create(
-            thread=thread,
-            sender=user,
-            content=content
-        )
+        message = send_message(thread, user, content)
         
         serializer = PrivateMessageSerializer(message)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -124,22 +257,155 @@ class PrivateMessageViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """
-        Mark a message as read
+        Mark the thread as read up to this message (advances the caller's read watermark)
         """
-        try:
-            message = PrivateMessage.objects.get(id=pk)
-        except PrivateMessage.DoesNotExist:
+        message = locate_message(pk)
+        if message is None:
             return Response({"error": "Message not found"}, 
                             status=status.HTTP_404_NOT_FOUND)
         
         user = request.user
-        if user not in message.thread.participants.all():
-            return Response({"error": "You don't have permission to access this message"}, 
-                            status=status.HTTP_403_FORBIDDEN)
-        
-        if message.sender != user:
-            message.is_read = True
-            message.save()
+        if not mark_thread_read(message.thread_id, user, up_to_seq=message.seq):
+            if not ThreadParticipant.objects.filter(thread_id=message.thread_id, user=user).exists():
+                return Response({"error": "You don't have permission to access this message"}, 
+                                status=status.HTTP_403_FORBIDDEN)
         
         serializer = PrivateMessageSerializer(message)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+class ThreadReadView(APIView):
+    """
+    聊天室已讀視圖
+    - POST: 將當前用戶的已讀水位推進到 up_to_seq（訊息序號，未提供時為最後一則訊息），
+            一次呼叫取代逐則標記已讀，只執行一個 UPDATE
+    - 回應：{"thread": id, "last_read_seq": ..., "unread_count": ...}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, thread_id):
+        up_to = _seq_param(request.data, 'up_to_seq')
+
+        mark_thread_read(thread_id, request.user, up_to_seq=up_to)
+
+        membership = ThreadParticipant.objects.filter(
+            thread_id=thread_id, user=request.user
+        ).values('last_read_seq', 'unread_count').first()
+        if membership is None:
+            return Response({"error": "Thread not found or you're not a participant"}, 
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({'thread': thread_id, **membership})
+
+
+class ThreadReceiptsView(APIView):
+    """
+    聊天室已讀回條視圖
+    - GET: 取得所有參與者的已讀水位，前端據此判斷每則訊息被誰讀過
+    - 回應：[{"user": id, "last_read_seq": ...}, ...]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, thread_id):
+        watermarks = read_watermarks(thread_id)
+        if request.user.id not in watermarks:
+            return Response({"error": "Thread not found or you're not a participant"}, 
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response([
+            {'user': user_id, 'last_read_seq': watermark}
+            for user_id, watermark in watermarks.items()
+        ])
+
+
+class ThreadSyncView(APIView):
+    """
+    聊天室增量同步視圖
+    - GET: 客戶端帶上已看過的最後序號 since_seq，只回傳之後的新訊息與目前的已讀水位，
+           重新開啟聊天室時不必重新下載整串訊息；has_more 為 true 時以 last_synced_seq 繼續同步
+    - 同步同時作為上線心跳，並附上其他參與者的上線狀態與輸入中提示（只讀快取，不寫資料庫）
+    - 回應：{"messages": [...], "has_more": bool, "last_synced_seq": ..., "last_seq": ..., "receipts": [...],
+            "online": [user_id, ...], "typing": [user_id, ...]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, thread_id):
+        since_seq = _seq_param(request.query_params, 'since_seq') or 0
+        thread = PrivateMessageThread.objects.filter(
+            id=thread_id, participants=request.user
+        ).only('id', 'last_seq', 'archived_through_seq', 'message_shard').first()
+        if thread is None:
+            return Response({"error": "Thread not found or you're not a participant"}, 
+                            status=status.HTTP_404_NOT_FOUND)
+
+        heartbeat(request.user.id)
+        watermarks = read_watermarks(thread.id)
+        others = [user_id for user_id in watermarks if user_id != request.user.id]
+        if since_seq >= thread.last_seq:
+            messages, has_more = [], False
+        else:
+            messages, has_more = messages_after(thread, since_seq, clamp_limit(request.query_params.get('limit')))
+        context = {'request': request, 'read_watermarks': {thread.id: watermarks}}
+        return Response({
+            'messages': PrivateMessageSerializer(messages, many=True, context=context).data,
+            'has_more': has_more,
+            'last_synced_seq': messages[-1].seq if messages else since_seq,
+            'last_seq': thread.last_seq,
+            'receipts': [
+                {'user': user_id, 'last_read_seq': watermark}
+                for user_id, watermark in watermarks.items()
+            ],
+            'online': list(last_seen(others)),
+            'typing': typing_users(thread.id, others),
+        })
+
+
+class ThreadTypingView(APIView):
+    """
+    輸入中提示視圖
+    - POST: 帶 typing（預設 true），標記或清除當前用戶在聊天室的輸入中狀態；
+            客戶端輸入時每隔數秒重送一次，停止後由 TTL 自動過期；狀態只寫快取
+    - 回應：{"thread": id, "typing": bool}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, thread_id):
+        if not ThreadParticipant.objects.filter(thread_id=thread_id, user=request.user).exists():
+            return Response({"error": "Thread not found or you're not a participant"}, 
+                            status=status.HTTP_404_NOT_FOUND)
+        typing = serializers.BooleanField().to_internal_value(request.data.get('typing', True))
+        set_typing(thread_id, request.user.id, typing)
+        return Response({'thread': thread_id, 'typing': typing})
+
+
+class DirectThreadView(APIView):
+    """
+    一對一聊天室視圖
+    - POST: 帶 user_id，查找或建立與該用戶的一對一聊天室（同一對用戶永遠取得同一個聊天室）
+    - 回應：聊天室資料，新建立時狀態碼為 201
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        return _direct_thread_response(request)
+
+
+class MessageSearchView(APIView):
+    """
+    私訊搜尋視圖
+    - GET: 參數 q（查詢字串）、limit（預設 20）、before（上一頁回傳的 next_before），
+           只搜尋當前用戶參與的聊天室，支援中英文混合內容
+    - 回應：{"results": [{"message_id", "thread", "seq", "sender", "created_at", "snippet", "highlights"}],
+             "next_before": ...}，highlights 為摘要中命中位置的 [start, end] 列表
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(clamp_limit(request.query_params.get('limit') or 20), 50)
+        before = _seq_param(request.query_params, 'before')
+
+        results, next_before = search_messages(request.user, query, limit=limit, before_message_id=before)
+        for result in results:
+            result['created_at'] = serializers.DateTimeField().to_representation(result['created_at'])
+        return Response({'results': results, 'next_before': next_before})
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RecommendationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.recommendations'
+
+    def ready(self):
+        # 註冊追蹤關係變動事件的信號
+        from . import signals  # noqa: F401
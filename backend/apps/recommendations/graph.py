@@ -0,0 +1,208 @@
+# apps/recommendations/graph.py
+# 追蹤圖模組，以 CSR 陣列在單一背景行程的記憶體中保存所有已接受的追蹤關係，計算「可能認識的人」
+# 功能：ids（排序後的用戶 id）、indptr / indices（每位用戶追蹤對象的起訖位置與對象索引，int32）組成壓縮鄰接表，
+#       數百萬條邊只佔數十 MB；追蹤 / 取消追蹤事件先記在差異表，累積到一定數量再重建 CSR；
+#       朋友的朋友以向量化方式收集後計數，共同連結數最多者為推薦
+# 資料來源：Follow（status='accepted'）、FollowEvent
+# 資料流向：PeopleSuggestion，由 people_suggestions 管理指令常駐或定期呼叫
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.users.models import Follow
+from .models import FollowEvent, PeopleSuggestion
+
+
+def _csr(edges):
+    """由 (追蹤者 id, 被追蹤者 id) 陣列建立 (ids, indptr, indices)"""
+    ids = np.unique(edges)
+    sources = np.searchsorted(ids, edges[:, 0])
+    targets = np.searchsorted(ids, edges[:, 1]).astype(np.int32)
+    order = np.argsort(sources, kind='stable')
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(ids)), out=indptr[1:])
+    return ids, indptr, targets[order]
+
+
+class FollowGraph:
+    """
+    已接受追蹤關係的記憶體索引
+    CSR 為上次重建時的快照，之後的變動記在 _added / _removed（以用戶 id 為鍵），
+    差異超過 max_delta 條時 compact() 重建
+    """
+
+    def __init__(self, edges, max_delta=100000):
+        self.ids, self.indptr, self.indices = _csr(np.asarray(edges, dtype=np.int64).reshape(-1, 2))
+        self.max_delta = max_delta
+        self._added = {}
+        self._removed = {}
+        self._delta = 0
+
+    @classmethod
+    def from_database(cls, chunk_size=100000, **kwargs):
+        """從資料庫載入所有已接受的追蹤關係（以迭代器分批讀取，只保留整數陣列）"""
+        pairs = Follow.objects.filter(status='accepted').values_list('follower_id', 'following_id')
+        flat = np.fromiter(
+            (user_id for pair in pairs.iterator(chunk_size=chunk_size) for user_id in pair), dtype=np.int64
+        )
+        return cls(flat.reshape(-1, 2), **kwargs)
+
+    @property
+    def edge_count(self):
+        return len(self.indices) + self._delta
+
+    def _snapshot_following(self, user_id):
+        position = np.searchsorted(self.ids, user_id)
+        if position >= len(self.ids) or self.ids[position] != user_id:
+            return np.empty(0, dtype=np.int64)
+        return self.ids[self.indices[self.indptr[position]:self.indptr[position + 1]]]
+
+    def _snapshot_targets(self, user_ids):
+        """多位用戶在 CSR 快照中的追蹤對象（串接成一個 id 陣列，不去重）"""
+        positions = np.searchsorted(self.ids, user_ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == user_ids[found]
+        positions = positions[found]
+        starts, ends = self.indptr[positions], self.indptr[positions + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return np.empty(0, dtype=np.int64)
+        # 每段的起點重複 length 次，再加上段內的位移
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.ids[self.indices[np.repeat(starts, lengths) + offsets]]
+
+    def following(self, user_id):
+        """用戶目前追蹤的對象 id 陣列"""
+        following = self._snapshot_following(user_id)
+        removed = self._removed.get(user_id)
+        if removed:
+            following = following[~np.isin(following, list(removed))]
+        added = self._added.get(user_id)
+        if added:
+            following = np.union1d(following, list(added))
+        return following
+
+    def add_edge(self, follower_id, following_id):
+        self._removed.get(follower_id, set()).discard(following_id)
+        self._added.setdefault(follower_id, set()).add(following_id)
+        self._delta += 1
+        self._maybe_compact()
+
+    def remove_edge(self, follower_id, following_id):
+        self._added.get(follower_id, set()).discard(following_id)
+        self._removed.setdefault(follower_id, set()).add(following_id)
+        self._delta += 1
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._delta >= self.max_delta:
+            self.compact()
+
+    def compact(self):
+        """把差異表併入 CSR 快照"""
+        sources = np.repeat(self.ids, np.diff(self.indptr))
+        edges = np.column_stack([sources, self.ids[self.indices]])
+        touched = set(self._added) | set(self._removed)
+        if touched:
+            edges = edges[~np.isin(edges[:, 0], list(touched))]
+            extra = [(user_id, target) for user_id in touched for target in self.following(user_id)]
+            edges = np.vstack([edges, np.asarray(extra, dtype=np.int64).reshape(-1, 2)])
+        self.ids, self.indptr, self.indices = _csr(edges)
+        self._added, self._removed, self._delta = {}, {}, 0
+
+    def suggestions(self, user_id, limit, max_following=5000):
+        """
+        可能認識的人：我追蹤的人所追蹤、而我尚未追蹤的用戶，依共同連結數排序，回傳 [(用戶 id, 共同連結數)]
+        追蹤對象超過 max_following 時只取其中一部分計算，避免單一用戶的計算量失控
+        """
+        following = self.following(user_id)[:max_following]
+        if not len(following):
+            return []
+        # 沒有差異的追蹤對象直接從 CSR 一次取出所有鄰居，有差異的逐一合併
+        changed = np.isin(following, list(set(self._added) | set(self._removed)))
+        candidates = np.concatenate(
+            [self._snapshot_targets(following[~changed])]
+            + [self.following(followee) for followee in following[changed].tolist()]
+        )
+        if not len(candidates):
+            return []
+        candidates, counts = np.unique(candidates, return_counts=True)
+        keep = (candidates != user_id) & ~np.isin(candidates, following)
+        candidates, counts = candidates[keep], counts[keep]
+        # 共同連結數由多到少，相同時 id 小者在前，結果穩定
+        order = np.lexsort((candidates, -counts))[:limit]
+        return list(zip(candidates[order].tolist(), counts[order].tolist()))
+
+
+def refresh_suggestions(graph, user_ids, limit=None, batch_size=1000):
+    """重新計算並取代指定用戶的可能認識的人，回傳寫入的筆數"""
+    limit = limit or getattr(settings, 'RECOMMENDATION_TOP_K', 20)
+    user_ids = list(user_ids)
+    written = 0
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        rows = [
+            PeopleSuggestion(user_id=user_id, suggested_id=suggested_id, mutual_count=mutual_count, rank=rank)
+            for user_id in chunk
+            for rank, (suggested_id, mutual_count) in enumerate(graph.suggestions(user_id, limit))
+        ]
+        with transaction.atomic():
+            PeopleSuggestion.objects.filter(user_id__in=chunk).delete()
+            PeopleSuggestion.objects.bulk_create(rows)
+        written += len(rows)
+    return written
+
+
+def prune_suggestions(user_ids, batch_size=1000):
+    """全量重建後刪除不在 user_ids 內的用戶的推薦（已取消所有追蹤的用戶），回傳刪除的筆數"""
+    keep = set(user_ids)
+    stale = [
+        user_id for user_id in PeopleSuggestion.objects.values_list('user_id', flat=True).distinct().order_by('user_id')
+        if user_id not in keep
+    ]
+    deleted = 0
+    for start in range(0, len(stale), batch_size):
+        deleted += PeopleSuggestion.objects.filter(user_id__in=stale[start:start + batch_size]).delete()[0]
+    return deleted
+
+
+def settled_before():
+    """
+    事件 id 在交易提交前分配，較大 id 可能比較小 id 先提交；只讀取建立超過 FOLLOW_EVENT_SETTLE_SECONDS 的事件，
+    此時更早建立（id 較小）的事件所屬交易都已提交或回滾，依 id 遞增的游標不會跳過事件
+    """
+    return timezone.now() - timedelta(seconds=getattr(settings, 'FOLLOW_EVENT_SETTLE_SECONDS', 30))
+
+
+def settled_event_cursor():
+    """已穩定（所有更早的交易都已結束）的最後一個事件 id，全量載入追蹤圖前記下，之後的事件重新套用"""
+    return FollowEvent.objects.filter(created_at__lte=settled_before()).aggregate(last=Max('id'))['last'] or 0
+
+
+def apply_follow_events(graph, after_id, limit=1000, fanout=1000):
+    """
+    依序套用 after_id 之後、已穩定的追蹤事件，回傳 (最後處理的事件 id, 需要重新計算的用戶 id 集合)
+    A 追蹤 / 取消追蹤 B 會改變 A 的推薦，也會改變追蹤 A 的人的推薦（透過 A 多了或少了 B）；
+    後者最多取 fanout 位，其餘留給定期的全量重建
+    """
+    events = list(
+        FollowEvent.objects.filter(id__gt=after_id, created_at__lte=settled_before()).order_by('id')[:limit]
+    )
+    affected = set()
+    for event in events:
+        if event.accepted:
+            graph.add_edge(event.follower_id, event.following_id)
+        else:
+            graph.remove_edge(event.follower_id, event.following_id)
+        affected.add(event.follower_id)
+    if affected:
+        affected.update(
+            Follow.objects.filter(following_id__in=affected, status='accepted')
+            .values_list('follower_id', flat=True)[:fanout]
+        )
+    return (events[-1].id if events else after_id), affected
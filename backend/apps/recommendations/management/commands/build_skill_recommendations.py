@@ -0,0 +1,25 @@
+# build_skill_recommendations.py - 技能推薦批次指令
+# 功能：以 NumPy 重新計算相似作品集與技能相近的工程師，整批取代預先計算的鄰居列表
+# 用法：python manage.py build_skill_recommendations --top-k 20
+#       建議以排程每日於離峰時段執行；--only portfolios / users 只計算其中一種
+
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.skills import build_similar_portfolios, build_similar_users
+
+
+class Command(BaseCommand):
+    help = '重新計算依技能相似度的作品集與工程師推薦'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None, help='每個來源保留的鄰居數（預設 RECOMMENDATION_TOP_K）')
+        parser.add_argument('--only', choices=['portfolios', 'users'], default=None, help='只計算其中一種推薦')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批寫入筆數')
+
+    def handle(self, *args, **options):
+        if options['only'] in (None, 'portfolios'):
+            count = build_similar_portfolios(k=options['top_k'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'已寫入 {count} 筆相似作品集'))
+        if options['only'] in (None, 'users'):
+            count = build_similar_users(k=options['top_k'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'已寫入 {count} 筆技能相近的工程師'))
@@ -0,0 +1,46 @@
+# people_suggestions.py - 可能認識的人背景指令
+# 功能：將所有已接受的追蹤關係載入記憶體中的 CSR 追蹤圖，為每位有追蹤對象的用戶計算可能認識的人，
+#       並清除已沒有追蹤對象的用戶留下的推薦；
+#       --loop 時常駐，依序消化 FollowEvent 增量更新追蹤圖，只重新計算受影響的用戶
+# 用法：python manage.py people_suggestions --loop  （常駐執行，單一 worker）
+#       python manage.py people_suggestions         （全量重建後結束，適合排程）
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from apps.recommendations.graph import (
+    FollowGraph, apply_follow_events, prune_suggestions, refresh_suggestions, settled_event_cursor,
+)
+from apps.recommendations.models import FollowEvent
+
+
+class Command(BaseCommand):
+    help = '以追蹤圖計算可能認識的人'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='全量重建後持續消化追蹤事件')
+        parser.add_argument('--interval', type=float, default=2.0, help='沒有新事件時的等待秒數')
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批處理的事件數 / 寫入的用戶數')
+
+    def handle(self, *args, **options):
+        # 先記下已穩定的事件位置再載入追蹤圖，之後的變動會在之後重新套用（加入 / 移除邊皆可重複套用）
+        cursor = settled_event_cursor()
+        graph = FollowGraph.from_database()
+        users = graph.ids[np.diff(graph.indptr) > 0].tolist()
+        written = refresh_suggestions(graph, users, batch_size=options['batch_size'])
+        pruned = prune_suggestions(users, batch_size=options['batch_size'])
+        FollowEvent.objects.filter(id__lte=cursor).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'追蹤圖：{len(graph.ids)} 位用戶、{graph.edge_count} 條邊；已為 {len(users)} 位用戶寫入 {written} 筆推薦，清除 {pruned} 筆過期推薦'
+        ))
+
+        while options['loop']:
+            cursor, affected = apply_follow_events(graph, cursor, limit=options['batch_size'])
+            if affected:
+                refresh_suggestions(graph, affected, batch_size=options['batch_size'])
+                FollowEvent.objects.filter(id__lte=cursor).delete()
+                self.stdout.write(f'已更新 {len(affected)} 位用戶的推薦（事件 {cursor}）')
+            else:
+                time.sleep(options['interval'])
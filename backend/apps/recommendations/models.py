@@ -0,0 +1,74 @@
+# apps/recommendations/models.py
+# 推薦模型檔案，保存批次計算好的鄰居列表
+# 功能：相似作品集、技能相近的工程師、可能認識的人，每個來源最多 RECOMMENDATION_TOP_K 筆，依 rank 排序；
+#       追蹤關係變動事件（供可能認識的人增量更新）
+# 資料來源：skills.py 的批次計算（build_skill_recommendations 管理指令）、
+#           graph.py 的追蹤圖計算（people_suggestions 管理指令）、signals.py 記錄的追蹤事件
+# 資料流向：views.py 以 (來源, rank) 唯一索引一次讀出
+
+from django.conf import settings
+from django.db import models
+
+
+class SimilarPortfolio(models.Model):
+    """相似作品集（依使用技能的餘弦相似度）"""
+    portfolio = models.ForeignKey('portfolios.Portfolio', related_name='+', on_delete=models.CASCADE)
+    neighbor = models.ForeignKey('portfolios.Portfolio', related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()  # 餘弦相似度
+    rank = models.PositiveSmallIntegerField()  # 排名（0 為最相似）
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['portfolio', 'rank'], name='recommend_portfolio_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.portfolio_id} ~ {self.neighbor_id} ({self.score:.3f})"
+
+
+class SimilarUser(models.Model):
+    """技能相近的工程師（依用戶技能的餘弦相似度）"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    neighbor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    score = models.FloatField()  # 餘弦相似度
+    rank = models.PositiveSmallIntegerField()  # 排名（0 為最相似）
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='recommend_user_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ~ {self.neighbor_id} ({self.score:.3f})"
+
+
+class PeopleSuggestion(models.Model):
+    """可能認識的人（我追蹤的人也在追蹤的用戶，依共同連結數排序）"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    suggested = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    mutual_count = models.PositiveIntegerField()  # 共同連結數：我追蹤的人之中有幾位追蹤此用戶
+    rank = models.PositiveSmallIntegerField()  # 排名（0 為最推薦）
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'rank'], name='recommend_people_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.suggested_id} ({self.mutual_count})"
+
+
+class FollowEvent(models.Model):
+    """
+    追蹤關係變動事件，由 signals.py 在追蹤變動的同一交易中寫入，people_suggestions 背景指令依 id 順序消化
+    （只讀取建立超過 FOLLOW_EVENT_SETTLE_SECONDS 的事件，較小 id 的交易較晚提交時不會被跳過）
+    accepted: 變動後是否為已接受的追蹤（取消追蹤、刪除、拒絕皆為 False）
+    不設外鍵，用戶刪除後事件仍可用於移除圖中的邊
+    """
+    follower_id = models.BigIntegerField()
+    following_id = models.BigIntegerField()
+    accepted = models.BooleanField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.follower_id} -> {self.following_id} ({'follow' if self.accepted else 'unfollow'})"
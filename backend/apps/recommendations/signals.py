@@ -0,0 +1,15 @@
+# apps/recommendations/signals.py
+# 推薦信號檔案，已接受的追蹤關係建立或移除時在同一交易中記錄 FollowEvent，供 people_suggestions 背景指令增量更新追蹤圖
+# 事件與追蹤變動一起提交或回滾；事件 id 在提交前分配，背景指令只讀取建立超過 FOLLOW_EVENT_SETTLE_SECONDS 的事件
+# 資料來源：users.follows 追蹤狀態機發送的 follow_changed
+# 資料流向：FollowEvent
+
+from django.dispatch import receiver
+
+from apps.users.follows import follow_changed
+from .models import FollowEvent
+
+
+@receiver(follow_changed, dispatch_uid='recommendations_follow_changed')
+def record_follow_event(sender, follower_id, following_id, accepted, **kwargs):
+    FollowEvent.objects.create(follower_id=follower_id, following_id=following_id, accepted=accepted)
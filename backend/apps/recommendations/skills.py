@@ -0,0 +1,100 @@
+# apps/recommendations/skills.py
+# 技能向量推薦模組，以 NumPy 向量化計算作品集與用戶之間的技能餘弦相似度
+# 功能：由多對多中介表建立「實體 × 技能」的 0/1 矩陣（只包含實際使用到的技能欄位），列向量正規化後
+#       分批做矩陣乘法取得相似度，每列以 argpartition 取前 K 名，結果整批取代 SimilarPortfolio / SimilarUser
+# 資料來源：Portfolio.skills_used、User.skills 的中介表
+# 資料流向：SimilarPortfolio、SimilarUser，由 build_skill_recommendations 管理指令定期呼叫
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from apps.portfolios.models import Portfolio
+from .models import SimilarPortfolio, SimilarUser
+
+# 每批計算的列數：每批的相似度矩陣為 CHUNK_ROWS × 實體數個 float32
+CHUNK_ROWS = 256
+
+
+def skill_matrix(pairs):
+    """
+    由 (實體 id, 技能 id) 配對建立 0/1 矩陣，回傳 (實體 id 陣列, 矩陣)
+    列為有技能的實體（依 id 排序），欄為有被使用的技能
+    """
+    pairs = np.asarray(list(pairs), dtype=np.int64).reshape(-1, 2)
+    entity_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    _, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = np.zeros((len(entity_ids), cols.max() + 1 if len(cols) else 0), dtype=np.float32)
+    matrix[rows, cols] = 1.0
+    return entity_ids, matrix
+
+
+def top_k_cosine(matrix, k, chunk_rows=CHUNK_ROWS):
+    """
+    每列與其他列的餘弦相似度前 k 名，回傳 (neighbors, scores)，形狀皆為 (列數, k)
+    相似度不大於 0 或不足 k 名的位置 neighbors 為 -1；分批計算，記憶體用量與 chunk_rows × 列數成正比
+    """
+    count = matrix.shape[0]
+    k = min(k, max(count - 1, 0))
+    neighbors = np.full((count, k), -1, dtype=np.int64)
+    scores = np.zeros((count, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    normalized = matrix / np.where(norms == 0, 1, norms)
+    for start in range(0, count, chunk_rows):
+        stop = min(start + chunk_rows, count)
+        similarity = normalized[start:stop] @ normalized.T
+        # 排除自己
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -1
+        top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        neighbors[start:stop] = np.where(top_scores > 0, top, -1)
+        scores[start:stop] = np.where(top_scores > 0, top_scores, 0)
+    return neighbors, scores
+
+
+def _replace(model, source_field, entity_ids, neighbors, scores, batch_size):
+    """在同一個交易中以新的鄰居列表取代舊資料，讀取端在提交前看到的仍是完整的舊列表"""
+    rows = []
+    with transaction.atomic():
+        model.objects.all().delete()
+        for source, (row_neighbors, row_scores) in zip(entity_ids.tolist(), zip(neighbors, scores)):
+            rank = 0
+            for neighbor, score in zip(row_neighbors.tolist(), row_scores.tolist()):
+                if neighbor < 0:
+                    continue
+                rows.append(model(**{
+                    f'{source_field}_id': source, 'neighbor_id': int(entity_ids[neighbor]),
+                    'score': score, 'rank': rank,
+                }))
+                rank += 1
+            if len(rows) >= batch_size:
+                model.objects.bulk_create(rows)
+                rows = []
+        model.objects.bulk_create(rows)
+    return model.objects.count()
+
+
+def build_similar_portfolios(k=None, batch_size=1000):
+    """重新計算所有作品集的相似作品集，回傳寫入的筆數"""
+    k = k or getattr(settings, 'RECOMMENDATION_TOP_K', 20)
+    pairs = Portfolio.skills_used.through.objects.values_list('portfolio_id', 'skill_id').iterator()
+    entity_ids, matrix = skill_matrix(pairs)
+    neighbors, scores = top_k_cosine(matrix, k)
+    return _replace(SimilarPortfolio, 'portfolio', entity_ids, neighbors, scores, batch_size)
+
+
+def build_similar_users(k=None, batch_size=1000):
+    """重新計算所有（啟用中）用戶技能相近的工程師，回傳寫入的筆數"""
+    k = k or getattr(settings, 'RECOMMENDATION_TOP_K', 20)
+    User = get_user_model()
+    pairs = User.skills.through.objects.filter(user__is_active=True).values_list('user_id', 'skill_id').iterator()
+    entity_ids, matrix = skill_matrix(pairs)
+    neighbors, scores = top_k_cosine(matrix, k)
+    return _replace(SimilarUser, 'user', entity_ids, neighbors, scores, batch_size)
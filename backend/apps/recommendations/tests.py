@@ -0,0 +1,134 @@
+# tests.py - 撰寫 recommendations app 的單元測試
+# 可在此檔案撰寫 models、views、API 等自動化測試，確保功能正確
+
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from apps.users.models import Follow, User
+
+from .graph import FollowGraph, prune_suggestions, refresh_suggestions
+from .models import PeopleSuggestion
+
+EDGES = [(1, 2), (1, 3), (2, 4), (2, 5), (3, 4), (3, 6), (4, 1), (5, 6), (6, 2)]
+
+
+class FollowGraphTest(SimpleTestCase):
+    """CSR 快照加差異表與從頭建立的追蹤圖結果一致"""
+
+    def test_csr_layout(self):
+        graph = FollowGraph(EDGES)
+        self.assertEqual(graph.ids.tolist(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(graph.edge_count, len(EDGES))
+        self.assertEqual(graph.following(1).tolist(), [2, 3])
+        self.assertEqual(graph.following(99).tolist(), [])
+
+    def test_snapshot_targets_concatenates_neighbours(self):
+        graph = FollowGraph(EDGES)
+        targets = graph._snapshot_targets(np.array([2, 3, 99, 5], dtype=np.int64))
+        self.assertEqual(sorted(targets.tolist()), [4, 4, 5, 6, 6])
+        self.assertEqual(graph._snapshot_targets(np.array([99], dtype=np.int64)).tolist(), [])
+
+    def test_delta_overrides_snapshot(self):
+        graph = FollowGraph(EDGES)
+        graph.add_edge(1, 5)
+        graph.remove_edge(1, 2)
+        self.assertEqual(graph.following(1).tolist(), [3, 5])
+        # 同一條邊先移除再加入，以最後一次為準
+        graph.remove_edge(2, 4)
+        graph.add_edge(2, 4)
+        self.assertEqual(graph.following(2).tolist(), [4, 5])
+        graph.add_edge(7, 1)
+        self.assertEqual(graph.following(7).tolist(), [1])
+
+    def test_compact_matches_rebuild(self):
+        graph = FollowGraph(EDGES)
+        changes = [('add', 1, 5), ('remove', 1, 2), ('remove', 5, 6), ('add', 7, 1), ('add', 6, 3), ('remove', 6, 3)]
+        edges = set(EDGES)
+        for action, follower_id, following_id in changes:
+            if action == 'add':
+                graph.add_edge(follower_id, following_id)
+                edges.add((follower_id, following_id))
+            else:
+                graph.remove_edge(follower_id, following_id)
+                edges.discard((follower_id, following_id))
+        users = range(1, 8)
+        before = {user_id: graph.following(user_id).tolist() for user_id in users}
+        graph.compact()
+        rebuilt = FollowGraph(sorted(edges))
+        self.assertEqual(graph._delta, 0)
+        self.assertEqual(graph.edge_count, len(edges))
+        self.assertEqual(graph.ids.tolist(), rebuilt.ids.tolist())
+        self.assertEqual(graph.indptr.tolist(), rebuilt.indptr.tolist())
+        self.assertEqual({user_id: graph.following(user_id).tolist() for user_id in users}, before)
+        self.assertEqual({user_id: rebuilt.following(user_id).tolist() for user_id in users}, before)
+
+    def test_compact_when_delta_exceeds_limit(self):
+        graph = FollowGraph(EDGES, max_delta=2)
+        graph.add_edge(1, 5)
+        self.assertEqual(graph._delta, 1)
+        graph.remove_edge(1, 2)
+        self.assertEqual((graph._delta, graph._added, graph._removed), (0, {}, {}))
+        self.assertEqual(graph.following(1).tolist(), [3, 5])
+
+    def test_suggestions_rank_by_mutual_count(self):
+        graph = FollowGraph(EDGES)
+        # 1 追蹤 2、3；2、3 都追蹤 4，3 追蹤 6，2 追蹤 5
+        self.assertEqual(graph.suggestions(1, limit=10), [(4, 2), (5, 1), (6, 1)])
+        self.assertEqual(graph.suggestions(1, limit=1), [(4, 2)])
+
+    def test_suggestions_exclude_self_and_followed(self):
+        graph = FollowGraph(EDGES)
+        graph.add_edge(1, 4)
+        suggested = [user_id for user_id, _ in graph.suggestions(1, limit=10)]
+        self.assertNotIn(1, suggested)
+        self.assertFalse(set(suggested) & set(graph.following(1).tolist()))
+        self.assertEqual(suggested, [5, 6])
+
+    def test_suggestions_follow_delta_of_followees(self):
+        graph = FollowGraph(EDGES)
+        graph.remove_edge(3, 4)
+        graph.add_edge(2, 6)
+        self.assertEqual(graph.suggestions(1, limit=10), [(6, 2), (4, 1), (5, 1)])
+        self.assertEqual(graph.suggestions(99, limit=10), [])
+
+
+class SuggestionRebuildTest(TestCase):
+    """全量重建寫入推薦，並清除已沒有追蹤對象的用戶留下的推薦"""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(f'u{n}@example.com', f'u{n}', 'pw') for n in range(4)]
+        first, second, third, fourth = self.users
+        for follower, following in ((first, second), (second, third), (second, fourth), (third, fourth)):
+            Follow.objects.create(follower=follower, following=following, status='accepted')
+
+    def suggested(self, user):
+        return list(PeopleSuggestion.objects.filter(user=user).order_by('rank').values_list('suggested_id', flat=True))
+
+    def test_refresh_replaces_rows(self):
+        first, second, third, fourth = self.users
+        graph = FollowGraph.from_database()
+        self.assertEqual(refresh_suggestions(graph, [first.pk, second.pk]), 2)
+        self.assertEqual(self.suggested(first), [third.pk, fourth.pk])
+        graph.add_edge(first.pk, third.pk)
+        refresh_suggestions(graph, [first.pk])
+        self.assertEqual(self.suggested(first), [fourth.pk])
+
+    def test_full_rebuild_prunes_users_without_follows(self):
+        first, second, third, fourth = self.users
+        call_command('people_suggestions', stdout=StringIO())
+        self.assertEqual(self.suggested(first), [third.pk, fourth.pk])
+        Follow.objects.filter(follower=first).delete()
+        call_command('people_suggestions', stdout=StringIO())
+        self.assertEqual(self.suggested(first), [])
+        self.assertEqual(self.suggested(second), [])
+        self.assertEqual(self.suggested(third), [])
+
+    def test_prune_keeps_listed_users(self):
+        first, second, third, fourth = self.users
+        PeopleSuggestion.objects.create(user=first, suggested=third, mutual_count=1, rank=0)
+        PeopleSuggestion.objects.create(user=fourth, suggested=first, mutual_count=1, rank=0)
+        self.assertEqual(prune_suggestions([first.pk], batch_size=1), 1)
+        self.assertEqual(list(PeopleSuggestion.objects.values_list('user_id', flat=True)), [first.pk])
@@ -0,0 +1,17 @@
+# apps/recommendations/urls.py
+# 推薦路由檔案
+# 功能：將前端 API 請求導向對應的視圖處理
+# 資料來源：前端發送的 HTTP 請求
+# 資料流向：對應 views.py 的 SimilarPortfoliosView、SimilarPeopleView、PeopleSuggestionsView
+
+from django.urls import path
+from .views import SimilarPortfoliosView, SimilarPeopleView, PeopleSuggestionsView
+
+urlpatterns = [
+    # 相似作品集，對應 SimilarPortfoliosView
+    path('portfolios/<int:portfolio_id>/similar/', SimilarPortfoliosView.as_view(), name='similar-portfolios'),
+    # 技能相近的工程師，對應 SimilarPeopleView
+    path('people/similar/', SimilarPeopleView.as_view(), name='similar-people'),
+    # 可能認識的人，對應 PeopleSuggestionsView
+    path('people/suggested/', PeopleSuggestionsView.as_view(), name='people-suggestions'),
+]
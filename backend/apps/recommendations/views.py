@@ -0,0 +1,80 @@
+# apps/recommendations/views.py
+# 推薦視圖檔案，讀取預先計算的鄰居列表
+# 功能：相似作品集、技能相近的工程師、可能認識的人；每個請求以 (來源, rank) 唯一索引一次讀出，鄰居資料以 join 載入
+# 資料來源：SimilarPortfolio、SimilarUser、PeopleSuggestion
+# 資料流向：前端作品集詳情頁與探索頁
+
+from django.db.models import Exists, OuterRef
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.portfolios.serializers import PortfolioMinimalSerializer
+from apps.users.serializers import UserMinimalSerializer
+from apps.users.models import Follow
+from .models import PeopleSuggestion, SimilarPortfolio, SimilarUser
+
+
+class SimilarPortfoliosView(APIView):
+    """
+    相似作品集視圖
+    - GET: 與指定作品集使用技能最相近的作品集（依相似度排序）
+    - 回應：[{"score": ..., "portfolio": {...}}]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, portfolio_id):
+        neighbors = (
+            SimilarPortfolio.objects.filter(portfolio_id=portfolio_id)
+            .select_related('neighbor__user').order_by('rank')
+        )
+        return Response([
+            {'score': row.score, 'portfolio': PortfolioMinimalSerializer(row.neighbor, context={'request': request}).data}
+            for row in neighbors
+        ])
+
+
+class SimilarPeopleView(APIView):
+    """
+    技能相近的工程師視圖
+    - GET: 與當前用戶（或 user_id 指定的用戶）技能最相近的工程師（依相似度排序）
+    - 回應：[{"score": ..., "user": {...}}]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user_id = request.query_params.get('user_id') or request.user.id
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return Response({'detail': 'user_id 必須是整數'}, status=400)
+        neighbors = (
+            SimilarUser.objects.filter(user_id=user_id, neighbor__is_active=True)
+            .select_related('neighbor').order_by('rank')
+        )
+        return Response([
+            {'score': row.score, 'user': UserMinimalSerializer(row.neighbor, context={'request': request}).data}
+            for row in neighbors
+        ])
+
+
+class PeopleSuggestionsView(APIView):
+    """
+    可能認識的人視圖
+    - GET: 當前用戶追蹤的人也在追蹤的用戶，依共同連結數排序；
+           背景指令更新前已追蹤的用戶在同一個查詢中排除
+    - 回應：[{"mutual_count": ..., "user": {...}}]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        already_following = Follow.objects.filter(follower=request.user, following=OuterRef('suggested_id'))
+        suggestions = (
+            PeopleSuggestion.objects.filter(user=request.user, suggested__is_active=True)
+            .exclude(Exists(already_following))
+            .select_related('suggested').order_by('rank')
+        )
+        return Response([
+            {'mutual_count': row.mutual_count, 'user': UserMinimalSerializer(row.suggested, context={'request': request}).data}
+            for row in suggestions
+        ])
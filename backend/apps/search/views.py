@@ -8,6 +8,8 @@ from apps.users.models import User  # 引入用戶模型，用於查詢用戶資
 from apps.posts.models import Post  # 引入貼文模型，用於查詢貼文資料
 from apps.users.serializers import UserSerializer  # 引入用戶序列化器，用於將用戶資料轉換為 JSON 格式
 from apps.posts.serializers import PostSerializer  # 引入貼文序列化器，用於將貼文資料轉換為 JSON 格式
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import with_unique_viewers
 from rest_framework.permissions import IsAuthenticated
 from .models import RecentSearch
 from .serializers import RecentSearchSerializer
@@ -35,9 +37,9 @@ class SearchView(APIView):
         user_serializer = UserSerializer(users, many=True)  # 將查詢到的用戶資料序列化為 JSON 格式
 
         # 搜尋貼文：根據貼文內容進行模糊匹配
-        posts = Post.objects.filter(
+        posts = with_unique_viewers(Post.objects.filter(
             Q(content__icontains=query)  # 貼文內容包含查詢字串（不區分大小寫）
-        )
+        ), ViewSketch.KIND_POST)  # 以子查詢帶出不重複瀏覽者，序列化時不需逐筆查詢
         post_serializer = PostSerializer(posts, many=True)  # 將查詢到的貼文資料序列化為 JSON 格式
 
         # 儲存搜尋記錄（如果有結果）
@@ -7,3 +7,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'  # 預設主鍵型別為 BigAutoField（自動遞增整數）
     name = 'apps.users'  # 指定此 app 的 Python 路徑（必須與實際目錄結構一致）
+
+    def ready(self):
+        # 註冊部署檢查：存取 token 的簽章金鑰缺少或為預設值時 check --deploy 回報錯誤
+        from . import checks  # noqa: F401
+        # 註冊認證快取失效信號
+        from . import signals  # noqa: F401
@@ -0,0 +1,197 @@
+# apps/users/authentication.py
+# 認證模組，讓大多數已認證請求不必查詢資料庫
+# 功能：Token 認證：token → 用戶 id 與用戶 id → 用戶快照分開快取，先查行程內 LRU（極短 TTL），再查共用的 auth 快取，
+#       都沒有時才以 DRF 原本的 Token JOIN User 查詢並寫入兩層快取；
+#       登出（刪除 Token）、修改密碼與任何 User.save() 時由 signals.py 清除對應項目；
+#       快取中的用戶只作為範本，每個請求拿到各自的複本，請求中修改 request.user 不會影響其他請求；
+#       Bearer 認證：只驗證存取 token 的簽章與時效，request.user 的其他欄位第一次使用時才經過同樣的快取載入
+# 資料來源：settings.CACHES['auth']、AUTH_CACHE_SECONDS、AUTH_LOCAL_CACHE_SECONDS、AUTH_LOCAL_CACHE_SIZE、tokens.py
+# 資料流向：REST_FRAMEWORK 的 DEFAULT_AUTHENTICATION_CLASSES（request.user）
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import LazyObject
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+
+from .models import User
+from .tokens import InvalidToken, bearer_tokens_enabled, verify_access_token
+
+_local = OrderedDict()  # 行程內 LRU {token 雜湊或 user:<id>: (到期時間, 用戶)}
+_local_lock = threading.Lock()
+
+
+def _cache():
+    return caches['auth']
+
+
+def _token_key(key):
+    # 快取鍵不直接放 token 原文
+    return 'auth:token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _snapshot(user):
+    """
+    交給請求的用戶複本（快取中的物件由多個請求與執行緒共用，不可交給請求修改）
+    複本標記為快照：其追蹤計數、最後上線時間可能已過時，User.save() 必須指定 update_fields
+    """
+    user = copy.copy(user)
+    user._auth_snapshot = True
+    return user
+
+
+def _local_get(token_key):
+    """回傳快取用戶的快照"""
+    with _local_lock:
+        entry = _local.get(token_key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _local[token_key]
+            return None
+        _local.move_to_end(token_key)
+        return _snapshot(entry[1])
+
+
+def _local_set(token_key, user):
+    with _local_lock:
+        _local[token_key] = (time.monotonic() + getattr(settings, 'AUTH_LOCAL_CACHE_SECONDS', 5), user)
+        _local.move_to_end(token_key)
+        while len(_local) > getattr(settings, 'AUTH_LOCAL_CACHE_SIZE', 1024):
+            _local.popitem(last=False)
+
+
+def invalidate_token(key):
+    """清除單一 token 的快取（登出、token 輪替）"""
+    token_key = _token_key(key)
+    with _local_lock:
+        _local.pop(token_key, None)
+    _cache().delete(token_key)
+
+
+def invalidate_user(user_id):
+    """
+    清除用戶快照（用戶資料、密碼、追蹤計數等變動時）
+    共用快取立即生效；其他行程的 LRU 最多再使用 AUTH_LOCAL_CACHE_SECONDS 秒的舊快照
+    """
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids):
+    """一次清除多位用戶的快照（LRU 只掃描一次，共用快取一次 delete_many）"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    with _local_lock:
+        for token_key in [token_key for token_key, (_, user) in _local.items() if user.pk in user_ids]:
+            del _local[token_key]
+    _cache().delete_many([_user_key(user_id) for user_id in user_ids])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    與 TokenAuthentication 相同的 "Token <key>" 標頭，驗證結果經過兩層快取
+    快照可能是幾秒前的資料，User.save() 對快照強制要求 update_fields（只寫回修改的欄位）
+    """
+
+    def authenticate_credentials(self, key):
+        token_key = _token_key(key)
+        user = _local_get(token_key)
+        if user is not None:
+            return user, key
+
+        cache = _cache()
+        user_id = cache.get(token_key)
+        if user_id is not None:
+            user = cache.get(_user_key(user_id))
+        if user is None:
+            # DRF 原本的查詢：Token JOIN User，並檢查 token 存在與用戶啟用
+            user, _ = super().authenticate_credentials(key)
+            timeout = getattr(settings, 'AUTH_CACHE_SECONDS', 300)
+            cache.set_many({token_key: user.pk, _user_key(user.pk): user}, timeout)
+        elif not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        _local_set(token_key, user)
+        return _snapshot(user), key
+
+
+def cached_user(user_id):
+    """依用戶 id 取得用戶快照（行程內 LRU → auth 快取 → 資料庫），不存在或停用時拋出 AuthenticationFailed"""
+    local_key = f'user:{user_id}'
+    user = _local_get(local_key)
+    if user is None:
+        cache = _cache()
+        user = cache.get(_user_key(user_id))
+        if user is None:
+            user = User.objects.filter(pk=user_id).first()
+            if user is not None:
+                cache.set(_user_key(user_id), user, getattr(settings, 'AUTH_CACHE_SECONDS', 300))
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        _local_set(local_key, user)
+        user = _snapshot(user)
+    return user
+
+
+class TokenUser(LazyObject):
+    """
+    存取 token 認證的 request.user
+    id / pk 取自已驗證的簽章內容；權限檢查與只用到 request.user.id 的視圖不會載入用戶，
+    其他屬性第一次使用時才以 cached_user 載入完整的 User
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id):
+        self.__dict__['_user_id'] = user_id
+        super().__init__()
+
+    @property
+    def pk(self):
+        return self.__dict__['_user_id']
+
+    id = pk
+
+    def __bool__(self):
+        # IsAuthenticated 先判斷 request.user 是否為真，不需為此載入用戶
+        return True
+
+    def _setup(self):
+        self._wrapped = cached_user(self.__dict__['_user_id'])
+
+
+class AccessTokenAuthentication(BaseAuthentication):
+    """
+    "Authorization: Bearer <存取 token>" 認證
+    只驗證簽章與時效，不讀取任何儲存；存取 token 在到期前無法撤銷，因此時效保持很短（ACCESS_TOKEN_SECONDS）
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer header.')
+        if not bearer_tokens_enabled():
+            # 簽章金鑰尚未設定：不接受任何存取 token（舊的 Token 認證不受影響）
+            raise exceptions.AuthenticationFailed('Access tokens are not enabled.')
+        try:
+            user_id = verify_access_token(auth[1].decode())
+        except (InvalidToken, UnicodeError):
+            raise exceptions.AuthenticationFailed('Invalid or expired access token.')
+        return TokenUser(user_id), None
+
+    def authenticate_header(self, request):
+        return self.keyword
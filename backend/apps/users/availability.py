@@ -0,0 +1,138 @@
+# apps/users/availability.py
+# 帳號可用性模組，以行程內的 Bloom filter 判斷用戶名 / 電子郵件是否「一定未被使用」
+# 功能：第一次查詢時（或超過 AVAILABILITY_REBUILD_SECONDS、加入數量超過容量時）從資料庫載入所有正規化後的用戶名與電子郵件；
+#       不在 filter 中即一定可用，不需查詢資料庫；可能存在時才以 iexact 查詢確認；
+#       註冊與改名時除了加入本行程的 filter，也寫入 auth 快取的變更日誌，其他 worker 查詢前先補上日誌中的新項目
+# 資料來源：User.username / email、settings.CACHES['auth']、AVAILABILITY_BLOOM_ERROR_RATE、AVAILABILITY_REBUILD_SECONDS
+# 資料流向：views.py 的可用性端點、signals.py（User 儲存時記錄新名稱）
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import User
+
+_SEQ_KEY = 'availability:seq'
+
+
+class BloomFilter:
+    """固定大小的 Bloom filter，以 blake2b 雜湊的兩半做雙重雜湊產生 k 個位置"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+_filter = None
+_filter_lock = threading.Lock()
+_built_at = 0.0
+_seq = 0  # 已套用到的變更日誌序號
+
+
+def _cache():
+    return caches['auth']
+
+
+def username_key(username):
+    return 'u:' + username.strip().casefold()
+
+
+def email_key(email):
+    return 'e:' + email.strip().lower()
+
+
+def _user_keys(username, email):
+    keys = [username_key(username)] if username else []
+    if email:
+        keys.append(email_key(email))
+    return keys
+
+
+def _rebuild():
+    """從資料庫重建 filter（先記下日誌序號，載入期間的新名稱之後會再套用一次，重複加入不影響結果）"""
+    global _filter, _built_at, _seq
+    _seq = _cache().get(_SEQ_KEY, 0)
+    users = User.objects.values_list('username', 'email')
+    bloom = BloomFilter(
+        max(users.count() * 2, 1024), getattr(settings, 'AVAILABILITY_BLOOM_ERROR_RATE', 0.01)
+    )
+    for username, email in users.iterator(chunk_size=10000):
+        for key in _user_keys(username, email):
+            bloom.add(key)
+    _filter, _built_at = bloom, time.monotonic()
+
+
+def _catch_up():
+    """套用其他 worker 寫入的變更日誌；日誌項目已過期時重建"""
+    global _seq
+    cache = _cache()
+    latest = cache.get(_SEQ_KEY, 0)
+    if latest <= _seq:
+        return
+    names = [f'availability:entry:{seq}' for seq in range(_seq + 1, latest + 1)]
+    entries = cache.get_many(names)
+    if len(entries) < len(names):
+        _rebuild()
+        return
+    for keys in entries.values():
+        for key in keys:
+            _filter.add(key)
+    _seq = latest
+
+
+def current_filter():
+    """取得本行程的 filter（必要時重建並補上變更日誌），多執行緒共用同一份"""
+    with _filter_lock:
+        stale = time.monotonic() - _built_at >= getattr(settings, 'AVAILABILITY_REBUILD_SECONDS', 3600)
+        if _filter is None or stale or _filter.count > _filter.capacity:
+            _rebuild()
+        else:
+            _catch_up()
+        return _filter
+
+
+def record_user(username, email):
+    """註冊 / 改名後記錄新名稱：加入本行程的 filter，並寫入變更日誌供其他 worker 套用"""
+    keys = _user_keys(username, email)
+    if not keys:
+        return
+    with _filter_lock:
+        if _filter is not None:
+            for key in keys:
+                _filter.add(key)
+    cache = _cache()
+    cache.add(_SEQ_KEY, 0, timeout=None)
+    seq = cache.incr(_SEQ_KEY)
+    cache.set(f'availability:entry:{seq}', keys, getattr(settings, 'AVAILABILITY_REBUILD_SECONDS', 3600))
+
+
+def username_available(username):
+    if username_key(username) not in current_filter():
+        return True
+    return not User.objects.filter(username__iexact=username.strip()).exists()
+
+
+def email_available(email):
+    if email_key(email) not in current_filter():
+        return True
+    return not User.objects.filter(email__iexact=email.strip()).exists()
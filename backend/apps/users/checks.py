@@ -0,0 +1,21 @@
+# apps/users/checks.py
+# users 應用的系統檢查，python manage.py check --deploy 時確認存取 token 的簽章金鑰
+# 功能：ACCESS_TOKEN_SIGNING_KEY 未設定、仍為 django-insecure- 預設值或與 SECRET_KEY 相同時回報錯誤；
+#       一般的 manage.py 指令與舊的 Token 端點不受影響，金鑰只在簽發 / 驗證存取 token 時讀取
+# 資料來源：settings.ACCESS_TOKEN_SIGNING_KEY、SECRET_KEY
+# 資料流向：Django 系統檢查框架（apps.py 註冊）
+
+from django.core import checks
+
+from .tokens import SIGNING_KEY_ERROR, bearer_tokens_enabled
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_access_token_signing_key(app_configs, **kwargs):
+    if bearer_tokens_enabled():
+        return []
+    return [checks.Error(
+        SIGNING_KEY_ERROR,
+        hint='python -c "import secrets; print(secrets.token_urlsafe(50))" 產生金鑰並設定為環境變數',
+        id='users.E001',
+    )]
@@ -0,0 +1,201 @@
+# users/follows.py - 追蹤關係服務，追蹤狀態機（請求 / 接受 / 拒絕 / 取消）並在同一交易中維護計數與通知
+# 功能：每個狀態轉換都是一個條件 INSERT / UPDATE / DELETE，以影響的列數判斷轉換是否發生，
+#       發生時才在同一交易中寫入通知、以一個 UPDATE 同時調整追蹤者的 following_count
+#       與被追蹤者的 followers_count；用戶刪除前扣除對方的計數並發送取消事件；
+#       repair_follow_counts 依用戶 id 分段從追蹤表重算計數；
+#       追蹤者 / 追蹤中列表以 (created_at, id) 游標分頁，並以一次查詢判斷目前用戶追蹤了頁面上的哪些人
+# 資料來源：views.py 的追蹤、追蹤列表與追蹤請求處理、signals.py（用戶刪除）、repair_follow_counts 管理指令
+# 資料流向：Follow、User.followers_count / following_count、Notification、follow_changed 信號（推薦的追蹤圖）
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, PositiveIntegerField, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.notifications.models import Notification
+from apps.notifications.services import notify
+
+from .authentication import invalidate_user, invalidate_users
+from .models import Follow, User
+
+FOLLOW_PAGE_SIZE = 20
+MAX_FOLLOW_PAGE_SIZE = 100
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# 已接受的追蹤關係建立或移除時發送（在交易中），參數 follower_id、following_id、accepted
+follow_changed = Signal()
+
+
+def _shifted(field, pk, delta):
+    """pk 這一列的 field 加上 delta（不低於 0），其他列不變"""
+    return Case(
+        When(pk=pk, then=Greatest(F(field) + delta, Value(0))),
+        default=F(field),
+        output_field=PositiveIntegerField(),
+    )
+
+
+def adjust_follow_counts(follower_id, following_id, delta):
+    """追蹤者的 following_count 與被追蹤者的 followers_count 同時加上 delta（一次 UPDATE）"""
+    User.objects.filter(pk__in=[follower_id, following_id]).update(
+        following_count=_shifted('following_count', follower_id, delta),
+        followers_count=_shifted('followers_count', following_id, delta),
+    )
+    # UPDATE 不會觸發 post_save，手動清除認證快取中的用戶快照，避免之後以舊計數顯示或寫回
+    transaction.on_commit(lambda: (invalidate_user(follower_id), invalidate_user(following_id)))
+
+
+def _follow_accepted(follower, following):
+    """關係成為 accepted：更新雙方計數並通知追蹤圖"""
+    adjust_follow_counts(follower.id, following.id, 1)
+    follow_changed.send(sender=Follow, follower_id=follower.id, following_id=following.id, accepted=True)
+
+
+def _request_notifications(follower, following):
+    """following 收到、仍為 pending 的追蹤請求通知"""
+    return Notification.objects.filter(
+        recipient=following, sender=follower, notification_type='follow_request_received', status='pending'
+    )
+
+
+def request_follow(follower, following):
+    """
+    追蹤或送出追蹤請求（公開帳號直接 accepted，私密帳號為 pending），回傳操作後的狀態
+    以唯一約束判斷是否為新關係：INSERT 成功才會產生通知與計數；已存在時只有被拒絕過的請求能以條件 UPDATE 重新送出，
+    重複點擊或同時送出的請求都不會重複計數
+    """
+    status = 'pending' if following.is_private else 'accepted'
+    with transaction.atomic():
+        try:
+            with transaction.atomic():  # savepoint：關係已存在時只回滾這個 INSERT
+                Follow.objects.create(follower=follower, following=following, status=status)
+        except IntegrityError:
+            resent = Follow.objects.filter(
+                follower=follower, following=following, status='rejected'
+            ).update(status=status, created_at=timezone.now())
+            if not resent:
+                return Follow.objects.filter(follower=follower, following=following).values_list('status', flat=True).first()
+
+        if status == 'accepted':
+            _follow_accepted(follower, following)
+            notify(recipient=following, sender=follower, notification_type='follow')
+        else:
+            notify(recipient=following, sender=follower, notification_type='follow_request_received', status='pending')
+    return status
+
+
+def accept_follow(follower, following):
+    """接受 pending 的追蹤請求（條件 UPDATE），回傳是否有請求被接受"""
+    with transaction.atomic():
+        if not Follow.objects.filter(follower=follower, following=following, status='pending').update(status='accepted'):
+            return False
+        _request_notifications(follower, following).update(status='accepted')
+        _follow_accepted(follower, following)
+        notify(recipient=follower, sender=following, notification_type='follow_accepted')
+    return True
+
+
+def reject_follow(follower, following):
+    """拒絕 pending 的追蹤請求（條件 UPDATE），回傳是否有請求被拒絕"""
+    with transaction.atomic():
+        if not Follow.objects.filter(follower=follower, following=following, status='pending').update(status='rejected'):
+            return False
+        _request_notifications(follower, following).update(status='rejected')
+    return True
+
+
+def unfollow(follower, following):
+    """
+    取消追蹤或撤回請求，回傳是否有關係被刪除
+    先以條件 DELETE 刪除已接受的關係（有刪到才扣計數），沒有時再刪除 pending / rejected 的請求
+    """
+    with transaction.atomic():
+        relations = Follow.objects.filter(follower=follower, following=following)
+        if relations.filter(status='accepted').delete()[0]:
+            adjust_follow_counts(follower.id, following.id, -1)
+            follow_changed.send(sender=Follow, follower_id=follower.id, following_id=following.id, accepted=False)
+            return True
+        if relations.delete()[0]:
+            _request_notifications(follower, following).delete()
+            return True
+    return False
+
+
+def release_user_follows(user):
+    """
+    用戶刪除前呼叫（Follow 會被 CASCADE 直接刪除，不經過 unfollow）：
+    被此用戶追蹤的人 followers_count 減一、追蹤此用戶的人 following_count 減一（每一側一個 UPDATE），
+    並為每個已接受的關係發送 follow_changed(accepted=False)，推薦的追蹤圖隨之移除這些邊
+    """
+    accepted = Follow.objects.filter(status='accepted')
+    followed_ids = list(accepted.filter(follower=user).values_list('following_id', flat=True))
+    follower_ids = list(accepted.filter(following=user).values_list('follower_id', flat=True))
+    if followed_ids:
+        User.objects.filter(pk__in=followed_ids).update(
+            followers_count=Greatest(F('followers_count') - 1, Value(0), output_field=PositiveIntegerField())
+        )
+    if follower_ids:
+        User.objects.filter(pk__in=follower_ids).update(
+            following_count=Greatest(F('following_count') - 1, Value(0), output_field=PositiveIntegerField())
+        )
+    for following_id in followed_ids:
+        follow_changed.send(sender=Follow, follower_id=user.pk, following_id=following_id, accepted=False)
+    for follower_id in follower_ids:
+        follow_changed.send(sender=Follow, follower_id=follower_id, following_id=user.pk, accepted=False)
+    affected = followed_ids + follower_ids
+    if affected:
+        transaction.on_commit(lambda: invalidate_users(affected))
+
+
+def _accepted_count(field):
+    """依 field（follower / following）分組的已接受追蹤數子查詢，沒有時為 0"""
+    counts = (
+        Follow.objects.filter(**{field: OuterRef('pk')}, status='accepted')
+        .order_by().values(field).annotate(total=Count('id')).values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def repair_follow_counts(start_id, stop_id):
+    """從追蹤表重算 id 位於 [start_id, stop_id) 的用戶計數（一個 UPDATE），回傳更新的用戶數"""
+    return User.objects.filter(pk__gte=start_id, pk__lt=stop_id).update(
+        followers_count=_accepted_count('following'),
+        following_count=_accepted_count('follower'),
+    )
+
+
+def encode_follow_cursor(relation):
+    """列表游標：建立時間（epoch 微秒，整數避免時區與 URL 編碼問題）與 id，以底線連接"""
+    return f'{(relation.created_at - _EPOCH) // timedelta(microseconds=1)}_{relation.id}'
+
+
+def decode_follow_cursor(cursor):
+    """解析列表游標為 (建立時間, id)，格式錯誤時拋出 ValueError"""
+    micros, relation_id = cursor.split('_')
+    return _EPOCH + timedelta(microseconds=int(micros)), int(relation_id)
+
+
+def follow_page(relations, cursor=None, limit=FOLLOW_PAGE_SIZE):
+    """
+    依建立時間由新到舊取一頁追蹤關係，回傳 (關係列表, 是否還有下一頁)
+    游標條件落在 (對象, 狀態, created_at, id) 索引的範圍內，不論翻到第幾頁都只掃描一頁的索引項
+    """
+    if cursor:
+        created_at, relation_id = decode_follow_cursor(cursor)
+        relations = relations.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=relation_id)
+    # 多取一筆判斷是否還有下一頁
+    page = list(relations.order_by('-created_at', '-id')[:limit + 1])
+    return page[:limit], len(page) > limit
+
+
+def following_ids(viewer, user_ids):
+    """viewer 已追蹤（accepted）的用戶 id 集合，只在 user_ids 範圍內查詢；未登入時為空集合"""
+    if not viewer.is_authenticated or not user_ids:
+        return set()
+    return set(
+        Follow.objects.filter(follower=viewer, following_id__in=user_ids, status='accepted')
+        .values_list('following_id', flat=True)
+    )
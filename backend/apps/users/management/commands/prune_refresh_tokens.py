@@ -0,0 +1,16 @@
+# prune_refresh_tokens.py - 更新 token 清理指令
+# 功能：刪除已過期、或已輪替超過一天的更新 token
+# 用法：python manage.py prune_refresh_tokens
+#       建議以排程每日執行
+
+from django.core.management.base import BaseCommand
+
+from apps.users.tokens import prune_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = '刪除過期與已使用的更新 token'
+
+    def handle(self, *args, **options):
+        deleted = prune_refresh_tokens()
+        self.stdout.write(self.style.SUCCESS(f'已刪除 {deleted} 個更新 token'))
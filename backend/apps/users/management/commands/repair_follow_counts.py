@@ -0,0 +1,34 @@
+# repair_follow_counts.py - 追蹤計數修復指令
+# 功能：依用戶 id 分段，從追蹤表重算每位用戶的 followers_count / following_count（每段一個 UPDATE）
+# 用法：python manage.py repair_follow_counts --chunk-size 5000 --pause 0.1
+#       計數由 follows.py 在交易中維護，平時不需執行；匯入資料或手動修改追蹤表後執行
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+
+from apps.users.follows import repair_follow_counts
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = '分段重算用戶的追蹤者 / 追蹤中數量'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help='每段的用戶 id 範圍')
+        parser.add_argument('--pause', type=float, default=0, help='每段之間等待秒數')
+
+    def handle(self, *args, **options):
+        bounds = User.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            self.stdout.write('沒有用戶需要修復')
+            return
+
+        updated = 0
+        chunk_size = options['chunk_size']
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            updated += repair_follow_counts(start, start + chunk_size)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'已重算 {updated} 位用戶的追蹤計數'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    """以一個 UPDATE 將既有的已接受追蹤數寫入 followers_count / following_count"""
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+
+    def accepted_count(field):
+        counts = (
+            Follow.objects.filter(**{field: OuterRef('pk')}, status='accepted')
+            .order_by().values(field).annotate(total=Count('id')).values('total')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    User.objects.using(schema_editor.connection.alias).update(
+        followers_count=accepted_count('following'),
+        following_count=accepted_count('follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_skill_user_display_name_user_headline_user_location_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='追蹤者數量'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='追蹤中數量'),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_follow_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['following', 'status', 'created_at', 'id'], name='users_follow_followers'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', 'status', 'created_at', 'id'], name='users_follow_following'),
+        ),
+    ]
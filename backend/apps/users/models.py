@@ -71,6 +71,7 @@ class User(AbstractUser):
     - theme_color: 個人主題顏色
     - show_follower_count: 是否顯示追蹤者數量
     - display_name: 顯示名稱（可與用戶名不同）
+    - followers_count / following_count: 已接受的追蹤者 / 追蹤中數量（由 follows.py 在追蹤關係變動的交易中維護）
     """
     email = models.EmailField(
         _('電子郵件'),
@@ -91,6 +92,8 @@ class User(AbstractUser):
     theme_color = models.CharField(_('主題顏色'), max_length=20, default='#1a73e8')  # 個人主題顏色
     show_follower_count = models.BooleanField(_('顯示追蹤者數量'), default=True)  # 是否顯示追蹤者數量
     display_name = models.CharField(_('顯示名稱'), max_length=50, blank=True, null=True)  # 顯示名稱
+    followers_count = models.PositiveIntegerField(_('追蹤者數量'), default=0)  # 已接受的追蹤者數量
+    following_count = models.PositiveIntegerField(_('追蹤中數量'), default=0)  # 已接受的追蹤中數量
     
     objects = UserManager()  # 使用自定義的用戶管理器
     
@@ -99,6 +102,13 @@ class User(AbstractUser):
     
     def __str__(self):
         return self.display_name or self.username
+
+    def save(self, *args, **kwargs):
+        # 認證快取交給請求的快照（authentication.py）可能帶著過時的追蹤計數與最後上線時間，
+        # 全列寫回會覆蓋其他請求的條件更新，因此快照只能以 update_fields 寫回修改的欄位
+        if self.__dict__.get('_auth_snapshot') and kwargs.get('update_fields') is None:
+            raise ValueError('Cached user snapshots must be saved with update_fields.')
+        super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = _('用戶')
@@ -109,12 +119,12 @@ class User(AbstractUser):
         return self.display_name or self.username
     
     def get_followers_count(self):
-        """獲取追蹤者數量"""
-        return self.follower_relationships.filter(status='accepted').count()
+        """獲取追蹤者數量（儲存的計數，不查詢追蹤表）"""
+        return self.followers_count
     
     def get_following_count(self):
-        """獲取正在追蹤數量"""
-        return self.following_relationships.filter(status='accepted').count()
+        """獲取正在追蹤數量（儲存的計數，不查詢追蹤表）"""
+        return self.following_count
     
     def is_following(self, user):
         """檢查是否正在追蹤指定用戶"""
@@ -166,6 +176,31 @@ class Follow(models.Model):
         verbose_name_plural = _('追蹤關係')
         # 確保一個用戶只能追蹤另一個用戶一次
         unique_together = ('follower', 'following')
+        # 追蹤者 / 追蹤中列表依建立時間（相同時依 id）做游標分頁
+        indexes = [
+            models.Index(fields=['following', 'status', 'created_at', 'id'], name='users_follow_followers'),
+            models.Index(fields=['follower', 'status', 'created_at', 'id'], name='users_follow_following'),
+        ]
         
     def __str__(self):
-        return f"{self.follower.username} 追蹤 {self.following.username}"
\ No newline at end of file
+        return f"{self.follower.username} 追蹤 {self.following.username}"
+
+class RefreshToken(models.Model):
+    """
+    更新 token（只保存雜湊），用來換發短效的存取 token
+    - family: 同一次登入輪替出來的 token 共用，舊 token 被重複使用時整個 family 一起撤銷
+    - used_at: 已輪替的時間，每個 token 只能使用一次
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens', verbose_name=_('用戶'))
+    token_hash = models.CharField(_('token 雜湊'), max_length=64, unique=True)
+    family = models.UUIDField(_('登入工作階段'), db_index=True)
+    created_at = models.DateTimeField(_('建立時間'), auto_now_add=True)
+    expires_at = models.DateTimeField(_('到期時間'))
+    used_at = models.DateTimeField(_('使用時間'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('更新 token')
+        verbose_name_plural = _('更新 token')
+
+    def __str__(self):
+        return f"{self.user_id} {self.family}"
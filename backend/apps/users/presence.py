@@ -0,0 +1,78 @@
+# apps/users/presence.py
+# 用戶上線狀態模組，以快取保存短暫的上線狀態，定期批次寫回 User.last_online
+# 功能：客戶端心跳（或私訊同步）時在 presence 快取寫入帶 TTL 的上線標記，心跳停止後自動過期；
+#       查詢其他用戶是否上線只讀快取；最後上線時間先累積在行程內緩衝（config/buffers.py），
+#       由背景計時執行緒每隔 PRESENCE_PERSIST_SECONDS 以一次批次 UPDATE 寫回；
+#       只有自己、自己已追蹤的用戶與同一聊天室的參與者可以查看上線狀態
+# 資料來源：settings.CACHES['presence']、PRESENCE_TTL_SECONDS、PRESENCE_PERSIST_SECONDS
+# 資料流向：users/views.py 的上線狀態端點、private_messages/views.py 的聊天室同步，User.last_online
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from apps.private_messages.models import ThreadParticipant
+from config.buffers import WriteBuffer
+
+from .models import Follow, User
+
+
+def _cache():
+    return caches['presence']
+
+
+def _key(user_id):
+    return f'presence:{user_id}'
+
+
+def heartbeat(user_id):
+    """
+    記錄用戶目前在線，熱路徑只寫快取與行程內緩衝（由背景執行緒批次寫回），回傳記錄的時間
+    """
+    now = timezone.now()
+    _cache().set(_key(user_id), now, getattr(settings, 'PRESENCE_TTL_SECONDS', 60))
+    _last_online.update(lambda pending: pending.__setitem__(user_id, now))
+    return now
+
+
+def last_seen(user_ids):
+    """
+    目前在線用戶的最後心跳時間 {user_id: datetime}，不在結果中的用戶視為離線
+    只讀快取，不查詢資料庫
+    """
+    found = _cache().get_many([_key(user_id) for user_id in user_ids])
+    return {user_id: found[_key(user_id)] for user_id in user_ids if _key(user_id) in found}
+
+
+def _write_last_online(pending):
+    """將累積的最後上線時間 {user_id: datetime} 以批次 UPDATE 寫回 User.last_online，回傳寫回的用戶數"""
+    users = [User(pk=user_id, last_online=seen) for user_id, seen in pending.items()]
+    User.objects.bulk_update(users, ['last_online'], batch_size=500)
+    return len(users)
+
+
+# 尚未寫回的最後上線時間 {user_id: datetime}；寫入失敗時放棄這一批（下一次心跳會重新累積）
+_last_online = WriteBuffer('last_online', _write_last_online, 'PRESENCE_PERSIST_SECONDS', 300)
+
+
+def visible_user_ids(viewer, user_ids):
+    """
+    user_ids 中 viewer 可以查看上線狀態的用戶 id 集合：自己、已接受的追蹤對象、同一聊天室的參與者
+    依 (follower, status) 索引與聊天室參與者表各查詢一次
+    """
+    user_ids = set(user_ids)
+    visible = {viewer.id} & user_ids
+    visible.update(
+        Follow.objects.filter(follower=viewer, status='accepted', following_id__in=user_ids - visible)
+        .values_list('following_id', flat=True)
+    )
+    visible.update(
+        ThreadParticipant.objects.filter(user_id__in=user_ids - visible, thread__memberships__user=viewer)
+        .values_list('user_id', flat=True)
+    )
+    return visible
+
+
+def flush_last_online():
+    """立即寫回行程內累積的最後上線時間，回傳寫回的用戶數"""
+    return _last_online.flush()
@@ -6,6 +6,24 @@
 from rest_framework import serializers
 from .models import User, Skill, Follow
 
+
+def save_changed_fields(instance, validated_data):
+    """
+    只寫回這次修改的欄位（技能以差異更新中介表）
+    instance 可能是認證快取的快照，全列 save() 會以舊的追蹤計數與最後上線時間覆蓋資料庫中已條件更新的值
+    """
+    from .skills import set_user_skills  # skills.py 引用本檔的 SkillSerializer
+
+    skills = validated_data.pop('skills', None)
+    for attr, value in validated_data.items():
+        setattr(instance, attr, value)
+    if validated_data:
+        instance.save(update_fields=list(validated_data))
+    if skills is not None:
+        set_user_skills(instance, skills)
+    return instance
+
+
 class SkillSerializer(serializers.ModelSerializer):
     """技能標籤序列化器"""
     class Meta:
@@ -31,8 +49,6 @@ class UserSerializer(serializers.ModelSerializer):
     用戶序列化器，用於個人檔案的讀取與更新
     包含完整的用戶個人檔案信息
     """
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
     skills = SkillSerializer(many=True, read_only=True)
     skill_ids = serializers.PrimaryKeyRelatedField(
         queryset=Skill.objects.all(),
@@ -59,14 +75,6 @@ class UserSerializer(serializers.ModelSerializer):
             'is_following', 'featured_portfolios'
         ]
 
-    def get_followers_count(self, obj):
-        """獲取接受的追蹤者數量"""
-        return obj.follower_relationships.filter(status='accepted').count()
-
-    def get_following_count(self, obj):
-        """獲取正在追蹤的數量"""
-        return obj.following_relationships.filter(status='accepted').count()
-    
     def get_is_following(self, obj):
         """當前用戶是否正在追蹤此用戶"""
         request = self.context.get('request')
@@ -86,6 +94,10 @@ class UserSerializer(serializers.ModelSerializer):
         featured_portfolios = obj.portfolios.filter(is_featured=True)[:4]
         return PortfolioMinimalSerializer(featured_portfolios, many=True, context=self.context).data
 
+    def update(self, instance, validated_data):
+        # 只寫回驗證過的欄位（SettingsView 的 instance 為 request.user 快照）
+        return save_changed_fields(instance, validated_data)
+
     def validate(self, data):
         # 確保 username 不為空
         if 'username' in data and (data['username'] is None or not data['username'].strip()):
@@ -131,12 +143,8 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         ]
     
     def update(self, instance, validated_data):
-        # 將所有字段更新到實例
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        
-        instance.save()
-        return instance
+        # 將驗證過的字段更新到實例，只寫回這些欄位
+        return save_changed_fields(instance, validated_data)
 
 class FollowSerializer(serializers.ModelSerializer):
     """追蹤關係序列化器"""
@@ -148,6 +156,25 @@ class FollowSerializer(serializers.ModelSerializer):
         fields = ['id', 'follower', 'following', 'status', 'created_at']
         read_only_fields = ['id', 'created_at']
 
+class FollowListSerializer(serializers.ModelSerializer):
+    """
+    追蹤者 / 追蹤中列表的一列
+    - user: 關係另一端的用戶（context['side'] 為 follower 或 following）
+    - is_following: 目前用戶是否追蹤此用戶，由視圖一次查好放在 context['following_ids']
+    """
+    user = serializers.SerializerMethodField()
+    is_following = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Follow
+        fields = ['id', 'user', 'is_following', 'created_at']
+
+    def get_user(self, obj):
+        return UserMinimalSerializer(getattr(obj, self.context['side']), context=self.context).data
+
+    def get_is_following(self, obj):
+        return getattr(obj, f"{self.context['side']}_id") in self.context.get('following_ids', ())
+
 class RegisterSerializer(serializers.ModelSerializer):
     """
     註冊序列化器，處理用戶註冊資料
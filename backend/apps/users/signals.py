@@ -0,0 +1,51 @@
+# apps/users/signals.py
+# 用戶信號檔案，用戶或 Token 變動時（交易提交後）清除認證快取，註冊與改名時記錄新的用戶名 / 電子郵件，
+#               技能變動時遞增技能目錄版本，用戶刪除前釋放其追蹤關係（對方的計數與追蹤圖）
+# 資料來源：User 的 pre_delete / post_save / post_delete、Token 的 post_delete、Skill 的 post_save / post_delete
+# 資料流向：authentication.py 的行程內 LRU 與 auth 快取、availability.py 的 Bloom filter、skills.py 的技能目錄、
+#           follows.py 的追蹤計數與 follow_changed
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user
+from .availability import record_user
+from .follows import release_user_follows
+from .models import Skill, User
+from .skills import bump_catalog_version
+
+
+@receiver(post_save, sender=User, dispatch_uid='users_auth_user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='users_auth_user_deleted')
+def user_changed(sender, instance, **kwargs):
+    # 提交前與提交後各清除一次：提交前讓同一交易後續的認證不用舊快照，提交後避免其他請求在提交前寫回舊資料
+    invalidate_user(instance.pk)
+    transaction.on_commit(lambda: invalidate_user(instance.pk))
+
+
+@receiver(pre_delete, sender=User, dispatch_uid='users_follows_user_deleted')
+def user_deleting(sender, instance, **kwargs):
+    # 追蹤關係隨後由 CASCADE 刪除，先扣除對方的計數並通知追蹤圖
+    release_user_follows(instance)
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='users_auth_token_deleted')
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+    transaction.on_commit(lambda: invalidate_token(instance.key))
+
+
+@receiver(post_save, sender=User, dispatch_uid='users_availability_user_saved')
+def user_names_saved(sender, instance, update_fields=None, **kwargs):
+    # 只更新其他欄位時（例如 update_fields=['password']）名稱不會變動
+    if update_fields is not None and not {'username', 'email'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: record_user(instance.username, instance.email))
+
+
+@receiver(post_save, sender=Skill, dispatch_uid='users_skill_saved')
+@receiver(post_delete, sender=Skill, dispatch_uid='users_skill_deleted')
+def skill_changed(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
@@ -0,0 +1,131 @@
+# apps/users/skill_index.py
+# 技能自動完成索引模組，在記憶體中以排序好的前綴索引回答「輸入 x 開頭的熱門技能」
+# 功能：技能名稱與其中每個單字（React Native → react native、native）轉為小寫鍵，
+#       與使用次數（User.skills + Portfolio.skills_used）一起排序成陣列，以二分搜尋找出前綴範圍，
+#       範圍內依使用次數取前 K 名；一到兩個字的前綴與空前綴在建立時預先算好；
+#       索引建立後不再修改，新技能出現時複製一份插入後整體替換，多執行緒可不加鎖讀取
+# 資料來源：Skill、User.skills / Portfolio.skills_used 中介表、skills.py 的技能目錄版本號
+# 資料流向：views.py 的技能自動完成端點
+
+import bisect
+import heapq
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count
+
+from apps.portfolios.models import Portfolio
+from .models import Skill, User
+from .skills import catalog_version
+
+PRECOMPUTED_PREFIX_LENGTH = 2  # 預先算好結果的前綴長度上限
+PRECOMPUTED_K = 20  # 預先算好的結果數（查詢的 limit 不超過此數時直接使用）
+
+_WORD_START = re.compile(r'(?<=[\s\-_/.+#])(?=\w)')
+
+
+def _keys(name):
+    """名稱本身與每個單字開頭的後綴，皆轉為小寫"""
+    name = name.casefold()
+    return {name} | {name[match.start():] for match in _WORD_START.finditer(name)}
+
+
+class SkillPrefixIndex:
+    """
+    不可變的前綴索引
+    entries: 依 (鍵, -使用次數, 技能 id) 排序的陣列，同一前綴的項目相鄰
+    """
+
+    def __init__(self, names, usage, entries=None, top=None):
+        self.names = names  # {技能 id: 名稱}
+        self.usage = usage  # {技能 id: 使用次數}
+        self.max_id = max(names, default=0)
+        if entries is None:
+            entries = sorted(
+                (key, -usage.get(skill_id, 0), skill_id) for skill_id, name in names.items() for key in _keys(name)
+            )
+        self.entries = entries
+        if top is None:
+            top = {}
+            for key, _, _ in entries:
+                for length in range(min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1):
+                    if key[:length] not in top:
+                        top[key[:length]] = self._search(key[:length], PRECOMPUTED_K)
+        self._top = top
+
+    @classmethod
+    def from_database(cls):
+        names = dict(Skill.objects.values_list('id', 'name'))
+        usage = {}
+        for through, owner in ((User.skills.through, 'user'), (Portfolio.skills_used.through, 'portfolio')):
+            counts = through.objects.values('skill_id').annotate(total=Count(f'{owner}_id')).values_list('skill_id', 'total')
+            for skill_id, total in counts:
+                usage[skill_id] = usage.get(skill_id, 0) + total
+        return cls(names, usage)
+
+    def _search(self, prefix, limit):
+        start = bisect.bisect_left(self.entries, (prefix,))
+        stop = bisect.bisect_left(self.entries, (prefix + '\U0010ffff',))
+        best = {}
+        for _, negative_usage, skill_id in self.entries[start:stop]:
+            best[skill_id] = negative_usage
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: (item[1], self.names[item[0]].casefold()))
+        return [skill_id for skill_id, _ in ranked]
+
+    def complete(self, prefix, limit=10):
+        """前綴（不分大小寫）的熱門技能，回傳 [(技能 id, 名稱, 使用次數)]，依使用次數由多到少"""
+        prefix = prefix.strip().casefold()
+        cached = self._top.get(prefix) if limit <= PRECOMPUTED_K else None
+        if cached is None and len(prefix) <= PRECOMPUTED_PREFIX_LENGTH and limit <= PRECOMPUTED_K:
+            cached = []  # 短前綴不在預先算好的結果中表示沒有符合的技能
+        skill_ids = cached[:limit] if cached is not None else self._search(prefix, limit)
+        return [(skill_id, self.names[skill_id], self.usage.get(skill_id, 0)) for skill_id in skill_ids]
+
+    def with_skills(self, skills):
+        """加入新技能（使用次數為 0）後的新索引：複製陣列後插入，只重算受影響的短前綴"""
+        names = {**self.names, **dict(skills)}
+        entries = list(self.entries)
+        top = dict(self._top)
+        affected = set()
+        for skill_id, name in skills:
+            for key in _keys(name):
+                bisect.insort(entries, (key, 0, skill_id))
+                affected.update(key[:length] for length in range(min(len(key), PRECOMPUTED_PREFIX_LENGTH) + 1))
+        index = SkillPrefixIndex(names, self.usage, entries, top)
+        for prefix in affected:
+            top[prefix] = index._search(prefix, PRECOMPUTED_K)
+        return index
+
+
+_index = None
+_index_version = None
+_built_at = 0.0
+_build_lock = threading.Lock()
+
+
+def current_index():
+    """
+    取得目前的索引（讀取端不加鎖，取得的是完整建立好的不可變物件）
+    技能目錄版本變動時只載入新增的技能並插入；沒有新技能（改名或刪除）或超過 SKILL_INDEX_REBUILD_SECONDS 時重建，
+    重建時一併更新使用次數
+    """
+    global _index, _index_version, _built_at
+    version = catalog_version()
+    rebuild_seconds = getattr(settings, 'SKILL_INDEX_REBUILD_SECONDS', 600)
+    index = _index
+    if index is not None and version == _index_version and time.monotonic() - _built_at < rebuild_seconds:
+        return index
+    with _build_lock:
+        # 等待鎖期間其他執行緒可能已重建或更新，鎖內重新判斷是否過期，避免排隊的請求逐一重建
+        if _index is None or time.monotonic() - _built_at >= rebuild_seconds:
+            _index, _built_at = SkillPrefixIndex.from_database(), time.monotonic()
+        elif version != _index_version:
+            added = list(Skill.objects.filter(id__gt=_index.max_id).values_list('id', 'name'))
+            if added:
+                _index = _index.with_skills(added)
+            else:
+                _index, _built_at = SkillPrefixIndex.from_database(), time.monotonic()
+        _index_version = version
+        return _index
@@ -0,0 +1,93 @@
+# apps/users/skills.py
+# 技能服務模組，批次解析技能名稱、以差異更新用戶技能，並以版本化的記憶體快取提供技能目錄
+# 功能：技能名稱一次查詢已存在的技能、缺少的以一個 bulk_create(ignore_conflicts=True) 建立；
+#       用戶技能只刪除移除的、只新增加入的中介表列；
+#       技能目錄序列化後保存在行程內，技能新增 / 修改時遞增共用快取中的版本號，各 worker 比對版本後才重新載入
+# 資料來源：Skill、User.skills 中介表、settings.CACHES['default']
+# 資料流向：views.py 的個人檔案更新與技能目錄端點、signals.py（技能變動時遞增版本）
+
+import hashlib
+import json
+import threading
+
+from django.core.cache import caches
+
+from .models import Skill, User
+from .serializers import SkillSerializer
+
+_VERSION_KEY = 'skills:catalog:version'
+
+_catalog = None  # (版本號, 序列化後的技能列表, ETag)
+_catalog_lock = threading.Lock()
+
+
+def normalize_skill_names(names):
+    """去除空白與空字串、保留第一次出現的順序去重"""
+    return list(dict.fromkeys(name.strip() for name in names if isinstance(name, str) and name.strip()))
+
+
+def resolve_skills(names):
+    """
+    依名稱取得技能（不存在的建立），回傳與 names 同順序的 Skill 列表
+    一次查詢已存在的技能，缺少的以 bulk_create(ignore_conflicts=True) 建立後再查一次取得 id（同時建立的請求不會衝突）
+    """
+    names = normalize_skill_names(names)
+    if not names:
+        return []
+    skills = {skill.name: skill for skill in Skill.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in skills]
+    if missing:
+        Skill.objects.bulk_create([Skill(name=name) for name in missing], ignore_conflicts=True)
+        skills.update((skill.name, skill) for skill in Skill.objects.filter(name__in=missing))
+        bump_catalog_version()
+    return [skills[name] for name in names]
+
+
+def set_user_skills(user, skills):
+    """以差異更新用戶技能：讀取一次目前的技能 id，只刪除移除的、只新增加入的中介表列"""
+    through = User.skills.through
+    wanted = {skill.id for skill in skills}
+    current = set(through.objects.filter(user_id=user.id).values_list('skill_id', flat=True))
+    if current - wanted:
+        through.objects.filter(user_id=user.id, skill_id__in=current - wanted).delete()
+    if wanted - current:
+        through.objects.bulk_create(
+            [through(user_id=user.id, skill_id=skill_id) for skill_id in wanted - current], ignore_conflicts=True
+        )
+
+
+def _cache():
+    return caches['default']
+
+
+def bump_catalog_version():
+    """技能目錄有變動：遞增共用版本號，各 worker 下次讀取目錄時重新載入"""
+    cache = _cache()
+    cache.add(_VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(_VERSION_KEY)
+    except ValueError:  # 版本號剛好被清除
+        cache.add(_VERSION_KEY, 1, timeout=None)
+
+
+def catalog_version():
+    """目前的技能目錄版本號（技能新增、修改或刪除後遞增）"""
+    cache = _cache()
+    cache.add(_VERSION_KEY, 0, timeout=None)
+    return cache.get(_VERSION_KEY)
+
+
+def skill_catalog():
+    """
+    技能目錄，回傳 (技能列表, ETag)
+    每次只讀取共用快取中的版本號，版本相同時直接使用行程內的序列化結果
+    ETag 由內容雜湊產生，不同 worker 載入相同內容時一致
+    """
+    global _catalog
+    version = catalog_version()
+    with _catalog_lock:
+        if _catalog is None or _catalog[0] != version:
+            skills = SkillSerializer(Skill.objects.all(), many=True).data
+            digest = hashlib.sha256(json.dumps(skills, sort_keys=True).encode('utf-8')).hexdigest()[:32]
+            _catalog = (version, skills, f'"{digest}"')
+        return _catalog[1], _catalog[2]
@@ -1,9 +1,331 @@
 # tests.py - 撰寫 users app 的單元測試
 # 可在此檔案撰寫 models、views、API 等自動化測試，確保功能正確
 
-from django.test import TestCase
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-# 目前尚未撰寫任何測試案例，範例：
-# class UserModelTest(TestCase):
-#     def test_create_user(self):
-#         ...
+from . import availability
+from .authentication import CachedTokenAuthentication
+from .availability import BloomFilter, email_available, username_available
+from .checks import check_access_token_signing_key
+from .follows import accept_follow, reject_follow, repair_follow_counts, request_follow, unfollow
+from . import skill_index
+from .models import Follow, RefreshToken, Skill, User
+from .skill_index import PRECOMPUTED_K, SkillPrefixIndex
+from .tokens import (
+    InvalidToken, issue_access_token, issue_token_pair, rotate_refresh_token, verify_access_token,
+)
+
+
+class SettingsUpdateTest(TestCase):
+    """設定更新只寫回修改的欄位，不以 request.user 快照覆蓋追蹤計數"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner@example.com', 'owner', 'pw')
+        self.client = APIClient()
+        # 模擬認證快取的快照：快照取得後，資料庫中的計數被其他請求條件更新
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        User.objects.filter(pk=self.user.pk).update(followers_count=5, following_count=3)
+
+    def test_patch_keeps_counters(self):
+        response = self.client.patch('/api/users/settings/', {'bio': 'hello'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.bio, 'hello')
+        self.assertEqual((self.user.followers_count, self.user.following_count), (5, 3))
+
+
+class AuthSnapshotTest(TestCase):
+    """認證快取交給請求的用戶快照不能全列寫回"""
+
+    def test_snapshot_requires_update_fields(self):
+        user = User.objects.create_user('snap@example.com', 'snap', 'pw')
+        token = Token.objects.create(user=user)
+        snapshot, _ = CachedTokenAuthentication().authenticate_credentials(token.key)
+        with self.assertRaises(ValueError):
+            snapshot.save()
+        snapshot.bio = 'updated'
+        snapshot.save(update_fields=['bio'])
+        user.refresh_from_db()
+        self.assertEqual(user.bio, 'updated')
+
+
+@override_settings(ACCESS_TOKEN_SIGNING_KEY='')
+class MissingSigningKeyTest(TestCase):
+    """未設定簽章金鑰時舊的 Token 端點照常運作，只停用存取 token，部署檢查回報錯誤"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('legacy@example.com', 'legacy', 'pw')
+        self.client = APIClient()
+
+    def test_login_returns_legacy_token_only(self):
+        response = self.client.post('/api/users/login/', {'identifier': 'legacy', 'password': 'pw'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.data)
+        self.assertNotIn('access', response.data)
+
+    def test_legacy_token_authenticates(self):
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 200)
+
+    def test_bearer_token_rejected(self):
+        with override_settings(ACCESS_TOKEN_SIGNING_KEY='test-signing-key-0123456789'):
+            access = issue_access_token(self.user.pk)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 401)
+
+    def test_deploy_check_reports_error(self):
+        self.assertEqual([error.id for error in check_access_token_signing_key(None)], ['users.E001'])
+        with override_settings(ACCESS_TOKEN_SIGNING_KEY=f'django-insecure-{"x" * 20}'):
+            self.assertEqual(len(check_access_token_signing_key(None)), 1)
+        with override_settings(ACCESS_TOKEN_SIGNING_KEY='test-signing-key-0123456789'):
+            self.assertEqual(check_access_token_signing_key(None), [])
+
+
+class FollowStateMachineTest(TestCase):
+    """追蹤狀態機：只有狀態實際變動時才更新計數，重複操作不重複計數"""
+
+    def setUp(self):
+        self.alice = User.objects.create_user('alice@example.com', 'alice', 'pw')
+        self.bob = User.objects.create_user('bob@example.com', 'bob', 'pw')
+        self.private = User.objects.create_user('private@example.com', 'private', 'pw', is_private=True)
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.followers_count, user.following_count
+
+    def status(self, follower, following):
+        return Follow.objects.filter(follower=follower, following=following).values_list('status', flat=True).first()
+
+    def test_follow_public_account(self):
+        self.assertEqual(request_follow(self.alice, self.bob), 'accepted')
+        self.assertEqual(request_follow(self.alice, self.bob), 'accepted')
+        self.assertEqual(self.counts(self.alice), (0, 1))
+        self.assertEqual(self.counts(self.bob), (1, 0))
+
+    def test_private_account_request_then_accept(self):
+        self.assertEqual(request_follow(self.alice, self.private), 'pending')
+        self.assertEqual(self.counts(self.private), (0, 0))
+        self.assertTrue(accept_follow(self.alice, self.private))
+        self.assertFalse(accept_follow(self.alice, self.private))
+        self.assertEqual(self.status(self.alice, self.private), 'accepted')
+        self.assertEqual(self.counts(self.private), (1, 0))
+        self.assertEqual(self.counts(self.alice), (0, 1))
+
+    def test_reject_and_request_again(self):
+        request_follow(self.alice, self.private)
+        self.assertTrue(reject_follow(self.alice, self.private))
+        self.assertFalse(accept_follow(self.alice, self.private))
+        self.assertEqual(self.status(self.alice, self.private), 'rejected')
+        self.assertEqual(request_follow(self.alice, self.private), 'pending')
+        self.assertEqual(self.counts(self.private), (0, 0))
+
+    def test_unfollow(self):
+        request_follow(self.alice, self.bob)
+        self.assertTrue(unfollow(self.alice, self.bob))
+        self.assertFalse(unfollow(self.alice, self.bob))
+        self.assertEqual(self.counts(self.bob), (0, 0))
+        self.assertEqual(self.counts(self.alice), (0, 0))
+
+    def test_withdraw_pending_request_keeps_counts(self):
+        request_follow(self.alice, self.private)
+        self.assertTrue(unfollow(self.alice, self.private))
+        self.assertIsNone(self.status(self.alice, self.private))
+        self.assertEqual(self.counts(self.private), (0, 0))
+
+    def test_delete_user_releases_counts(self):
+        request_follow(self.alice, self.bob)
+        request_follow(self.bob, self.alice)
+        self.bob.delete()
+        self.assertEqual(self.counts(self.alice), (0, 0))
+
+    def test_repair_recounts_from_follow_table(self):
+        request_follow(self.alice, self.bob)
+        User.objects.filter(pk=self.bob.pk).update(followers_count=7)
+        repair_follow_counts(0, self.private.pk + 1)
+        self.assertEqual(self.counts(self.bob), (1, 0))
+
+    def test_request_action_endpoint(self):
+        request_follow(self.alice, self.private)
+        client = APIClient()
+        client.force_authenticate(self.private)
+        url = f'/api/users/{self.alice.pk}/follow-request/'
+        self.assertEqual(client.post(url, {'action': 'accept'}, format='json').status_code, 200)
+        self.assertEqual(client.post(url, {'action': 'accept'}, format='json').status_code, 409)
+        self.assertEqual(client.post(url, {'action': 'maybe'}, format='json').status_code, 400)
+
+
+@override_settings(ACCESS_TOKEN_SIGNING_KEY='test-signing-key-0123456789', ACCESS_TOKEN_SECONDS=900)
+class TokenRotationTest(TestCase):
+    """簽章存取 token 與可輪替的更新 token"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('rotate@example.com', 'rotate', 'pw')
+
+    def test_access_token_round_trip(self):
+        token = issue_access_token(self.user.pk)
+        self.assertEqual(verify_access_token(token), self.user.pk)
+        with self.assertRaises(InvalidToken):
+            verify_access_token(token[:-2] + 'xx')
+        with override_settings(ACCESS_TOKEN_SIGNING_KEY='another-signing-key-0123456789'):
+            with self.assertRaises(InvalidToken):
+                verify_access_token(token)
+
+    def test_access_token_expires(self):
+        token = issue_access_token(self.user.pk)
+        with override_settings(ACCESS_TOKEN_SECONDS=-1):
+            with self.assertRaises(InvalidToken):
+                verify_access_token(token)
+
+    def test_refresh_rotates(self):
+        first = issue_token_pair(self.user)['refresh']
+        second = rotate_refresh_token(first)
+        self.assertEqual(verify_access_token(second['access']), self.user.pk)
+        third = rotate_refresh_token(second['refresh'])
+        self.assertNotEqual(third['refresh'], second['refresh'])
+
+    def test_reuse_revokes_whole_family(self):
+        other_session = issue_token_pair(self.user)['refresh']
+        first = issue_token_pair(self.user)['refresh']
+        second = rotate_refresh_token(first)['refresh']
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(first)  # 已使用的 token 再次出現：撤銷這次登入的所有更新 token
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(second)
+        # 其他登入工作階段不受影響
+        self.assertIn('access', rotate_refresh_token(other_session))
+
+    def test_unknown_and_inactive(self):
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token('not-a-token')
+        refresh = issue_token_pair(self.user)['refresh']
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(InvalidToken):
+            rotate_refresh_token(refresh)
+        self.assertTrue(RefreshToken.objects.filter(user=self.user, used_at__isnull=True).exists())
+
+    def test_refresh_endpoint(self):
+        refresh = issue_token_pair(self.user)['refresh']
+        client = APIClient()
+        response = client.post('/api/users/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(client.get('/api/users/profile/').status_code, 200)
+        self.assertEqual(
+            APIClient().post('/api/users/token/refresh/', {'refresh': refresh}, format='json').status_code, 401
+        )
+
+
+class BloomFilterTest(SimpleTestCase):
+    """Bloom filter 沒有漏判（加入過的一定命中），誤判率接近設定值"""
+
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, 0.01)
+        values = [f'u:user{n}' for n in range(5000)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(5000, 0.01)
+        for n in range(5000):
+            bloom.add(f'u:user{n}')
+        false_positives = sum(f'u:other{n}' in bloom for n in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+    def test_empty_filter(self):
+        self.assertNotIn('u:anyone', BloomFilter(0))
+
+
+class AvailabilityTest(TestCase):
+    """用戶名 / 電子郵件可用性：filter 未命中直接可用，命中時以資料庫確認"""
+
+    def setUp(self):
+        caches['auth'].clear()
+        availability._filter = None
+        User.objects.create_user('Taken@Example.com', 'TakenName', 'pw')
+
+    def test_existing_names_are_unavailable(self):
+        self.assertFalse(username_available('takenname'))
+        self.assertFalse(username_available(' TAKENNAME '))
+        self.assertFalse(email_available('taken@example.com'))
+
+    def test_unused_names_are_available(self):
+        self.assertTrue(username_available('someone-new'))
+        self.assertTrue(email_available('new@example.com'))
+
+    def test_user_registered_after_build(self):
+        self.assertTrue(username_available('latecomer'))
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('late@example.com', 'latecomer', 'pw')
+        self.assertFalse(username_available('latecomer'))
+        self.assertFalse(email_available('late@example.com'))
+
+    def test_other_worker_catches_up_from_change_log(self):
+        username_available('warmup')
+        availability.record_user('fromworker', 'worker@example.com')
+        # 模擬另一個 worker：filter 中沒有新名稱，日誌序號落後，查詢前補上日誌中的項目
+        availability._filter = BloomFilter(1024)
+        self.assertIn('u:fromworker', availability.current_filter())
+        self.assertIn('e:worker@example.com', availability.current_filter())
+
+
+class SkillPrefixIndexTest(SimpleTestCase):
+    """技能前綴索引：前綴與單字開頭都能命中，依使用次數排序"""
+
+    def setUp(self):
+        self.index = SkillPrefixIndex(
+            {1: 'React', 2: 'React Native', 3: 'Redux', 4: 'Python', 5: 'Node.js'},
+            {1: 10, 2: 5, 3: 7, 4: 20},
+        )
+
+    def ids(self, prefix, limit=10, index=None):
+        return [skill_id for skill_id, _, _ in (index or self.index).complete(prefix, limit)]
+
+    def test_prefix_ranked_by_usage(self):
+        self.assertEqual(self.ids('re'), [1, 3, 2])
+        self.assertEqual(self.index.complete('RE', limit=1), [(1, 'React', 10)])
+
+    def test_word_starts_match(self):
+        self.assertEqual(self.ids('nat'), [2])
+        self.assertEqual(self.ids('js'), [5])
+        self.assertEqual(self.ids('react n'), [2])
+
+    def test_empty_and_missing_prefix(self):
+        self.assertEqual(self.ids(''), [4, 1, 3, 2, 5])
+        self.assertEqual(self.ids('x'), [])
+        self.assertEqual(self.ids('xyz'), [])
+
+    def test_precomputed_matches_search(self):
+        for prefix in ('', 'r', 're', 'n', 'no', 'p', 'j'):
+            self.assertEqual(self.ids(prefix, PRECOMPUTED_K), self.index._search(prefix, PRECOMPUTED_K), prefix)
+        self.assertEqual(self.ids('re', PRECOMPUTED_K + 10), [1, 3, 2])
+
+    def test_with_skills_returns_new_index(self):
+        updated = self.index.with_skills([(6, 'Rust'), (7, 'Native Script')])
+        self.assertEqual(self.ids('r', index=updated), [1, 3, 2, 6])
+        self.assertEqual(self.ids('na', index=updated), [2, 7])
+        self.assertEqual(updated.max_id, 7)
+        self.assertEqual(self.ids('r'), [1, 3, 2])  # 原本的索引不變，讀取中的執行緒不受影響
+
+
+class SkillAutocompleteTest(TestCase):
+    """自動完成端點讀取目前的索引，新技能在目錄版本變動後出現"""
+
+    def setUp(self):
+        caches['default'].clear()
+        skill_index._index = None
+
+    def test_new_skill_appears(self):
+        Skill.objects.create(name='Django')
+        client = APIClient()
+        url = '/api/users/skills/autocomplete/'
+        self.assertEqual([item['name'] for item in client.get(url, {'q': 'dj'}).data], ['Django'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='Djangae')
+        names = [item['name'] for item in client.get(url, {'q': 'dja'}).data]
+        self.assertEqual(sorted(names), ['Djangae', 'Django'])
+        self.assertEqual(client.get(url, {'limit': 'x'}).status_code, 400)
@@ -0,0 +1,130 @@
+# apps/users/tokens.py
+# 存取 / 更新 token 模組，發出不需查詢任何儲存即可驗證的短效存取 token 與可輪替的更新 token
+# 功能：存取 token 以專用的 ACCESS_TOKEN_SIGNING_KEY 做 HMAC 簽章（django.core.signing，內含簽發時間），
+#       驗證只需比對簽章與時效；更新 token 只保存 SHA-256 雜湊，每次換發以一個條件 UPDATE 標記為已使用，
+#       已使用的 token 再次出現時視為外洩，撤銷同一登入工作階段的所有更新 token
+# 資料來源：settings.ACCESS_TOKEN_SIGNING_KEY、ACCESS_TOKEN_SECONDS、REFRESH_TOKEN_DAYS
+# 資料流向：authentication.py 的 AccessTokenAuthentication、views.py 的登入 / 註冊 / 換發 / 登出
+
+import hashlib
+import secrets
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RefreshToken
+
+ACCESS_TOKEN_SALT = 'apps.users.access'
+
+
+class InvalidToken(Exception):
+    """token 無效、過期或已被使用"""
+
+
+def access_token_seconds():
+    return getattr(settings, 'ACCESS_TOKEN_SECONDS', 900)
+
+
+SIGNING_KEY_ERROR = (
+    'ACCESS_TOKEN_SIGNING_KEY must be set in the environment to a private value '
+    '(not a "django-insecure-" default and not SECRET_KEY).'
+)
+
+
+def bearer_tokens_enabled():
+    """ACCESS_TOKEN_SIGNING_KEY 已設定為私有值（不是 django-insecure- 預設值，也不是 SECRET_KEY）時才簽發 / 接受存取 token"""
+    key = getattr(settings, 'ACCESS_TOKEN_SIGNING_KEY', '')
+    return bool(key) and not key.startswith('django-insecure-') and key != settings.SECRET_KEY
+
+
+def signing_key():
+    """
+    存取 token 的簽章金鑰，只在簽發或驗證存取 token 時讀取；未正確設定時拋出 ImproperlyConfigured
+    （manage.py 指令與舊的 Token 端點不受影響，部署檢查見 checks.py）
+    """
+    if not bearer_tokens_enabled():
+        raise ImproperlyConfigured(SIGNING_KEY_ERROR)
+    return settings.ACCESS_TOKEN_SIGNING_KEY
+
+
+def issue_access_token(user_id):
+    """簽發存取 token，內容只有用戶 id（簽發時間由簽章器附上）"""
+    return signing.dumps({'uid': user_id}, key=signing_key(), salt=ACCESS_TOKEN_SALT)
+
+
+def verify_access_token(token):
+    """驗證簽章與時效，回傳用戶 id；不讀取資料庫或快取"""
+    try:
+        payload = signing.loads(token, key=signing_key(), salt=ACCESS_TOKEN_SALT, max_age=access_token_seconds())
+    except signing.BadSignature as error:  # 包含 SignatureExpired
+        raise InvalidToken(str(error)) from error
+    return payload['uid']
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def _issue_refresh_token(user_id, family):
+    token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user_id=user_id, token_hash=_hash(token), family=family,
+        expires_at=timezone.now() + timedelta(days=getattr(settings, 'REFRESH_TOKEN_DAYS', 30)),
+    )
+    return token
+
+
+def issue_token_pair(user):
+    """
+    登入時簽發新的存取 / 更新 token（新的登入工作階段）
+    簽章金鑰尚未設定時回傳空字典，登入 / 註冊只回傳舊的 Token，遷移期間舊的客戶端不受影響
+    """
+    if not bearer_tokens_enabled():
+        return {}
+    return {
+        'access': issue_access_token(user.pk),
+        'refresh': _issue_refresh_token(user.pk, uuid.uuid4()),
+        'access_expires_in': access_token_seconds(),
+    }
+
+
+def rotate_refresh_token(token):
+    """
+    以更新 token 換發新的存取 / 更新 token，舊的更新 token 同時失效
+    以條件 UPDATE 標記使用，同一個 token 同時被送出兩次時只有一個請求成功
+    """
+    token_hash = _hash(token)
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = RefreshToken.objects.filter(
+            token_hash=token_hash, used_at__isnull=True, expires_at__gt=now, user__is_active=True
+        ).update(used_at=now)
+        row = RefreshToken.objects.filter(token_hash=token_hash).values('user_id', 'family', 'used_at').first()
+        if claimed:
+            return {
+                'access': issue_access_token(row['user_id']),
+                'refresh': _issue_refresh_token(row['user_id'], row['family']),
+                'access_expires_in': access_token_seconds(),
+            }
+        if row and row['used_at'] is not None:
+            # 已輪替過的 token 被重複送出：可能已外洩，撤銷整個登入工作階段
+            RefreshToken.objects.filter(family=row['family']).delete()
+    raise InvalidToken('Refresh token is invalid, expired or already used.')
+
+
+def revoke_refresh_tokens(user_id):
+    """撤銷用戶所有的更新 token（登出、修改密碼）"""
+    RefreshToken.objects.filter(user_id=user_id).delete()
+
+
+def prune_refresh_tokens():
+    """刪除已過期或已使用超過一天的更新 token，回傳刪除數量（已使用的保留一天，用來偵測重複使用）"""
+    now = timezone.now()
+    expired = RefreshToken.objects.filter(expires_at__lte=now)
+    used = RefreshToken.objects.filter(used_at__lte=now - timedelta(days=1))
+    return expired.delete()[0] + used.delete()[0]
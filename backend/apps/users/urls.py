@@ -4,12 +4,28 @@
 # 資料流向：對應 views.py 的各個 API class
 
 from django.urls import path
-from .views import RegisterView, LoginView, ProfileView, SettingsView, SavedPostsView
+from .views import (
+    RegisterView, LoginView, AvailabilityView, TokenRefreshView, LogoutView, PasswordChangeView,
+    ProfileView, SettingsView, SkillCatalogView, SkillAutocompleteView, SavedPostsView, PresenceView,
+    FollowView, FollowersView, FollowingView, FollowRequestsView, FollowRequestActionView,
+)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),  # 註冊端點，對應 RegisterView
     path('login/', LoginView.as_view(), name='login'),          # 登入端點，對應 LoginView
+    path('availability/', AvailabilityView.as_view(), name='availability'), # 用戶名 / 電子郵件可用性，對應 AvailabilityView
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'), # 存取 token 換發端點，對應 TokenRefreshView
+    path('logout/', LogoutView.as_view(), name='logout'),       # 登出端點，對應 LogoutView
+    path('password/', PasswordChangeView.as_view(), name='password-change'), # 修改密碼端點，對應 PasswordChangeView
     path('profile/', ProfileView.as_view(), name='profile'),    # 個人檔案端點，對應 ProfileView
     path('settings/', SettingsView.as_view(), name='settings'), # 設定端點，對應 SettingsView
+    path('skills/', SkillCatalogView.as_view(), name='skill-catalog'), # 技能目錄端點，對應 SkillCatalogView
+    path('skills/autocomplete/', SkillAutocompleteView.as_view(), name='skill-autocomplete'), # 技能自動完成，對應 SkillAutocompleteView
     path('saved-posts/', SavedPostsView.as_view(), name='saved-posts'), # 已儲存貼文端點，對應 SavedPostsView
+    path('presence/', PresenceView.as_view(), name='presence'), # 上線狀態端點，對應 PresenceView
+    path('<int:user_id>/follow/', FollowView.as_view(), name='user-follow'), # 追蹤 / 取消追蹤，對應 FollowView
+    path('<int:user_id>/followers/', FollowersView.as_view(), name='user-followers'), # 追蹤者列表，對應 FollowersView
+    path('<int:user_id>/following/', FollowingView.as_view(), name='user-following'), # 追蹤中列表，對應 FollowingView
+    path('follow-requests/', FollowRequestsView.as_view(), name='follow-requests'), # 收到的追蹤請求列表，對應 FollowRequestsView
+    path('<int:follower_id>/follow-request/', FollowRequestActionView.as_view(), name='follow-request-action'), # 接受 / 拒絕追蹤請求，對應 FollowRequestActionView
 ]
\ No newline at end of file
@@ -7,19 +7,32 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
-from .serializers import UserSerializer, RegisterSerializer, LoginSerializer
-from .models import User
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from .serializers import UserSerializer, RegisterSerializer, LoginSerializer, FollowListSerializer
+from .models import User, Follow
 from apps.posts.models import Post
 from apps.posts.serializers import PostSerializer
+from apps.analytics.models import ViewSketch
+from apps.analytics.services import with_unique_viewers
 from rest_framework.views import APIView
-from .models import Skill
+from .presence import heartbeat, last_seen, visible_user_ids
+from .availability import email_available, username_available
+from .skills import resolve_skills, set_user_skills, skill_catalog
+from .skill_index import current_index
+from .tokens import InvalidToken, bearer_tokens_enabled, issue_token_pair, revoke_refresh_tokens, rotate_refresh_token
+from .follows import (
+    FOLLOW_PAGE_SIZE, MAX_FOLLOW_PAGE_SIZE, accept_follow, encode_follow_cursor, follow_page, following_ids,
+    reject_follow, request_follow, unfollow,
+)
 
 class RegisterView(generics.CreateAPIView):
     """
     用戶註冊視圖
     - POST: 註冊新用戶，回傳 token
     - 欄位：username, email, password
-    - 回應：{"token": ...}
+    - 回應：{"token": ..., "access": ..., "refresh": ..., "access_expires_in": 秒數}
+      token 為舊的永久 token（遷移期間保留），新客戶端改用 access（Bearer）與 refresh
     """
     serializer_class = RegisterSerializer
     permission_classes = [permissions.AllowAny]  # 允許未認證用戶訪問
@@ -30,14 +43,14 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)  # 驗證資料
         user = serializer.save()                   # 儲存用戶
         token, _ = Token.objects.get_or_create(user=user)  # 創建或獲取 Token
-        return Response({"token": token.key})      # 回傳 Token
+        return Response({"token": token.key, **issue_token_pair(user)})  # 回傳 Token 與存取 / 更新 token
 
 class LoginView(generics.GenericAPIView):
     """
     用戶登入視圖
     - POST: 驗證用戶名/電子郵件與密碼，回傳 token
     - 欄位：identifier(用戶名或電子郵件), password
-    - 回應：{"token": ...} 或 {"error": ...}
+    - 回應：{"token": ..., "access": ..., "refresh": ..., "access_expires_in": 秒數} 或 {"error": ...}
     """
     serializer_class = LoginSerializer
     permission_classes = [permissions.AllowAny]  # 允許未認證用戶訪問
@@ -66,10 +79,90 @@ class LoginView(generics.GenericAPIView):
         # 驗證密碼
         if user.check_password(password):
             token, _ = Token.objects.get_or_create(user=user)
-            return Response({"token": token.key})
+            return Response({"token": token.key, **issue_token_pair(user)})
         
         return Response({"error": "無效的登入資訊"}, status=400)
 
+class TokenRefreshView(APIView):
+    """
+    存取 token 換發視圖
+    - POST: 欄位 refresh；回傳新的存取 token 與新的更新 token，舊的更新 token 立即失效
+    - 已使用過的更新 token 再次送出時，該次登入的所有更新 token 都會被撤銷
+    - 回應：{"access": ..., "refresh": ..., "access_expires_in": 秒數}
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if not refresh:
+            return Response({"error": "必須提供 refresh"}, status=status.HTTP_400_BAD_REQUEST)
+        if not bearer_tokens_enabled():
+            # 簽章金鑰尚未設定時不換發（更新 token 保持未使用），客戶端繼續使用舊的 Token
+            return Response({"error": "存取 token 尚未啟用"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        try:
+            return Response(rotate_refresh_token(refresh))
+        except InvalidToken:
+            return Response({"error": "refresh 無效或已過期，請重新登入"}, status=status.HTTP_401_UNAUTHORIZED)
+
+class AvailabilityView(APIView):
+    """
+    用戶名 / 電子郵件可用性視圖（註冊畫面即時檢查）
+    - GET: 參數 username、email（至少一個）；一定未被使用時直接由記憶體回答，可能已被使用時才查詢資料庫
+    - 回應：{"username": bool, "email": bool}（只包含有提供的欄位）
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        username = request.query_params.get('username', '').strip()
+        email = request.query_params.get('email', '').strip()
+        if not username and not email:
+            return Response({"error": "必須提供 username 或 email"}, status=status.HTTP_400_BAD_REQUEST)
+        result = {}
+        if username:
+            result['username'] = username_available(username)
+        if email:
+            result['email'] = email_available(email)
+        return Response(result)
+
+class LogoutView(APIView):
+    """
+    登出視圖
+    - POST: 刪除目前的 token（認證快取同時清除）並撤銷所有更新 token，之後以這些 token 的請求都會被拒絕
+      已簽發的存取 token 在 ACCESS_TOKEN_SECONDS 內到期
+    - 權限：僅認證用戶
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(user_id=request.user.id).delete()
+        revoke_refresh_tokens(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class PasswordChangeView(APIView):
+    """
+    修改密碼視圖
+    - POST: 欄位 old_password、new_password；成功後舊 token 與更新 token 失效（所有裝置需重新登入），回傳新的 token
+    - 權限：僅認證用戶
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        if not user.check_password(request.data.get('old_password', '')):
+            return Response({"error": "舊密碼錯誤"}, status=status.HTTP_400_BAD_REQUEST)
+        new_password = request.data.get('new_password')
+        if not new_password:
+            return Response({"error": "必須提供新密碼"}, status=status.HTTP_400_BAD_REQUEST)
+
+        user.set_password(new_password)
+        user.save(update_fields=['password'])  # 觸發 post_save，清除認證快取中的舊快照
+        Token.objects.filter(user=user).delete()
+        revoke_refresh_tokens(user.id)
+        token = Token.objects.create(user=user)
+        return Response({"token": token.key, **issue_token_pair(user)})
+
 class ProfileView(APIView):
     """
     個人檔案視圖，支援讀取與更新
@@ -86,48 +179,49 @@ class ProfileView(APIView):
     def patch(self, request):
         user = request.user
         print("Received data:", request.data)
+        # 只寫回這次修改的欄位：request.user 可能是認證快取的快照，全列 save() 會以舊的追蹤計數覆蓋資料庫
+        changed = []
         
         # 自行處理每個欄位，避開序列化器驗證問題
         if 'username' in request.data and request.data['username']:
             user.username = request.data['username']
+            changed.append('username')
             
         if 'email' in request.data:
             if request.data['email'] and request.data['email'].strip():
                 user.email = request.data['email']
             else:
                 user.email = None
+            changed.append('email')
                 
         if 'phone_number' in request.data:
             if request.data['phone_number'] and request.data['phone_number'].strip():
                 user.phone_number = request.data['phone_number']
             else:
                 user.phone_number = None
+            changed.append('phone_number')
                 
         if 'bio' in request.data:
             user.bio = request.data['bio']
+            changed.append('bio')
             
         if 'skills' in request.data:
             # 確保 skills 是列表
             if isinstance(request.data['skills'], list):
-                # 過濾空字串
-                skill_names = [skill.strip() for skill in request.data['skills'] if isinstance(skill, str) and skill.strip()]
-                # 獲取或創建對應的技能對象
-                skill_objects = []
-                for skill_name in skill_names:
-                    skill_obj, created = Skill.objects.get_or_create(name=skill_name)
-                    skill_objects.append(skill_obj)
-                # 使用set方法設置多對多關係
-                user.skills.set(skill_objects)
+                # 一次查詢已存在的技能、一次批次建立缺少的技能，再只寫入有變動的中介表列
+                set_user_skills(user, resolve_skills(request.data['skills']))
             else:
                 return Response({"skills": "技能必須為陣列"}, status=status.HTTP_400_BAD_REQUEST)
         
         # 對於 avatar，忽略空字串和其他非檔案值
         if 'avatar' in request.data and hasattr(request.data['avatar'], 'name'):
             user.avatar = request.data['avatar']
+            changed.append('avatar')
         
         # 儲存用戶資料
         try:
-            user.save()
+            if changed:
+                user.save(update_fields=changed)
             serializer = UserSerializer(user)
             return Response(serializer.data)
         except Exception as e:
@@ -140,24 +234,133 @@ class UserDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.AllowAny]
     lookup_field = 'id'
 
-class FollowToggleView(APIView):
+class FollowView(APIView):
+    """
+    追蹤視圖
+    - POST: 追蹤用戶（私密帳號改為送出追蹤請求），重複送出不會重複追蹤
+    - DELETE: 取消追蹤或撤回追蹤請求
+    - 權限：僅認證用戶
+    - 回應：{"status": "accepted" / "pending" / "rejected" / null}
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, user_id):
-        target_user = User.objects.get(id=user_id)
+        target_user = get_object_or_404(User, id=user_id)
         if target_user == request.user:
             return Response({'detail': '不能追蹤自己'}, status=status.HTTP_400_BAD_REQUEST)
-        if target_user in request.user.following.all():
-            request.user.following.remove(target_user)
-            return Response({'detail': '已取消追蹤'})
+        return Response({'status': request_follow(request.user, target_user)})
+
+    def delete(self, request, user_id):
+        target_user = get_object_or_404(User, id=user_id)
+        unfollow(request.user, target_user)
+        return Response({'status': None})
+
+class FollowListView(APIView):
+    """
+    追蹤列表視圖的共用邏輯（追蹤者 / 追蹤中），依追蹤時間由新到舊
+    - GET: 參數 cursor（上一頁回傳的 next_cursor）、limit（預設 20，最多 100）
+    - 私密帳號只有本人與已接受的追蹤者可以查看
+    - 回應：{"results": [{"id", "user", "is_following", "created_at"}], "has_more": bool, "next_cursor": 字串或 null}
+    """
+    permission_classes = [permissions.AllowAny]
+    side = None  # 列表顯示的一端：follower（追蹤者列表）或 following（追蹤中列表）
+    owner_field = None  # 列表擁有者在 Follow 上的欄位
+
+    def get(self, request, user_id):
+        target_user = get_object_or_404(User.objects.only('id', 'is_private'), id=user_id)
+        if target_user.is_private and request.user != target_user and not (
+            request.user.is_authenticated and request.user.is_following(target_user)
+        ):
+            return Response({'detail': '此帳號為私密帳號'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            limit = min(max(int(request.query_params.get('limit', FOLLOW_PAGE_SIZE)), 1), MAX_FOLLOW_PAGE_SIZE)
+            relations = Follow.objects.filter(**{self.owner_field: target_user}, status='accepted').select_related(self.side)
+            page, has_more = follow_page(relations, request.query_params.get('cursor'), limit)
+        except ValueError:
+            return Response({'detail': 'cursor 或 limit 格式錯誤'}, status=status.HTTP_400_BAD_REQUEST)
+
+        context = {
+            'request': request,
+            'side': self.side,
+            'following_ids': following_ids(request.user, [getattr(row, f'{self.side}_id') for row in page]),
+        }
+        return Response({
+            'results': FollowListSerializer(page, many=True, context=context).data,
+            'has_more': has_more,
+            'next_cursor': encode_follow_cursor(page[-1]) if has_more else None,
+        })
+
+class FollowersView(FollowListView):
+    """用戶的追蹤者列表"""
+    side = 'follower'
+    owner_field = 'following'
+
+class FollowingView(FollowListView):
+    """用戶正在追蹤的用戶列表"""
+    side = 'following'
+    owner_field = 'follower'
+
+class FollowRequestsView(APIView):
+    """
+    收到的追蹤請求列表（pending），依請求時間由新到舊，直接讀取追蹤關係，不依賴通知
+    （請求者被靜音、通知類型關閉或通知超過保留期被清除時仍能看到並處理）
+    - GET: 參數 cursor（上一頁回傳的 next_cursor）、limit（預設 20，最多 100）
+    - 權限：僅認證用戶
+    - 回應：{"results": [{"id", "user", "is_following", "created_at"}], "has_more": bool, "next_cursor": 字串或 null}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', FOLLOW_PAGE_SIZE)), 1), MAX_FOLLOW_PAGE_SIZE)
+            relations = Follow.objects.filter(following=request.user, status='pending').select_related('follower')
+            page, has_more = follow_page(relations, request.query_params.get('cursor'), limit)
+        except ValueError:
+            return Response({'detail': 'cursor 或 limit 格式錯誤'}, status=status.HTTP_400_BAD_REQUEST)
+
+        context = {
+            'request': request,
+            'side': 'follower',
+            'following_ids': following_ids(request.user, [row.follower_id for row in page]),
+        }
+        return Response({
+            'results': FollowListSerializer(page, many=True, context=context).data,
+            'has_more': has_more,
+            'next_cursor': encode_follow_cursor(page[-1]) if has_more else None,
+        })
+
+class FollowRequestActionView(APIView):
+    """
+    處理追蹤請求動作視圖（依請求者處理，不需要對應的通知）
+    - POST: 接受或拒絕 follower_id 送給目前用戶的追蹤請求，參數 action（accept / reject）
+    - 權限：僅認證用戶
+    - 請求已處理、已撤回或不存在時回傳 409
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, follower_id):
+        action = request.data.get('action')  # 'accept' 或 'reject'
+        if action not in ['accept', 'reject']:
+            return Response({'error': '無效的操作，必須是 accept 或 reject'}, status=status.HTTP_400_BAD_REQUEST)
+        follower = get_object_or_404(User, id=follower_id)
+
+        # 追蹤狀態機在同一交易中更新追蹤關係、通知狀態與計數，並通知請求者（依請求者的通知偏好過濾）
+        if action == 'accept':
+            changed = accept_follow(follower, request.user)
+            message = '已接受追蹤請求'
         else:
-            request.user.following.add(target_user)
-            return Response({'detail': '已追蹤'})
+            changed = reject_follow(follower, request.user)
+            message = '已拒絕追蹤請求'
+
+        if not changed:
+            # 請求已被處理或撤回（例如重複點擊），狀態不再變動
+            return Response({'error': '追蹤請求已處理或不存在'}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'success', 'message': message})
 
 class SettingsView(generics.UpdateAPIView):
     """
     用戶設定視圖，支援更新用戶設定
-    - PUT/PATCH: 更新個人設定
+    - PUT/PATCH: 更新個人設定（UserSerializer.update 只寫回驗證過的欄位）
     - 權限：僅認證用戶
     """
     serializer_class = UserSerializer
@@ -167,6 +370,45 @@ class SettingsView(generics.UpdateAPIView):
         # 返回當前登入用戶的資料以供更新
         return self.request.user
 
+class SkillCatalogView(APIView):
+    """
+    技能目錄視圖（個人檔案與作品集的技能選擇器）
+    - GET: 回傳所有技能，由行程內的版本化快取提供；帶 ETag 與 Cache-Control，
+      客戶端以 If-None-Match 重新驗證時內容未變動回傳 304
+    - 回應：[{"id", "name", "category", "icon"}]
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        skills, etag = skill_catalog()
+        headers = {
+            'ETag': etag,
+            'Cache-Control': f"public, max-age={getattr(settings, 'SKILL_CATALOG_MAX_AGE', 3600)}",
+        }
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(skills, headers=headers)
+
+class SkillAutocompleteView(APIView):
+    """
+    技能自動完成視圖（技能選擇器每次輸入時呼叫）
+    - GET: 參數 q（前綴，不分大小寫，也比對名稱中每個單字的開頭）、limit（預設 10，最多 50）
+      由記憶體中的前綴索引回答，不查詢資料庫
+    - 回應：[{"id", "name", "usage"}]，依使用次數由多到少
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), self.max_limit)
+        except ValueError:
+            return Response({"error": "limit 必須是整數"}, status=status.HTTP_400_BAD_REQUEST)
+        results = current_index().complete(request.query_params.get('q', ''), limit)
+        return Response([{'id': skill_id, 'name': name, 'usage': usage} for skill_id, name, usage in results])
+
 class SavedPostsView(generics.ListAPIView):
     """
     已儲存貼文視圖，列出用戶儲存的貼文
@@ -180,4 +422,42 @@ class SavedPostsView(generics.ListAPIView):
     def get_queryset(self):
         # 返回當前用戶儲存的貼文列表
         user = self.request.user
-        return Post.objects.filter(save__user=user)  # 過濾出用戶儲存的貼文
\ No newline at end of file
+        # 過濾出用戶儲存的貼文，並以子查詢帶出不重複瀏覽者（序列化時不需逐筆查詢）
+        return with_unique_viewers(Post.objects.filter(save__user=user), ViewSketch.KIND_POST)
+
+class PresenceView(APIView):
+    """
+    用戶上線狀態視圖
+    - POST: 心跳，客戶端在前景時定期呼叫，標記目前用戶在線（只寫快取）
+    - GET: 帶 ids（逗號分隔的用戶 id，最多 100 個），回傳各用戶是否在線與最後上線時間；
+           只回傳自己、已追蹤的用戶與同一聊天室的參與者，其餘 id 直接略過
+    - 回應：[{"user": id, "online": bool, "last_seen": ...}]
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+
+    def post(self, request):
+        return Response({'user': request.user.id, 'online': True, 'last_seen': heartbeat(request.user.id)})
+
+    def get(self, request):
+        try:
+            user_ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        except ValueError:
+            return Response({'detail': 'ids 必須是以逗號分隔的整數'}, status=status.HTTP_400_BAD_REQUEST)
+        user_ids = list(dict.fromkeys(user_ids))[:self.max_ids]
+        visible = visible_user_ids(request.user, user_ids)
+        user_ids = [user_id for user_id in user_ids if user_id in visible]
+        online = last_seen(user_ids)
+        # 離線用戶的最後上線時間取自資料庫（定期寫回的值）
+        offline = dict(
+            User.objects.filter(id__in=[user_id for user_id in user_ids if user_id not in online])
+            .values_list('id', 'last_online')
+        )
+        return Response([
+            {
+                'user': user_id,
+                'online': user_id in online,
+                'last_seen': online.get(user_id) or offline[user_id],
+            }
+            for user_id in user_ids if user_id in online or user_id in offline
+        ])
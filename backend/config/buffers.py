@@ -0,0 +1,93 @@
+# config/buffers.py
+# 行程內寫入緩衝模組，供高頻但可延遲的寫入（上線時間、瀏覽次數、瀏覽草稿）共用
+# 功能：請求只在持鎖的情況下更新行程內緩衝，不在請求中寫資料庫；
+#       每個緩衝在第一次寫入時啟動一條背景計時執行緒，每隔設定的秒數取出緩衝內容交給寫回函式；
+#       寫回失敗時依緩衝的 restore 放回（或放棄）這一批，行程結束時（atexit）寫回所有緩衝
+# 資料來源：各 app 的記錄函式（users/presence.py、portfolios/counters.py、analytics/services.py）
+# 資料流向：各緩衝的寫回函式
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_buffers = []  # 所有已建立的緩衝，行程結束時逐一寫回
+
+
+class WriteBuffer:
+    """
+    行程內寫入緩衝
+    name: 緩衝名稱（記錄錯誤用）
+    write: 寫回函式，接收取出的緩衝內容，回傳寫回的筆數；拋出 DatabaseError 視為失敗
+    interval_setting / default_interval: 寫回間隔（秒）的設定名稱與預設值
+    factory: 建立空緩衝的函式（dict、Counter 等）
+    restore: 寫回失敗時把取出的內容放回緩衝的函式 restore(buffer, pending)；為 None 時放棄這一批
+    """
+
+    def __init__(self, name, write, interval_setting, default_interval, factory=dict, restore=None):
+        self.name = name
+        self._write = write
+        self._interval_setting = interval_setting
+        self._default_interval = default_interval
+        self._factory = factory
+        self._restore = restore
+        self._pending = factory()
+        self._lock = threading.Lock()
+        self._timer_pid = None  # 計時執行緒所在的行程（fork 出的 worker 不會繼承執行緒，需要重新啟動）
+        _buffers.append(self)
+
+    @property
+    def interval(self):
+        return getattr(settings, self._interval_setting, self._default_interval)
+
+    def update(self, mutate):
+        """持鎖呼叫 mutate(buffer) 更新緩衝並回傳其結果；第一次寫入時啟動計時執行緒"""
+        with self._lock:
+            result = mutate(self._pending)
+            if self._timer_pid != os.getpid():
+                self._timer_pid = os.getpid()
+                threading.Thread(target=self._run, name=f'{self.name}-flush', daemon=True).start()
+        return result
+
+    def flush(self):
+        """取出緩衝內容並寫回，回傳寫回的筆數；失敗時記錄錯誤並依 restore 放回，回傳 0"""
+        with self._lock:
+            pending, self._pending = self._pending, self._factory()
+        if not pending:
+            return 0
+        try:
+            return self._write(pending)
+        except DatabaseError:
+            logger.exception('Failed to flush %s (%d entries)', self.name, len(pending))
+            if self._restore is not None:
+                with self._lock:
+                    self._restore(self._pending, pending)
+            return 0
+
+    def _run(self):
+        """背景計時執行緒：每隔 interval 秒寫回一次，執行緒自己的資料庫連線依 CONN_MAX_AGE 回收"""
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Unexpected error while flushing %s', self.name)
+            finally:
+                close_old_connections()
+
+
+def flush_all():
+    """寫回所有緩衝（行程結束時）"""
+    for buffer in _buffers:
+        buffer.flush()
+
+
+# 行程結束時寫回尚未持久化的緩衝內容
+atexit.register(flush_all)
@@ -1,5 +1,6 @@
 # Django 專案設定檔案，包含資料庫與應用程式配置
 
+import os
 from pathlib import Path
 
 # 專案根目錄路徑
@@ -30,6 +31,8 @@ INSTALLED_APPS = [
     'apps.private_messages', # 私訊應用
     'apps.portfolios', # 新增作品集應用
     'apps.search', # 新增搜尋應用
+    'apps.analytics', # 瀏覽分析應用
+    'apps.recommendations', # 推薦應用
 ]
 
 # 中間件設定
@@ -78,6 +81,72 @@ DATABASES = {
     }
 }
 
+# 私訊分片：訊息、搜尋詞、歸檔區塊依聊天室分散到 MESSAGE_SHARDS 列出的資料庫，其餘資料表只使用 default
+# MESSAGE_SHARD_HOSTS 以逗號分隔額外分片的 host:port（本機搭配 docker-compose 的 db_shard1：localhost:5434）
+# 每個分片需執行 python manage.py migrate --database=message_shard<n>；分片只能在尾端新增，
+# 新增後以 python manage.py rebalance_message_shards 搬移既有聊天室
+MESSAGE_SHARDS = ['default']
+for _index, _address in enumerate(filter(None, os.environ.get('MESSAGE_SHARD_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASES[f'message_shard{_index}'] = {**DATABASES['default'], 'HOST': _host, 'PORT': _port or '5432'}
+    MESSAGE_SHARDS.append(f'message_shard{_index}')
+DATABASE_ROUTERS = ['apps.private_messages.sharding.MessageShardRouter']
+
+# 快取設定：presence 存放上線狀態與輸入中提示等短暫資料（帶 TTL，不寫資料庫）
+# 多個 worker 時需共用同一個快取服務，設定 PRESENCE_CACHE_URL（例如 redis://localhost:6379/1，需安裝 redis 套件）
+CACHES = {
+    # 預設快取（技能目錄版本號等）：多個 worker 共用時設定 CACHE_URL 使用 Redis
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CACHE_URL'],
+    } if os.environ.get('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'presence': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['PRESENCE_CACHE_URL'],
+    } if os.environ.get('PRESENCE_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'presence',
+    },
+    # 認證與帳號快取（token 快照、用戶名可用性變更日誌）：多個 API worker 共用（設定 AUTH_CACHE_URL 時使用 Redis）
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['AUTH_CACHE_URL'],
+    } if os.environ.get('AUTH_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+    },
+}
+PRESENCE_TTL_SECONDS = 60              # 心跳後維持在線的秒數
+PRESENCE_PERSIST_SECONDS = 300         # 每隔多久將最後上線時間批次寫回 User.last_online
+PRIVATE_MESSAGE_TYPING_SECONDS = 6     # 輸入中提示的存活秒數
+AUTH_CACHE_SECONDS = 300               # token 與用戶快照在 auth 快取的存活秒數
+AUTH_LOCAL_CACHE_SECONDS = 5           # 行程內 LRU 的存活秒數（其他 worker 的變更最多延遲這麼久生效）
+AUTH_LOCAL_CACHE_SIZE = 1024           # 行程內 LRU 最多保留的 token 數
+ACCESS_TOKEN_SECONDS = 900             # 簽章存取 token 的有效秒數（到期前無法撤銷，保持短效）
+# 簽章存取 token 的金鑰：只從環境變數讀取（例如 python -c "import secrets; print(secrets.token_urlsafe(50))" 產生），
+# 未設定或仍為 django-insecure- 開頭的預設值時不簽發 / 不接受存取 token（只能使用舊的 Token），
+# check --deploy 回報錯誤；不會以公開的 SECRET_KEY 簽章
+ACCESS_TOKEN_SIGNING_KEY = os.environ.get('ACCESS_TOKEN_SIGNING_KEY', '')
+REFRESH_TOKEN_DAYS = 30                # 更新 token 的有效天數（每次換發都會輪替）
+AVAILABILITY_BLOOM_ERROR_RATE = 0.01   # 用戶名 / 電子郵件 Bloom filter 的誤判率（誤判時才查詢資料庫）
+AVAILABILITY_REBUILD_SECONDS = 3600    # Bloom filter 定期從資料庫重建（清除改名前的舊名稱）
+SKILL_CATALOG_MAX_AGE = 3600           # 技能目錄的 HTTP 快取秒數（之後以 ETag 重新驗證）
+SKILL_INDEX_REBUILD_SECONDS = 600      # 技能自動完成索引定期重建（更新使用次數），新技能則即時插入
+
+# 作品集瀏覽次數先累積在記憶體，每隔此秒數以一個 UPDATE 批次寫回
+PORTFOLIO_VIEW_FLUSH_SECONDS = 5
+# 作品集詳情內嵌的最新評論數，其餘評論由 /portfolios/<id>/comments/ 以游標分頁取得
+PORTFOLIO_DETAIL_COMMENTS = 3
+# 貼文與作品集的不重複瀏覽者草稿（HyperLogLog）先更新在記憶體，每隔此秒數合併寫回
+ANALYTICS_FLUSH_SECONDS = 10
+
+# 推薦：python manage.py build_skill_recommendations 定期以技能向量重新計算，每個來源保留的鄰居數
+RECOMMENDATION_TOP_K = 20
+# 追蹤事件建立超過此秒數才套用到追蹤圖（需大於追蹤相關交易的最長時間，避免跳過較晚提交的事件）
+FOLLOW_EVENT_SETTLE_SECONDS = 30
+
 # 自定義用戶模型
 AUTH_USER_MODEL = 'users.User'
 
@@ -111,9 +180,48 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'apps.users.authentication.AccessTokenAuthentication',  # Bearer：短效簽章存取 token
+        'apps.users.authentication.CachedTokenAuthentication',  # Token：舊的永久 token，遷移期間保留
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-}
\ No newline at end of file
+}
+# 離線推播設定：各平台推播閘道（BACKEND 為閘道類別路徑，OPTIONS 傳入建構子）
+# local 平台供開發測試，搭配 python manage.py push_gateway_stub 啟動本地閘道
+PUSH_GATEWAYS = {
+    'ios': {
+        'BACKEND': 'apps.notifications.push.APNsGateway',
+        'OPTIONS': {
+            'endpoint': 'https://api.push.apple.com',
+            'topic': 'com.engineerhub.app',
+            'auth_token': '',
+        },
+    },
+    'android': {
+        'BACKEND': 'apps.notifications.push.FCMGateway',
+        'OPTIONS': {
+            'endpoint': 'https://fcm.googleapis.com/fcm/send',
+            'server_key': '',
+        },
+    },
+    'local': {
+        'BACKEND': 'apps.notifications.push.LocalHTTPGateway',
+        'OPTIONS': {
+            'endpoint': 'http://127.0.0.1:8765/push/',
+        },
+    },
+}
+PUSH_MAX_ATTEMPTS = 5           # 單則推播最多嘗試次數
+PUSH_RETRY_BASE_SECONDS = 30    # 重試退避基礎秒數（每次失敗加倍）
+PUSH_RETRY_MAX_SECONDS = 3600   # 重試退避上限秒數
+PUSH_LEASE_SECONDS = 900        # 領取後的租期（需大於一輪投遞的最長時間），背景工作中途當機時租期到期後重新投遞
+
+# 通知保留期設定：過期通知由 python manage.py prune_notifications 分批刪除
+NOTIFICATION_RETENTION_READ_DAYS = 30     # 已讀通知保留天數
+NOTIFICATION_RETENTION_UNREAD_DAYS = 90   # 未讀通知保留天數
+NOTIFICATION_PRUNE_BATCH_SIZE = 1000      # 每批刪除筆數
+
+# 私訊冷熱分層：超過保留天數的訊息由 python manage.py archive_private_messages 打包成壓縮區塊
+PRIVATE_MESSAGE_HOT_DAYS = 180              # 熱資料表保留的天數
+PRIVATE_MESSAGE_ARCHIVE_BLOCK_SIZE = 500    # 每個歸檔區塊的訊息數
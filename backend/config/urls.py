@@ -10,6 +10,8 @@ urlpatterns = [
     path('api/search/', include('apps.search.urls')),  # 搜尋應用 API 路由，處理搜尋相關請求
     path('api/notifications/', include('apps.notifications.urls')),  # 通知應用 API 路由，處理通知相關請求
     path('api/portfolios/', include('apps.portfolios.urls')),  # 作品集應用 API 路由，處理作品集相關請求
+    path('api/analytics/', include('apps.analytics.urls')),  # 瀏覽分析 API 路由，提供創作者的不重複瀏覽者統計
+    path('api/recommendations/', include('apps.recommendations.urls')),  # 推薦 API 路由，提供相似作品集與技能相近的工程師
     path('api/private_messages/', include('apps.private_messages.urls')), # 私訊應用 API 路由，處理私訊相關請求    
 ]
 